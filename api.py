@@ -0,0 +1,444 @@
+"""
+Headless JSON API
+Serves the guide's content, search and figures over plain HTTP for embedding
+(e.g. an EHR sidebar) without a Streamlit session per user. A raw ASGI app
+run under uvicorn: one process holds one copy of the content and search
+index, JSON responses are cached per content version together with their
+gzip/brotli encodings and ETags, and connections are kept alive.
+
+Endpoints (GET or HEAD):
+  /api/health                     content version and counts
+  /api/categories                 categories in navigation order
+  /api/conditions                 condition summaries (?category=, ?subgroup=, ?chapter=)
+  /api/conditions/<name>          one condition by name or figure file stem
+  /api/reference/<table>          a reference table (clinical_pearls, red_flags, ...)
+  /api/search?q=                  ranked search (?limit=, ?kind=condition|pearl|...)
+  /api/figures/<image>            figure bytes (?width= picks a rendition)
+
+Usage: python api.py [--host 0.0.0.0] [--port 8600] [--workers 1]
+"""
+
+import argparse
+import asyncio
+import functools
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+from collections import OrderedDict
+from urllib.parse import parse_qs, quote
+
+from content_loader import CONTENT_DIR, TABLE_COLUMNS, ContentStore
+from images import (IMG_DIR, RENDITIONS_MANIFEST, RENDITIONS_SUBDIR, ImageCache,
+                    cache_budget_from_env, file_signature, load_rendition_manifest,
+                    pick_rendition)
+from lazy_imports import lazy_module
+from metrics import span
+from ocr_index import index_path as ocr_index_path
+from ocr_index import read_figure_texts
+from search_index import SearchIndex, normalize
+from validate_images import load_manifest, manifest_path, startup_problems, trusted_versions
+
+API_PREFIX = "/api"
+DEFAULT_PORT = 8600
+
+# Content, figure text and renditions are re-checked this often, off the event loop
+REFRESH_INTERVAL_S = 5.0
+
+# JSON responses kept (per content version) with their encoded variants
+RESPONSE_CACHE_ENTRIES = 4096
+
+# Answered fresh every time: they report errors that change without a new content version
+LIVE_PATHS = {f"{API_PREFIX}/health"}
+
+# Bodies smaller than this aren't worth compressing
+COMPRESS_MIN_BYTES = 512
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+KEEP_ALIVE_S = 30
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+DEFAULT_FIGURE_WIDTH = 640
+
+JSON_CACHE = "public, max-age=60"
+FIGURE_CACHE = "public, max-age=86400"
+
+# Origin allowed to call the API from a browser (the embedding page)
+ALLOW_ORIGIN = os.environ.get("NEONATAL_API_ALLOW_ORIGIN", "*")
+
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+
+
+class ApiError(Exception):
+    """A request the API answers with an error status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+@functools.lru_cache(maxsize=None)
+def brotli_module():
+    """brotli if installed, else None (responses fall back to gzip)"""
+    try:
+        return lazy_module("brotli")
+    except ImportError:
+        return None
+
+
+def encode_body(body, encoding):
+    """body compressed with 'br' or 'gzip'"""
+    if encoding == "br":
+        return brotli_module().compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, GZIP_LEVEL, mtime=0)
+
+
+def pick_encoding(accept_encoding):
+    """Best content coding the client accepts: 'br', 'gzip' or None"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    if accepted.get("br", 0) > 0 and brotli_module() is not None:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def dump_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def figure_url(image_name):
+    return f"{API_PREFIX}/figures/{quote(image_name)}"
+
+
+def condition_summary(condition):
+    """Listing entry for one condition"""
+    return {"name": condition.name, "category": condition.category,
+            "chapter": condition.chapter, "subgroup": condition.subgroup,
+            "figure": condition.figure, "image": condition.image,
+            "figure_url": figure_url(condition.image)}
+
+
+def condition_detail(condition):
+    """Full record of one condition"""
+    return dict(condition.as_dict(), figure_url=figure_url(condition.image))
+
+
+class GuideState:
+    """Content plus everything derived from it, swapped whole when any input changes"""
+
+    def __init__(self, content, figure_text_version, figure_texts):
+        self.content = content
+        self.key = (content["version"], figure_text_version)
+        self.search = SearchIndex.build(content["conditions"], content["clinical_pearls"],
+                                        content["red_flags"], content["lab_tests"],
+                                        content["treatments"], figure_texts)
+        self.lookup = {}
+        self.images = set()
+        for conditions in content["conditions"].values():
+            for condition in conditions:
+                self.lookup.setdefault(normalize(condition.name), condition)
+                self.lookup.setdefault(normalize(os.path.splitext(condition.image)[0]), condition)
+                self.images.add(condition.image)
+
+
+class GuideApi:
+    """ASGI application serving the guide as JSON"""
+
+    def __init__(self, content_dir=CONTENT_DIR, image_dir=IMG_DIR):
+        self.store = ContentStore(content_dir)
+        self.image_dir = image_dir
+        self.images = ImageCache(image_dir, cache_budget_from_env())
+        self.state = None
+        self.manifest = {"images": {}}
+        self.integrity = None
+        self.refresh_error = None
+        self._inputs = {}  # file -> (signature, parsed contents) for the figure text and renditions
+        self._refresher = None
+        self._responses = OrderedDict()  # (state key, path, query) -> cached response
+        self._figure_etags = {}  # rendition path -> (mtime_ns, etag); the bytes stay in ImageCache
+
+    def _read_if_changed(self, path, read):
+        """read() again only when path's mtime or size changed since the last call"""
+        signature = file_signature(path)
+        known = self._inputs.get(path)
+        if known is None or known[0] != signature:
+            known = self._inputs[path] = (signature, read())
+        return known[1]
+
+    def load(self):
+        """Re-read what changed on disk; returns a new GuideState, or None if nothing did
+
+        Blocking (file reads, index builds): runs on a worker thread, never on
+        the event loop.
+        """
+        content = self.store.refresh()
+        figure_text_version, figure_texts = self._read_if_changed(
+            ocr_index_path(self.image_dir),
+            lambda: read_figure_texts(self.image_dir))
+        self.manifest = self._read_if_changed(
+            os.path.join(self.image_dir, RENDITIONS_SUBDIR, RENDITIONS_MANIFEST),
+            lambda: load_rendition_manifest(self.image_dir))
+        integrity = self._read_if_changed(manifest_path(self.image_dir),
+                                          lambda: load_manifest(self.image_dir))
+        if integrity is not self.integrity:
+            # Re-validated images (e.g. --accept-changes) have new trusted versions
+            self.integrity = integrity
+            self.images.trusted = trusted_versions(integrity)
+            self.images.clear()
+            self._figure_etags.clear()
+        if self.state is None or self.state.key != (content["version"], figure_text_version):
+            return GuideState(content, figure_text_version, figure_texts)
+        return None
+
+    def _swap(self, state):
+        if state is not None:
+            self.state = state
+            self._responses.clear()
+
+    async def _refresh_loop(self):
+        """Rebuild in the background every REFRESH_INTERVAL_S; requests keep the old state meanwhile"""
+        while True:
+            await asyncio.sleep(REFRESH_INTERVAL_S)
+            try:
+                self._swap(await asyncio.to_thread(self.load))
+                self.refresh_error = None
+            except Exception as exc:
+                # Keep serving the current state; retried next interval
+                self.refresh_error = f"{type(exc).__name__}: {exc}"
+
+    # ASGI
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        path = scope["path"]
+        head = scope["method"] == "HEAD"
+        if scope["method"] not in ("GET", "HEAD"):
+            await self._send(send, 405, dump_json({"error": "method not allowed"}),
+                             [("allow", "GET, HEAD")])
+            return
+
+        state = self.state
+        if state is None:
+            await self._send(send, 503, dump_json({"error": "starting"}))
+            return
+        if path.startswith(f"{API_PREFIX}/figures/"):
+            with span("api figure"):
+                await self._figure(state, path[len(f"{API_PREFIX}/figures/"):],
+                                   parse_qs(scope["query_string"].decode("latin-1")),
+                                   headers, head, send)
+            return
+
+        query = scope["query_string"].decode("latin-1")
+        key = (state.key, path, query)
+        cached = None if path in LIVE_PATHS else self._responses.get(key)
+        if cached is None:
+            with span("api json"):
+                try:
+                    status, data = 200, self.route(state, path, parse_qs(query))
+                except ApiError as exc:
+                    status, data = exc.status, {"error": str(exc)}
+                body = dump_json(data)
+            cached = {"status": status, "body": body,
+                      "etag": hashlib.blake2b(body, digest_size=8).hexdigest(), "encoded": {}}
+            if path not in LIVE_PATHS:
+                self._responses[key] = cached
+            while len(self._responses) > RESPONSE_CACHE_ENTRIES:
+                self._responses.popitem(last=False)
+        else:
+            self._responses.move_to_end(key)
+
+        body, etag = cached["body"], cached["etag"]
+        extra = [("vary", "accept-encoding"), ("cache-control", JSON_CACHE)]
+        encoding = None
+        if len(body) >= COMPRESS_MIN_BYTES:
+            encoding = pick_encoding(headers.get("accept-encoding", ""))
+        if encoding:
+            if encoding not in cached["encoded"]:
+                cached["encoded"][encoding] = encode_body(body, encoding)
+            body, etag = cached["encoded"][encoding], f"{etag}-{encoding}"
+            extra.append(("content-encoding", encoding))
+        etag = f'"{etag}"'
+        extra.append(("etag", etag))
+
+        if cached["status"] == 200 and etag in headers.get("if-none-match", ""):
+            await self._send(send, 304, b"", extra, content_type=None)
+        else:
+            await self._send(send, cached["status"], body, extra, head=head)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    self._swap(await asyncio.to_thread(self.load))
+                    state = self.state
+                    problems = startup_problems(self.image_dir, state.content, self.integrity)
+                    if problems:
+                        raise RuntimeError(f"{len(problems)} referenced images failed "
+                                           f"validation: " + "; ".join(problems))
+                except Exception as exc:
+                    await send({"type": "lifespan.startup.failed", "message": str(exc)})
+                    return
+                self._refresher = asyncio.create_task(self._refresh_loop())
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._refresher:
+                    self._refresher.cancel()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _send(self, send, status, body, extra=(), content_type="application/json",
+                    head=False):
+        headers = [("content-length", str(len(body))),
+                   ("access-control-allow-origin", ALLOW_ORIGIN)]
+        if content_type:
+            headers.append(("content-type", content_type))
+        headers.extend(extra)
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(k.encode(), v.encode("latin-1")) for k, v in headers]})
+        await send({"type": "http.response.body", "body": b"" if head else body})
+
+    # Routes
+
+    def route(self, state, path, params):
+        """JSON-serializable response for a path, or ApiError"""
+        content = state.content
+        parts = path.rstrip("/").split("/")[2:] if path.startswith(API_PREFIX + "/") else None
+        if not parts:
+            raise ApiError(404, f"no such endpoint: {path}")
+
+        if parts == ["health"]:
+            return {"status": "degraded" if content["errors"] else "ok",
+                    "content_version": content["version"], "content_errors": content["errors"],
+                    "refresh_error": self.refresh_error,
+                    "figure_text_version": state.key[1], **content["stats"]}
+
+        if parts == ["categories"]:
+            return [{"key": key, "title": meta["title"], "header": meta["header"],
+                     "conditions": len(content["conditions"][key]),
+                     "subgroups": [{"key": k, "title": t} for k, t in meta["subgroups"]]}
+                    for key, meta in content["categories"].items()]
+
+        if parts == ["conditions"]:
+            filters = {name: params[name] for name in ("category", "subgroup", "chapter")
+                       if name in params}
+            table = content["table"]
+            conditions = table.select(table.mask(**filters)) if filters else table.conditions
+            return {"count": len(conditions),
+                    "conditions": [condition_summary(c) for c in conditions]}
+
+        if len(parts) == 2 and parts[0] == "conditions":
+            condition = state.lookup.get(normalize(parts[1]))
+            if condition is None:
+                raise ApiError(404, f"no condition named {parts[1]!r}")
+            return condition_detail(condition)
+
+        if len(parts) == 2 and parts[0] == "reference":
+            if parts[1] not in TABLE_COLUMNS:
+                raise ApiError(404, f"no reference table {parts[1]!r}")
+            return {"table": parts[1], "rows": content[parts[1]]}
+
+        if parts == ["search"]:
+            return self.search(state, params)
+
+        raise ApiError(404, f"no such endpoint: {path}")
+
+    def search(self, state, params):
+        query = params.get("q", [""])[0]
+        if not query.strip():
+            raise ApiError(400, "missing query parameter q")
+        try:
+            limit = int(params.get("limit", [DEFAULT_SEARCH_LIMIT])[0])
+        except ValueError:
+            raise ApiError(400, "limit must be an integer")
+        if limit < 1:
+            raise ApiError(400, "limit must be at least 1")
+        limit = min(limit, MAX_SEARCH_LIMIT)
+        kinds = params.get("kind") or None
+        hits = state.search.search(query, limit=limit, kinds=kinds)
+        results = []
+        for hit in hits:
+            doc = hit.document
+            results.append({
+                "kind": doc.kind, "category": doc.category, "title": doc.title,
+                "score": round(hit.score, 3), "field": hit.field, "match": hit.match,
+                "item": condition_detail(doc.ref) if doc.kind == "condition" else list(doc.ref),
+            })
+        return {"query": query, "count": len(results), "results": results}
+
+    async def _figure(self, state, image_name, params, headers, head, send):
+        # Only figures the content references; nothing else under the image root
+        if image_name not in state.images:
+            await self._send(send, 404, dump_json({"error": f"no figure {image_name!r}"}))
+            return
+        try:
+            width = int(params.get("width", [DEFAULT_FIGURE_WIDTH])[0])
+        except ValueError:
+            await self._send(send, 400, dump_json({"error": "width must be an integer"}))
+            return
+        path = pick_rendition(self.manifest, image_name, width)
+        data, version = await asyncio.to_thread(self.images.get_versioned, path)
+        if data is None and path != image_name:
+            path = image_name
+            data, version = await asyncio.to_thread(self.images.get_versioned, path)
+        if data is None:
+            await self._send(send, 404, dump_json({"error": f"figure {image_name!r} is missing"}))
+            return
+
+        # Hash each file version once; one entry per path, replaced when the file changes
+        known = self._figure_etags.get(path)
+        if known and known[0] == version:
+            etag = known[1]
+        else:
+            etag = f'"{hashlib.blake2b(data, digest_size=8).hexdigest()}"'
+            self._figure_etags[path] = (version, etag)
+        extra = [("etag", etag), ("cache-control", FIGURE_CACHE)]
+        if etag in headers.get("if-none-match", ""):
+            await self._send(send, 304, b"", extra, content_type=None)
+            return
+        await self._send(send, 200, data, extra,
+                         content_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+                         head=head)
+
+
+app = GuideApi()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the study guide as a JSON API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--keep-alive", type=int, default=KEEP_ALIVE_S,
+                        help="seconds an idle connection stays open")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    uvicorn.run("api:app", app_dir=os.path.dirname(os.path.abspath(__file__)),
+                host=args.host, port=args.port, workers=args.workers,
+                timeout_keep_alive=args.keep_alive, access_log=False, lifespan="on")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Throughput benchmark for the headless JSON API
+Starts api.py under uvicorn on a free port (or targets --url) and drives it
+with N keep-alive connections, each sending a fixed mix of listing, lookup,
+search and figure requests back to back for --duration seconds. Reports
+requests/sec and p50/p95/p99 latency, and exits non-zero below --min-rps.
+
+Usage: python benchmarks/bench_api.py [--connections 64] [--duration 10] [--min-rps 1000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from urllib.parse import quote, urlsplit
+
+from common import ROOT, benchmark_env, free_port, percentile
+
+API_PATH = os.path.join(ROOT, "api.py")
+
+SEARCH_QUERIES = ("acyclovir", "vesicles", "petechiae", "eryth", "nevus")
+
+CLIENT_HEADERS = "Accept-Encoding: gzip, br\r\nConnection: keep-alive\r\n"
+
+
+def start_server(port, workers):
+    """Launch the API and wait until it answers /api/health"""
+    process = subprocess.Popen(
+        [sys.executable, API_PATH, "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers)],
+        cwd=ROOT, env=benchmark_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API server exited with status {process.returncode} during startup")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.25)
+    process.kill()
+    raise RuntimeError("API server did not become healthy within 60s")
+
+
+def request_mix(base_url):
+    """Paths one connection cycles through"""
+    with urllib.request.urlopen(f"{base_url}/api/conditions", timeout=10) as response:
+        conditions = json.load(response)["conditions"]
+    paths = ["/api/categories", "/api/conditions", "/api/reference/clinical_pearls"]
+    paths += [f"/api/search?q={quote(q)}" for q in SEARCH_QUERIES]
+    paths += [f"/api/conditions/{quote(c['name'])}" for c in conditions[:5]]
+    paths += [c["figure_url"] for c in conditions[:3]]
+    return paths
+
+
+async def read_response(reader):
+    """(status, body length) of one HTTP/1.1 response with Content-Length"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    if length:
+        await reader.readexactly(length)
+    return status, length
+
+
+async def connection(host, port, paths, offset, stop_at, latencies, errors):
+    """One keep-alive connection sending requests until stop_at"""
+    reader, writer = await asyncio.open_connection(host, port)
+    i = offset
+    try:
+        while time.perf_counter() < stop_at:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n{CLIENT_HEADERS}\r\n".encode())
+            status, _ = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(f"{status} {path}")
+    finally:
+        writer.close()
+
+
+async def run_load(base_url, paths, connections, duration):
+    parts = urlsplit(base_url)
+    latencies, errors = [], []
+    stop_at = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(connection(parts.hostname, parts.port, paths, i, stop_at,
+                                      latencies, errors)
+                           for i in range(connections)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput benchmark for the JSON API")
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when starting the API")
+    parser.add_argument("--url", help="Target a running API instead of starting one")
+    parser.add_argument("--min-rps", type=float, help="Fail if throughput is below this")
+    args = parser.parse_args(argv)
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        port = free_port()
+        server = start_server(port, args.workers)
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        paths = request_mix(base_url)
+        latencies, errors, wall = asyncio.run(
+            run_load(base_url, paths, args.connections, args.duration))
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+
+    rps = len(latencies) / wall
+    print(f"{len(latencies)} requests over {args.connections} connections in {wall:.1f}s: "
+          f"{rps:.0f} req/s")
+    print(f"latency p50 {percentile(latencies, 50) * 1000:.1f} ms, "
+          f"p95 {percentile(latencies, 95) * 1000:.1f} ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"errors: {len(errors)}")
+    for error in sorted(set(errors))[:10]:
+        print(f"  {error}")
+
+    if errors:
+        sys.exit(1)
+    if args.min_rps is not None and rps < args.min_rps:
+        sys.exit(f"FAIL: {rps:.0f} req/s is below {args.min_rps:.0f}")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
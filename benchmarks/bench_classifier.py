@@ -0,0 +1,80 @@
+"""
+Latency/throughput benchmark for the rash classifier
+Measures single-image latency (one request at a time) and batched throughput
+with N concurrent clients going through BatchingClassifier. Exits non-zero
+if the p50 single-image latency is over budget.
+
+Usage: python benchmarks/bench_classifier.py [--images DIR] [--clients 8] [--requests 200]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import percentile
+from images import IMG_DIR
+from rash_classifier import MODEL_PATH, BatchingClassifier, RashClassifier
+
+DEFAULT_BUDGET_MS = 200.0
+
+
+def load_images(image_dir):
+    names = sorted(n for n in os.listdir(image_dir) if n.lower().endswith((".jpeg", ".jpg", ".png")))
+    if not names:
+        sys.exit(f"No images found in {image_dir}")
+    images = []
+    for name in names:
+        with open(os.path.join(image_dir, name), "rb") as f:
+            images.append(f.read())
+    return images
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rash classifier latency/throughput benchmark")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--images", default=IMG_DIR)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    images = load_images(args.images)
+    start = time.perf_counter()
+    batcher = BatchingClassifier(RashClassifier(args.model))
+    print(f"model load: {(time.perf_counter() - start) * 1000:.0f} ms, cpus: {os.cpu_count()}")
+
+    # Warm-up so allocation and first-invoke costs don't skew the numbers
+    batcher.classify(images[:2])
+
+    # Single-image latency: one request in flight at a time
+    latencies = []
+    for i in range(min(args.requests, 50)):
+        t = time.perf_counter()
+        batcher.classify([images[i % len(images)]])
+        latencies.append((time.perf_counter() - t) * 1000)
+    p50 = statistics.median(latencies)
+    print(f"single image: p50 {p50:.1f} ms, p95 {percentile(latencies, 95):.1f} ms")
+
+    # Throughput with concurrent clients sharing the batching worker
+    def client(i):
+        t = time.perf_counter()
+        batcher.classify([images[i % len(images)]])
+        return (time.perf_counter() - t) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.clients) as pool:
+        concurrent = list(pool.map(client, range(args.requests)))
+    elapsed = time.perf_counter() - start
+    print(f"{args.clients} clients: {args.requests / elapsed:.1f} images/s, "
+          f"p50 {statistics.median(concurrent):.1f} ms, p95 {percentile(concurrent, 95):.1f} ms")
+
+    if p50 > args.budget_ms:
+        sys.exit(f"FAIL: p50 single-image latency {p50:.1f} ms exceeds {args.budget_ms:.0f} ms")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Cold-start benchmark: time-to-first-render of the Overview page
+Each run starts a fresh interpreter, imports Streamlit's AppTest harness and
+renders the app's default (Overview) page, timing the whole thing. Exits
+non-zero if the median exceeds the budget or a heavy dependency was loaded.
+
+Usage: python benchmarks/bench_cold_start.py [--runs 5] [--budget 3.0]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from common import ROOT, benchmark_env
+from startup_profile import HEAVY_MODULES
+
+DEFAULT_BUDGET_S = float(os.environ.get("NEONATAL_FIRST_RENDER_BUDGET_S", "3.0"))
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=60).run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "exception": [str(e.value) for e in at.exception],
+    "headers": [h.value for h in at.header],
+    "errors": [e.value for e in at.error],
+    "modules": sorted({{m.split(".")[0] for m in sys.modules}}),
+}}))
+"""
+
+
+def cold_render(app_path, env=None):
+    """Render the first page in a fresh interpreter and return its measurements"""
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD.format(app=app_path)],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Overview time-to-first-render benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_S, help="Seconds")
+    parser.add_argument("--app", default=os.path.join(ROOT, "neonatal_dermatology_app.py"))
+    args = parser.parse_args(argv)
+
+    env = benchmark_env()
+    samples = []
+    heavy = set()
+    for i in range(args.runs):
+        run = cold_render(args.app, env)
+        if run["exception"]:
+            sys.exit(f"App raised during first render: {run['exception']}")
+        if run["errors"]:
+            sys.exit(f"App stopped on first render: {run['errors']}")
+        if "1. Key Diagnostic Questions" not in run["headers"]:
+            sys.exit(f"First render was not the Overview page: {run['headers']}")
+        heavy.update(set(run["modules"]) & set(HEAVY_MODULES))
+        samples.append(run["seconds"])
+        print(f"run {i + 1}: {run['seconds'] * 1000:.0f} ms")
+
+    median = statistics.median(samples)
+    print(f"median {median * 1000:.0f} ms, max {max(samples) * 1000:.0f} ms, "
+          f"budget {args.budget * 1000:.0f} ms")
+
+    failures = []
+    if median > args.budget:
+        failures.append(f"median first render {median:.2f}s exceeds budget {args.budget:.2f}s")
+    if heavy:
+        failures.append(f"heavy modules loaded for Overview: {', '.join(sorted(heavy))}")
+    if failures:
+        sys.exit("FAIL: " + "; ".join(failures))
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Helpers shared by the benchmark scripts
+"""
+
+import atexit
+import os
+import shutil
+import socket
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from content_loader import load_content  # noqa: E402
+from images import IMG_DIR  # noqa: E402
+from validate_images import load_manifest, startup_problems  # noqa: E402
+
+# Placeholder figure size when the real photographs aren't available
+FIXTURE_SIZE = (900, 600)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of samples, or None if there are none"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def free_port():
+    """A TCP port on 127.0.0.1 that is free right now"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def benchmark_image_dir(image_dir=IMG_DIR):
+    """An image root the app will start with
+
+    image_dir itself when it passes the app's startup image check; otherwise
+    (e.g. image-less CI) a temporary directory of gray placeholder JPEGs for
+    every figure the content references, removed at exit.
+    """
+    content = load_content()
+    if not startup_problems(image_dir, content, load_manifest(image_dir)):
+        return image_dir
+
+    from PIL import Image
+
+    fixture_dir = tempfile.mkdtemp(prefix="neonatal-images-")
+    atexit.register(shutil.rmtree, fixture_dir, ignore_errors=True)
+    placeholder = Image.new("RGB", FIXTURE_SIZE, (200, 200, 200))
+    for conditions in content["conditions"].values():
+        for condition in conditions:
+            placeholder.save(os.path.join(fixture_dir, condition.image), "JPEG")
+    print(f"{image_dir} is not usable; using placeholder figures in {fixture_dir}")
+    return fixture_dir
+
+
+def benchmark_env(image_dir=IMG_DIR):
+    """Environment for an app subprocess, pointing NEONATAL_IMAGE_DIR at benchmark_image_dir()"""
+    return dict(os.environ, NEONATAL_IMAGE_DIR=benchmark_image_dir(image_dir))
@@ -0,0 +1,302 @@
+"""
+Multi-user load test for the Streamlit app
+Starts `streamlit run` headless (or targets --url) and drives it with N
+simulated browser sessions over Streamlit's websocket protocol: every
+sidebar page, then the search flow typed a few characters at a time. Image
+URLs are fetched over HTTP like a browser with a per-session cache.
+
+Reports p50/p95/p99 rerun latency (BackMsg sent -> script finished), server
+memory per session (RSS growth / sessions, when the server is ours) and
+image bytes served, and writes them as JSON.
+
+AppTest can't be used here: it swaps a process-global Runtime per run, so
+concurrent AppTest sessions in one process corrupt each other.
+
+Usage: python benchmarks/load_test.py [--users 200] [--concurrency 50] [--output FILE]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.asyncio.client import connect
+
+from common import ROOT, benchmark_env, free_port, percentile
+
+APP_PATH = os.path.join(ROOT, "neonatal_dermatology_app.py")
+DEFAULT_OUTPUT = os.path.join(ROOT, "benchmarks", "results", "load_test.json")
+
+SEARCH_QUERY = "acyclovir"
+SEARCH_STEPS = (3, 6, len(SEARCH_QUERY))  # characters typed before each rerun
+SIDEBAR_SEARCH_LABEL = "Search conditions..."
+PAGE_SEARCH_LABEL = "Enter search term:"
+
+RERUN_TIMEOUT_S = 60
+
+FINISHED = ForwardMsg.ScriptFinishedStatus
+
+
+def start_server(app_path, port):
+    """Launch a headless Streamlit server and wait until it is healthy"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", app_path, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, env=benchmark_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.25)
+    process.kill()
+    raise RuntimeError("Streamlit server did not become healthy within 60s")
+
+
+def rss_bytes(pid):
+    """Resident set size of a process (Linux /proc only)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class Session:
+    """One simulated browser tab: a websocket plus the widget state it reports"""
+
+    def __init__(self, base_url, stats):
+        self.base_url = base_url
+        self.stats = stats
+        self.widgets = {}  # id -> (label, kind, fragment_id, value)
+        self.radio_options = []
+        self.seen_images = set()
+        self.ws = None
+
+    async def open(self):
+        ws_url = self.base_url.replace("http", "ws", 1) + "/_stcore/stream"
+        self.ws = await connect(ws_url, subprotocols=["streamlit"], max_size=None)
+        await self.rerun("initial load")
+
+    async def close(self):
+        await self.ws.close()
+
+    def _widget(self, label):
+        for widget_id, (widget_label, kind, fragment_id, value) in self.widgets.items():
+            if widget_label == label:
+                return widget_id, kind, fragment_id, value
+        raise KeyError(f"No widget labelled {label!r} on the current page")
+
+    async def set_widget(self, label, value, action):
+        widget_id, kind, fragment_id, _ = self._widget(label)
+        self.widgets[widget_id] = (label, kind, fragment_id, value)
+        await self.rerun(action, fragment_id)
+
+    async def rerun(self, action, fragment_id=""):
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        message.rerun_script.page_script_hash = ""
+        if fragment_id:
+            message.rerun_script.fragment_id = fragment_id
+        for widget_id, (_, kind, _, value) in self.widgets.items():
+            state = message.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            state.string_value = value
+
+        start = time.perf_counter()
+        await self.ws.send(message.SerializeToString())
+        images, emitted = [], set()
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await asyncio.wait_for(self.ws.recv(), RERUN_TIMEOUT_S))
+            kind = forward.WhichOneof("type")
+            if kind == "delta":
+                self._read_delta(forward, images, emitted)
+            elif kind == "script_finished":
+                if forward.script_finished == FINISHED.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                if forward.script_finished == FINISHED.FINISHED_WITH_COMPILE_ERROR:
+                    self.stats["errors"] += 1
+                break
+        elapsed = (time.perf_counter() - start) * 1000
+        if not fragment_id:
+            # A full run drops widgets from the previous page
+            self.widgets = {k: v for k, v in self.widgets.items() if k in emitted}
+        self.stats["latencies_ms"].setdefault(action, []).append(elapsed)
+        await self._fetch_images(images)
+
+    def _read_delta(self, forward, images, emitted):
+        if forward.delta.WhichOneof("type") != "new_element":
+            return
+        element = forward.delta.new_element
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.stats["errors"] += 1
+        elif kind == "imgs":
+            images.extend(img.url for img in element.imgs.imgs)
+        elif kind in ("radio", "text_input"):
+            widget = getattr(element, kind)
+            if kind == "radio":
+                self.radio_options = list(widget.options)
+                value = widget.options[widget.default] if widget.HasField("default") else ""
+            else:
+                value = widget.default
+            emitted.add(widget.id)
+            known = self.widgets.get(widget.id)
+            self.widgets[widget.id] = (widget.label, kind, forward.delta.fragment_id,
+                                       known[3] if known else value)
+
+    async def _fetch_images(self, urls):
+        """Fetch image URLs not yet in this session's (browser) cache"""
+        new = [u for u in urls if u not in self.seen_images and not u.startswith("data:")]
+        self.seen_images.update(new)
+        for url in new:
+            full = url if url.startswith("http") else self.base_url + url
+            size = await asyncio.to_thread(_http_get_size, full)
+            self.stats["image_bytes"] += size
+            self.stats["image_requests"] += 1
+
+
+def _http_get_size(url):
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            return len(response.read())
+    except OSError:
+        return 0
+
+
+async def run_user(base_url, stats, sessions, semaphore):
+    """One resident: open the app, visit every page, then search"""
+    async with semaphore:
+        session = Session(base_url, stats)
+        await session.open()
+        sessions.append(session)
+        radio_label = next(w[0] for w in session.widgets.values() if w[1] == "radio")
+        for page in session.radio_options[1:]:
+            await session.set_widget(radio_label, page, f"page: {page}")
+
+        # Search flow: type into the sidebar box, then refine on the Search All page
+        await session.set_widget(radio_label, "Search All", "page: Search All")
+        for n in SEARCH_STEPS:
+            await session.set_widget(SIDEBAR_SEARCH_LABEL, SEARCH_QUERY[:n], "sidebar search")
+        for n in SEARCH_STEPS:
+            await session.set_widget(PAGE_SEARCH_LABEL, SEARCH_QUERY[:n], "search page")
+
+
+async def run_load(base_url, users, concurrency):
+    stats = {"latencies_ms": {}, "errors": 0, "image_bytes": 0, "image_requests": 0}
+    sessions = []
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_user(base_url, stats, sessions, semaphore) for _ in range(users)),
+        return_exceptions=True,
+    )
+    stats["failed_users"] = [repr(r) for r in results if isinstance(r, Exception)]
+    stats["wall_s"] = time.perf_counter() - start
+    return stats, sessions
+
+
+def summarize(stats, users, concurrency, rss_before, rss_after, live_sessions):
+    all_latencies = [x for samples in stats["latencies_ms"].values() for x in samples]
+
+    def describe(samples):
+        return {"count": len(samples), "p50_ms": percentile(samples, 50),
+                "p95_ms": percentile(samples, 95), "p99_ms": percentile(samples, 99),
+                "max_ms": max(samples) if samples else None}
+
+    memory_per_session = None
+    if rss_before and rss_after and live_sessions:
+        memory_per_session = (rss_after - rss_before) / live_sessions
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "users": users,
+        "concurrency": concurrency,
+        "wall_s": stats["wall_s"],
+        "reruns_per_s": len(all_latencies) / stats["wall_s"] if stats["wall_s"] else None,
+        "rerun_latency": describe(all_latencies),
+        "by_action": {action: describe(s) for action, s in sorted(stats["latencies_ms"].items())},
+        "server_rss_before_bytes": rss_before,
+        "server_rss_after_bytes": rss_after,
+        "memory_per_session_bytes": memory_per_session,
+        "image_bytes_served": stats["image_bytes"],
+        "image_requests": stats["image_requests"],
+        "image_bytes_per_user": stats["image_bytes"] / users if users else 0,
+        "errors": stats["errors"],
+        "failed_users": stats["failed_users"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-user load test for the Streamlit app")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50, help="Sessions active at once")
+    parser.add_argument("--url", help="Target a running server instead of starting one")
+    parser.add_argument("--app", default=APP_PATH)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if overall p95 exceeds this")
+    args = parser.parse_args(argv)
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        port = free_port()
+        server = start_server(args.app, port)
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        pid = server.pid if server else None
+        rss_before = rss_bytes(pid) if pid else None
+
+        async def run():
+            stats, sessions = await run_load(base_url, args.users, args.concurrency)
+            # Sample memory while the sessions are still connected
+            rss_after = rss_bytes(pid) if pid else None
+            await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+            return stats, rss_after, len(sessions)
+
+        stats, rss_after, live_sessions = asyncio.run(run())
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+
+    summary = summarize(stats, args.users, args.concurrency, rss_before, rss_after, live_sessions)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    latency = summary["rerun_latency"]
+    print(f"{args.users} users @ {args.concurrency} concurrent: {latency['count']} reruns "
+          f"in {summary['wall_s']:.1f}s")
+    print(f"rerun latency p50 {latency['p50_ms']:.0f} ms, p95 {latency['p95_ms']:.0f} ms, "
+          f"p99 {latency['p99_ms']:.0f} ms")
+    if summary["memory_per_session_bytes"] is not None:
+        print(f"memory per session: {summary['memory_per_session_bytes'] / 1e6:.2f} MB")
+    print(f"image bytes served: {summary['image_bytes_served'] / 1e6:.1f} MB "
+          f"({summary['image_requests']} requests)")
+    print(f"errors: {summary['errors']}, failed users: {len(summary['failed_users'])}")
+    print(f"Wrote {args.output}")
+
+    if summary["failed_users"] or summary["errors"]:
+        sys.exit(1)
+    if args.max_p95_ms is not None and latency["p95_ms"] > args.max_p95_ms:
+        sys.exit(f"FAIL: p95 {latency['p95_ms']:.0f} ms exceeds {args.max_p95_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
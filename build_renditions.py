@@ -0,0 +1,115 @@
+"""
+Build step: precompute resized, re-encoded renditions of the clinical photographs
+Writes <IMG_DIR>/renditions/ plus a manifest the app uses to pick the
+smallest rendition that fits the figure column.
+
+Usage: python build_renditions.py [--image-dir DIR] [--widths 320 480 640 960]
+"""
+
+import argparse
+import json
+import os
+
+from PIL import Image, features
+
+from images import IMG_DIR, RENDITIONS_MANIFEST, RENDITIONS_SUBDIR
+
+DEFAULT_WIDTHS = (320, 480, 640, 960)
+
+# Pillow format name and encoder options per output codec
+CODECS = {
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", {"quality": 78, "method": 6}),
+    "avif": ("AVIF", {"quality": 60}),
+}
+
+SOURCE_EXTENSIONS = (".jpeg", ".jpg", ".png")
+
+
+def available_codecs():
+    """Codecs this Pillow build can encode"""
+    codecs = ["jpeg"]
+    if features.check("webp"):
+        codecs.append("webp")
+    if features.check("avif"):
+        codecs.append("avif")
+    return codecs
+
+
+def build_image(source_path, out_dir, widths, codecs, force=False):
+    """Write every width/codec rendition for one source image and describe them"""
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    source_mtime = os.path.getmtime(source_path)
+
+    with Image.open(source_path) as original:
+        original = original.convert("RGB")
+        src_width, src_height = original.size
+        renditions = []
+
+        # Never upscale; always include one rendition at the original width
+        targets = sorted({w for w in widths if w < src_width} | {src_width})
+        for width in targets:
+            height = round(src_height * width / src_width)
+            resized = None
+            for codec in codecs:
+                pil_format, options = CODECS[codec]
+                filename = f"{stem}-{width}.{codec}"
+                out_path = os.path.join(out_dir, filename)
+                up_to_date = (os.path.exists(out_path)
+                              and os.path.getmtime(out_path) >= source_mtime)
+                if force or not up_to_date:
+                    if resized is None:
+                        resized = original.resize((width, height), Image.LANCZOS)
+                    resized.save(out_path, pil_format, **options)
+                renditions.append({
+                    "file": filename,
+                    "format": codec,
+                    "width": width,
+                    "height": height,
+                    "bytes": os.path.getsize(out_path),
+                })
+
+    return {
+        "width": src_width,
+        "height": src_height,
+        "bytes": os.path.getsize(source_path),
+        "renditions": renditions,
+    }
+
+
+def build_all(image_dir=IMG_DIR, widths=DEFAULT_WIDTHS, codecs=None, force=False):
+    """Build renditions for every image in image_dir and write the manifest"""
+    codecs = codecs or available_codecs()
+    out_dir = os.path.join(image_dir, RENDITIONS_SUBDIR)
+    os.makedirs(out_dir, exist_ok=True)
+
+    manifest = {"version": 1, "widths": sorted(widths), "images": {}}
+    for name in sorted(os.listdir(image_dir)):
+        if not name.lower().endswith(SOURCE_EXTENSIONS):
+            continue
+        source_path = os.path.join(image_dir, name)
+        manifest["images"][name] = build_image(source_path, out_dir, widths, codecs, force)
+        print(f"{name}: {len(manifest['images'][name]['renditions'])} renditions")
+
+    manifest_path = os.path.join(out_dir, RENDITIONS_MANIFEST)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build multi-resolution image renditions")
+    parser.add_argument("--image-dir", default=IMG_DIR)
+    parser.add_argument("--widths", type=int, nargs="+", default=list(DEFAULT_WIDTHS))
+    parser.add_argument("--codecs", nargs="+", choices=sorted(CODECS))
+    parser.add_argument("--force", action="store_true", help="Rebuild up-to-date renditions")
+    args = parser.parse_args(argv)
+
+    manifest = build_all(args.image_dir, args.widths, args.codecs, args.force)
+    print(f"Wrote manifest for {len(manifest['images'])} images")
+
+
+if __name__ == "__main__":
+    main()
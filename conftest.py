@@ -0,0 +1,28 @@
+"""
+Shared pytest fixtures: the shipped content and throwaway image roots
+"""
+
+import pytest
+
+from content_loader import CONTENT_DIR, load_content
+
+
+def write_image(path, size=(120, 80), color=(200, 160, 140)):
+    """Solid-colour image at path; the format follows the extension"""
+    from PIL import Image
+
+    Image.new("RGB", size, color).save(path)
+
+
+@pytest.fixture(scope="session")
+def content():
+    return load_content(CONTENT_DIR)
+
+
+@pytest.fixture
+def image_dir(tmp_path, content):
+    """Image root holding a distinct placeholder figure for every condition"""
+    conditions = [c for items in content["conditions"].values() for c in items]
+    for i, condition in enumerate(conditions):
+        write_image(tmp_path / condition.image, (120 + i, 80), (10 * i % 256, 120, 255 - 10 * i % 256))
+    return str(tmp_path)
@@ -0,0 +1,420 @@
+"""
+Content loader for the study guide
+Reads chapter files (JSON, YAML or XLSX) from the content directory, validates
+them, and keeps a compiled pickle snapshot per source hash so startup stays
+fast as chapters are added. ContentStore.refresh() re-reads only the files
+that changed on disk.
+
+Each condition is tagged with its chapter, category and (optional) subgroup,
+and merge() precomputes the category and section indexes the app builds its
+navigation and pages from.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+
+from images import file_digest
+from records import ConditionTable, make_condition
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content")
+CACHE_SUBDIR = ".cache"
+
+# Bump when the compiled representation changes to invalidate old snapshots
+LOADER_VERSION = 3
+SCHEMA_VERSION = 1
+
+SOURCE_EXTENSIONS = (".json", ".yaml", ".yml", ".xlsx")
+
+# Reference tables and their column counts
+TABLE_COLUMNS = {
+    "clinical_pearls": 2,
+    "red_flags": 2,
+    "lab_tests": 3,
+    "treatments": 2,
+    "diagnostic_questions": 3,
+    "lesion_morphology": 3,
+    "findings": 3,  # label, group, "; "-separated match terms
+}
+
+CONDITION_FIELDS = ("name", "image", "figure", "features")
+
+# Category metadata: key and title are required, the rest default
+CATEGORY_FIELDS = ("key", "title")
+NOTICE_KINDS = ("info", "success", "warning", "error")
+
+
+class ContentError(ValueError):
+    """A content file is unreadable or does not match the schema"""
+
+
+def _read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _read_yaml(path):
+    import yaml
+
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def _read_xlsx(path):
+    """Read a workbook with a 'conditions' sheet (one row per feature) and one sheet per table"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    data = {}
+    try:
+        if "meta" in workbook.sheetnames:
+            for key, value in workbook["meta"].iter_rows(values_only=True):
+                if key:
+                    data[key] = value
+
+        if "categories" in workbook.sheetnames:
+            # header: key, title, header, style, notice kind, notice text, subgroups
+            # ("key=Title; key=Title")
+            rows = workbook["categories"].iter_rows(values_only=True)
+            next(rows, None)
+            data["categories"] = []
+            for key, title, header, style, notice_kind, notice_text, subgroups in rows:
+                if not key:
+                    continue
+                category = {"key": key, "title": title, "header": header, "style": style}
+                if notice_kind:
+                    category["notice"] = [notice_kind, notice_text]
+                if subgroups:
+                    category["subgroups"] = [[part.strip() for part in item.split("=", 1)]
+                                             for item in subgroups.split(";") if item.strip()]
+                data["categories"].append(category)
+
+        if "conditions" in workbook.sheetnames:
+            conditions = {}
+            by_name = {}
+            rows = workbook["conditions"].iter_rows(values_only=True)
+            # header: category, name, image, figure, label, value[, subgroup]
+            header = [str(h).strip().lower() if h else "" for h in next(rows, ())]
+            for row in rows:
+                row = dict(zip(header, row))
+                category, name = row.get("category"), row.get("name")
+                if not name:
+                    continue
+                condition = by_name.get((category, name))
+                if condition is None:
+                    condition = {"name": name, "image": row.get("image"),
+                                 "figure": row.get("figure"), "features": []}
+                    if row.get("subgroup"):
+                        condition["subgroup"] = row["subgroup"]
+                    by_name[(category, name)] = condition
+                    conditions.setdefault(category, []).append(condition)
+                if row.get("label"):
+                    condition["features"].append([row["label"], row.get("value")])
+            data["conditions"] = conditions
+
+        for table in TABLE_COLUMNS:
+            if table in workbook.sheetnames:
+                rows = workbook[table].iter_rows(values_only=True)
+                next(rows, None)  # header
+                data[table] = [list(r) for r in rows if any(r)]
+    finally:
+        workbook.close()
+    return data
+
+
+READERS = {
+    ".json": _read_json,
+    ".yaml": _read_yaml,
+    ".yml": _read_yaml,
+    ".xlsx": _read_xlsx,
+}
+
+
+def _text(value, where):
+    if not isinstance(value, str) or not value.strip():
+        raise ContentError(f"{where}: expected non-empty text, got {value!r}")
+    return value
+
+
+def default_category(key):
+    """Metadata for a category no chapter describes"""
+    title = str(key).replace("_", " ").title()
+    return {"key": key, "title": title, "header": title, "style": key, "notice": None,
+            "subgroups": []}
+
+
+def _category(item, where):
+    """Normalized category metadata (see default_category for the shape)"""
+    if not isinstance(item, dict):
+        raise ContentError(f"{where}: must be a mapping")
+    missing = [f for f in CATEGORY_FIELDS if f not in item]
+    if missing:
+        raise ContentError(f"{where}: missing {', '.join(missing)}")
+    category = default_category(_text(item["key"], f"{where}.key"))
+    category["title"] = _text(item["title"], f"{where}.title")
+    category["header"] = item.get("header") or category["title"]
+    category["style"] = item.get("style") or category["key"]
+    notice = item.get("notice")
+    if notice:
+        if not isinstance(notice, (list, tuple)) or len(notice) != 2 or notice[0] not in NOTICE_KINDS:
+            raise ContentError(f"{where}.notice: expected [{'|'.join(NOTICE_KINDS)}, text]")
+        category["notice"] = (notice[0], _text(notice[1], f"{where}.notice"))
+    for j, subgroup in enumerate(item.get("subgroups") or []):
+        if not isinstance(subgroup, (list, tuple)) or len(subgroup) != 2:
+            raise ContentError(f"{where}.subgroups[{j}]: expected [key, title]")
+        category["subgroups"].append((_text(subgroup[0], f"{where}.subgroups[{j}]"),
+                                      _text(subgroup[1], f"{where}.subgroups[{j}]")))
+    return category
+
+
+def validate(data, source="<content>"):
+    """Check raw parsed data against the schema and return the normalized chapter
+
+    Conditions become Condition records; table rows become tuples.
+    """
+    if not isinstance(data, dict):
+        raise ContentError(f"{source}: top level must be a mapping")
+    version = data.get("schema_version", SCHEMA_VERSION)
+    if version != SCHEMA_VERSION:
+        raise ContentError(f"{source}: unsupported schema_version {version!r}")
+
+    chapter = {
+        "chapter": data.get("chapter", os.path.basename(source)),
+        "title": data.get("title", ""),
+        "categories": {},
+        "conditions": {},
+    }
+
+    for i, item in enumerate(data.get("categories") or []):
+        category = _category(item, f"{source}: categories[{i}]")
+        chapter["categories"][category["key"]] = category
+
+    for category, items in (data.get("conditions") or {}).items():
+        if not isinstance(items, list):
+            raise ContentError(f"{source}: conditions.{category} must be a list")
+        # Subgroups are checked when this chapter describes the category itself
+        meta = chapter["categories"].get(category)
+        subgroups = {key for key, _ in meta["subgroups"]} if meta else None
+        conditions = []
+        for i, item in enumerate(items):
+            where = f"{source}: conditions.{category}[{i}]"
+            if not isinstance(item, dict):
+                raise ContentError(f"{where}: must be a mapping")
+            missing = [f for f in CONDITION_FIELDS if f not in item]
+            if missing:
+                raise ContentError(f"{where}: missing {', '.join(missing)}")
+            features = []
+            for j, feature in enumerate(item["features"]):
+                if not isinstance(feature, (list, tuple)) or len(feature) != 2:
+                    raise ContentError(f"{where}.features[{j}]: expected [label, value]")
+                features.append((_text(feature[0], f"{where}.features[{j}]"),
+                                 _text(feature[1], f"{where}.features[{j}]")))
+            subgroup = item.get("subgroup")
+            if subgroup is not None and subgroups is not None and subgroup not in subgroups:
+                raise ContentError(f"{where}: unknown subgroup {subgroup!r} for {category!r}")
+            conditions.append(make_condition(
+                _text(item["name"], f"{where}.name"),
+                _text(item["image"], f"{where}.image"),
+                _text(item["figure"], f"{where}.figure"),
+                features, chapter["chapter"], category, subgroup,
+            ))
+        chapter["conditions"][category] = conditions
+
+    for table, columns in TABLE_COLUMNS.items():
+        rows = []
+        for i, row in enumerate(data.get(table) or []):
+            where = f"{source}: {table}[{i}]"
+            if not isinstance(row, (list, tuple)) or len(row) != columns:
+                raise ContentError(f"{where}: expected {columns} columns")
+            rows.append(tuple(_text(cell, where) for cell in row))
+        chapter[table] = rows
+
+    return chapter
+
+
+def load_file(path, cache_dir=None):
+    """Load one chapter file, using its compiled snapshot when the hash matches"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in READERS:
+        raise ContentError(f"{path}: unsupported file type {ext!r}")
+
+    # Salted with the loader version so a loader change invalidates every snapshot
+    digest = file_digest(path, f"loader-{LOADER_VERSION}:".encode())
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"{digest}.pickle")
+        try:
+            with open(cache_path, "rb") as f:
+                return digest, pickle.load(f)
+        except Exception:
+            # Missing, truncated, or pickled from classes that have since changed:
+            # all just a cache miss
+            pass
+
+    try:
+        raw = READERS[ext](path)
+    except ContentError:
+        raise
+    except Exception as exc:
+        raise ContentError(f"{path}: {exc}") from exc
+    chapter = validate(raw, path)
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(chapter, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    return digest, chapter
+
+
+def merge(chapters):
+    """Combine chapters (in file order) into the structure the app renders
+
+    Besides the merged conditions and tables this precomputes:
+      title:      the first chapter title given
+      categories: {key: metadata} in navigation order (first definition wins,
+                  later chapters may add subgroups)
+      sections:   {category: [(subgroup key, subgroup title, [conditions])]},
+                  ungrouped conditions first under (None, None)
+      stats:      condition, figure and chapter counts
+      table:      ConditionTable over every condition, for vectorized filtering
+    """
+    content = {"conditions": {}, "chapters": [], "categories": {}, "title": ""}
+    for table in TABLE_COLUMNS:
+        content[table] = []
+    for chapter in chapters:
+        content["chapters"].append(chapter["chapter"])
+        content["title"] = content["title"] or chapter["title"]
+        for key, meta in chapter.get("categories", {}).items():
+            known = content["categories"].setdefault(key, dict(meta, subgroups=[]))
+            known["subgroups"] += [s for s in meta["subgroups"] if s not in known["subgroups"]]
+        for category, conditions in chapter["conditions"].items():
+            content["conditions"].setdefault(category, []).extend(conditions)
+        for table in TABLE_COLUMNS:
+            content[table].extend(chapter[table])
+
+    for category in content["conditions"]:
+        if category not in content["categories"]:
+            content["categories"][category] = default_category(category)
+    content["categories"] = {key: meta for key, meta in content["categories"].items()
+                             if content["conditions"].get(key)}
+
+    content["sections"] = {}
+    for key, meta in content["categories"].items():
+        grouped = {subgroup: [] for subgroup in [None] + [k for k, _ in meta["subgroups"]]}
+        for condition in content["conditions"][key]:
+            grouped.setdefault(condition.subgroup, []).append(condition)
+        titles = dict(meta["subgroups"])
+        content["sections"][key] = [(subgroup, titles.get(subgroup, subgroup and subgroup.title()),
+                                     conditions)
+                                    for subgroup, conditions in grouped.items() if conditions]
+
+    all_conditions = [c for conditions in content["conditions"].values() for c in conditions]
+    content["stats"] = {
+        "conditions": len(all_conditions),
+        "figures": len({c.image for c in all_conditions}),
+        "chapters": len(content["chapters"]),
+    }
+    content["table"] = ConditionTable(all_conditions)
+    return content
+
+
+class ContentStore:
+    """Chapter files in one directory, reloaded individually when they change"""
+
+    def __init__(self, content_dir=CONTENT_DIR, use_cache=True):
+        self.content_dir = content_dir
+        self.cache_dir = os.path.join(content_dir, CACHE_SUBDIR) if use_cache else None
+        self._files = {}  # path -> (mtime_ns, size, digest, chapter)
+        self._errors = {}  # path -> (mtime_ns, size, message) of files that failed to load
+        self._content = None
+        self._lock = threading.Lock()
+
+    def _source_files(self):
+        return sorted(
+            os.path.join(self.content_dir, name)
+            for name in os.listdir(self.content_dir)
+            if name.lower().endswith(SOURCE_EXTENSIONS) and not name.startswith((".", "~$"))
+        )
+
+    def refresh(self):
+        """Reload changed files and return the merged content
+
+        Only files whose mtime or size changed are re-hashed and re-parsed.
+        The returned dict carries a 'version' that changes whenever any
+        chapter does. A file that fails to load (invalid or half-saved) keeps
+        serving its last good chapter, or is left out if it never loaded, and
+        its error is listed in content['errors'] until it is fixed.
+        """
+        with self._lock:
+            paths = self._source_files()
+            changed = set(self._files) != set(paths)
+            for path in paths:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # removed since listing; dropped below
+                signature = (stat.st_mtime_ns, stat.st_size)
+                known = self._files.get(path)
+                if known and known[:2] == signature:
+                    self._errors.pop(path, None)
+                    continue
+                failed = self._errors.get(path)
+                if failed and failed[:2] == signature:
+                    continue
+                try:
+                    digest, chapter = load_file(path, self.cache_dir)
+                except (ContentError, OSError) as exc:
+                    self._errors[path] = signature + (str(exc),)
+                    continue
+                self._errors.pop(path, None)
+                if not known or known[2] != digest:
+                    changed = True
+                self._files[path] = signature + (digest, chapter)
+            loaded = [p for p in paths if p in self._files]
+            for path in set(self._files) - set(loaded):
+                del self._files[path]
+                changed = True
+            for path in set(self._errors) - set(paths):
+                del self._errors[path]
+
+            if changed or self._content is None:
+                content = merge(self._files[p][3] for p in loaded)
+                version = hashlib.sha256(
+                    "".join(self._files[p][2] for p in loaded).encode()).hexdigest()
+                content["version"] = version[:16]
+                self._content = content
+                self._prune_cache()
+            self._content["errors"] = [e[2] for _, e in sorted(self._errors.items())]
+            return self._content
+
+    def _prune_cache(self):
+        """Delete snapshots of chapter versions no longer loaded (e.g. edited files)"""
+        if not self.cache_dir:
+            return
+        keep = {f"{known[2]}.pickle" for known in self._files.values()}
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(".pickle") and name not in keep:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def current(self):
+        """The last merged content without checking the files (loads once if needed)"""
+        return self._content if self._content is not None else self.refresh()
+
+
+def load_content(content_dir=CONTENT_DIR):
+    """Load and merge every chapter in content_dir, raising ContentError for any bad file"""
+    content = ContentStore(content_dir).refresh()
+    if content["errors"]:
+        raise ContentError("; ".join(content["errors"]))
+    return content
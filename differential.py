@@ -0,0 +1,135 @@
+"""
+Findings-based differential diagnosis
+Compiles conditions, clinical pearls and red flags against the content's
+findings vocabulary into a (conditions x findings) weight matrix plus packed
+bitsets. A multi-finding query is then a column slice and a row sum instead
+of a scan over the text.
+"""
+
+import re
+from collections import namedtuple
+
+from lazy_imports import numpy
+from search_index import normalize, tokenize
+
+# Evidence weights: finding named in the condition's own text, or a clinical
+# pearl / red flag that pairs the finding with the condition
+TEXT_WEIGHT = 1.0
+PEARL_WEIGHT = 2.0
+
+# Name words too generic to identify a condition on their own
+GENERIC_NAME_TOKENS = frozenset(
+    "congenital neonatal infancy lesions syndrome nevus most common newborn rash".split()
+)
+
+Finding = namedtuple("Finding", ["label", "group", "terms"])
+
+# One ranked entry of a differential
+Differential = namedtuple("Differential", ["category", "condition", "score", "matched", "complete"])
+
+
+def parse_findings(rows):
+    """Finding tuples from the content's findings table"""
+    return [Finding(label, group, tuple(t.strip() for t in terms.split(";") if t.strip()))
+            for label, group, terms in rows]
+
+
+def _term_pattern(terms):
+    """Regex matching any term at a word start (so 'scale' matches 'scaly' only if listed)"""
+    alternatives = "|".join(re.escape(normalize(t)) for t in terms)
+    return re.compile(rf"(?<![a-z0-9])(?:{alternatives})")
+
+
+def _name_tokens(name):
+    return {t for t in tokenize(name) if len(t) >= 3 and t not in GENERIC_NAME_TOKENS}
+
+
+class DifferentialIndex:
+    """Precomputed condition/finding evidence for vectorized multi-finding queries"""
+
+    def __init__(self, conditions, findings, weights, rules):
+        np = numpy()
+        self.conditions = conditions  # [(category, condition)]
+        self.findings = findings
+        self.weights = weights
+        self.bits = np.packbits(weights > 0, axis=1)
+        self.rules = rules  # [(finding index, kind, row)] pearls and red flags per finding
+        self._columns = {f.label: i for i, f in enumerate(findings)}
+
+    @classmethod
+    def build(cls, conditions_by_category, findings_rows, clinical_pearls=(), red_flags=()):
+        np = numpy()
+        conditions = [(category, c) for category, items in conditions_by_category.items()
+                      for c in items]
+        findings = parse_findings(findings_rows)
+        patterns = [_term_pattern(f.terms) for f in findings]
+        weights = np.zeros((len(conditions), len(findings)), np.float32)
+
+        # Findings named in each condition's own text
+        for row, (_, condition) in enumerate(conditions):
+            text = normalize(" ".join([condition.name] + [
+                f"{f.label} {f.value}" for f in condition.features]))
+            for col, pattern in enumerate(patterns):
+                if pattern.search(text):
+                    weights[row, col] = TEXT_WEIGHT
+
+        # Pearls and red flags: the left column names findings; a pearl's right
+        # column names the conditions it points to, while a red flag may name
+        # the condition in either column ("Large/giant melanocytic nevus")
+        name_tokens = [_name_tokens(c.name) for _, c in conditions]
+        rules = []
+        for kind, rows, targets in (("pearl", clinical_pearls, slice(1, None)),
+                                    ("red flag", red_flags, slice(None))):
+            for rule in rows:
+                finding_text = normalize(rule[0])
+                target_tokens = set(tokenize(" ".join(rule[targets])))
+                pointed = [r for r, tokens in enumerate(name_tokens) if tokens & target_tokens]
+                for col, pattern in enumerate(patterns):
+                    if pattern.search(finding_text):
+                        rules.append((col, kind, rule))
+                        for r in pointed:
+                            weights[r, col] = max(weights[r, col], PEARL_WEIGHT)
+        return cls(conditions, findings, weights, rules)
+
+    def groups(self):
+        """{group: [finding label, ...]} in vocabulary order, for building pickers"""
+        grouped = {}
+        for finding in self.findings:
+            grouped.setdefault(finding.group, []).append(finding.label)
+        return grouped
+
+    def query(self, labels, limit=10):
+        """Rank conditions by how many of the findings they explain, then by evidence weight"""
+        np = numpy()
+        columns = [self._columns[label] for label in labels if label in self._columns]
+        if not columns or not self.conditions:
+            return []
+
+        selected = self.weights[:, columns]
+        score = selected.sum(axis=1)
+        matched_count = (selected > 0).sum(axis=1)
+
+        # Conditions showing every finding: AND of the packed bitsets
+        mask = np.packbits(np.isin(np.arange(len(self.findings)), columns))
+        complete = np.all((self.bits & mask) == mask, axis=1)
+
+        order = np.lexsort((-score, -matched_count))
+        order = order[matched_count[order] > 0][:limit]
+        results = []
+        for row in order:
+            category, condition = self.conditions[row]
+            matched = [self.findings[columns[i]].label for i in np.flatnonzero(selected[row])]
+            results.append(Differential(category, condition, float(score[row]), matched,
+                                        bool(complete[row])))
+        return results
+
+    def guidance(self, labels):
+        """Pearls and red flags triggered by the selected findings, red flags first"""
+        columns = {self._columns[label] for label in labels if label in self._columns}
+        seen, triggered = set(), []
+        for col, kind, row in self.rules:
+            if col in columns and (kind, row) not in seen:
+                seen.add((kind, row))
+                triggered.append((kind, row))
+        triggered.sort(key=lambda item: item[0] != "red flag")
+        return triggered
@@ -0,0 +1,401 @@
+"""
+Offline export of the full guide: static HTML site, XLSX workbook and print PDF
+Figure resizing and PDF page rendering run in a process pool. Each condition's
+outputs are cached under <output>/.cache by a hash of its content and figure,
+so re-exporting after a small edit only re-renders what changed.
+
+Usage: python export_guide.py [--output export] [--formats html xlsx pdf] [--workers N]
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from content_loader import CONTENT_DIR, SCHEMA_VERSION, TABLE_COLUMNS, load_content
+from images import IMG_DIR, file_signature
+
+# Bump to invalidate cached renders after changing the layout below
+EXPORT_VERSION = 2
+
+FIGURE_WIDTH = 640
+
+# Print pages: A4 at 150 dpi
+PAGE_SIZE = (1240, 1754)
+PAGE_MARGIN = 90
+PDF_DPI = 150
+
+# Page images open at once while binding the PDF (bound chunk by chunk, so
+# hundreds of chapters never hit the open-file limit)
+PDF_CHUNK_PAGES = 32
+
+TABLES = [
+    ("Key Diagnostic Questions", "diagnostic_questions", ("Question", "What to Assess", "Clinical Significance")),
+    ("Lesion Morphology", "lesion_morphology", ("Term", "Size", "Description")),
+    ("Clinical Pearls", "clinical_pearls", ("Finding", "Consider")),
+    ("Red Flags", "red_flags", ("Red Flag", "Action")),
+    ("Laboratory Studies", "lab_tests", ("Test", "Indication", "Findings")),
+    ("Treatment Summary", "treatments", ("Condition", "Treatment")),
+]
+
+SITE_CSS = """
+body { font-family: system-ui, sans-serif; max-width: 1100px; margin: 0 auto; padding: 1rem; color: #111827; }
+nav a { margin-right: 1rem; }
+.condition-card { display: flex; gap: 1.5rem; border-left: 4px solid #3b82f6; padding: 1rem; margin-bottom: 1rem; background: #f8fafc; }
+.condition-card img { width: 320px; height: auto; }
+table { border-collapse: collapse; width: 100%; margin-bottom: 2rem; }
+th, td { border: 1px solid #e5e7eb; padding: 0.5rem; text-align: left; vertical-align: top; }
+"""
+
+
+def _hash(*parts):
+    sha = hashlib.sha256(f"export-{EXPORT_VERSION}".encode())
+    for part in parts:
+        sha.update(json.dumps(part, sort_keys=True, ensure_ascii=False).encode())
+    return sha.hexdigest()[:20]
+
+
+def _printable(text):
+    """Drop emoji and symbols the bundled PDF font cannot draw"""
+    return "".join(c for c in text if ord(c) < 0x2600 or c == "→").strip()
+
+
+# Process-pool workers (top level so they can be pickled)
+
+def resize_figure(source_path, out_path, width=FIGURE_WIDTH):
+    """Write a JPEG no wider than width; returns out_path or None if the source is missing"""
+    from PIL import Image
+
+    if not os.path.exists(source_path):
+        return None
+    with Image.open(source_path) as image:
+        image = image.convert("RGB")
+        if image.width > width:
+            image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        image.save(out_path, "JPEG", quality=82, optimize=True, progressive=True)
+    return out_path
+
+
+def _font(size, bold=False):
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.truetype("DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf", size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+def _wrap(draw, text, font, width):
+    lines, line = [], ""
+    for word in text.split():
+        candidate = f"{line} {word}".strip()
+        if line and draw.textlength(candidate, font=font) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line:
+        lines.append(line)
+    return lines
+
+
+class _PageWriter:
+    """Flowing text/image layout over one or more print pages"""
+
+    def __init__(self):
+        self.pages = []
+        self._new_page()
+
+    def _new_page(self):
+        from PIL import Image, ImageDraw
+
+        self.page = Image.new("RGB", PAGE_SIZE, "white")
+        self.draw = ImageDraw.Draw(self.page)
+        self.pages.append(self.page)
+        self.y = PAGE_MARGIN
+
+    def _ensure(self, height):
+        if self.y + height > PAGE_SIZE[1] - PAGE_MARGIN:
+            self._new_page()
+
+    def text(self, text, size=26, bold=False, indent=0, color="#111827", gap=8):
+        font = _font(size, bold)
+        width = PAGE_SIZE[0] - 2 * PAGE_MARGIN - indent
+        for line in _wrap(self.draw, _printable(text), font, width):
+            self._ensure(size + gap)
+            self.draw.text((PAGE_MARGIN + indent, self.y), line, font=font, fill=color)
+            self.y += size + gap
+        self.y += gap
+
+    def image(self, path, width=700):
+        from PIL import Image
+
+        with Image.open(path) as image:
+            height = round(image.height * width / image.width)
+            self._ensure(height + 20)
+            self.page.paste(image.convert("RGB").resize((width, height)), (PAGE_MARGIN, self.y))
+        self.y += height + 20
+
+
+def render_condition_pages(condition, category_title, figure_path, out_prefix):
+    """Render one condition to print pages; returns the written PNG paths"""
+    writer = _PageWriter()
+    writer.text(category_title, size=22, color="#6b7280")
+    writer.text(condition.name, size=40, bold=True)
+    if figure_path and os.path.exists(figure_path):
+        writer.image(figure_path)
+        writer.text(condition.figure, size=22, color="#6b7280")
+    for label, value in condition.features:
+        writer.text(label, size=26, bold=True, gap=4)
+        writer.text(value, size=26, indent=30)
+    return _save_pages(writer.pages, out_prefix)
+
+
+def render_table_pages(title, headers, rows, out_prefix):
+    """Render one reference table as heading/value blocks; returns the written PNG paths"""
+    writer = _PageWriter()
+    writer.text(title, size=40, bold=True)
+    for row in rows:
+        writer.text(row[0], size=28, bold=True, gap=4)
+        for header, value in zip(headers[1:], row[1:]):
+            writer.text(f"{header}: {value}", size=24, indent=30, gap=4)
+        writer.y += 12
+    return _save_pages(writer.pages, out_prefix)
+
+
+def _save_pages(pages, out_prefix):
+    paths = []
+    for i, page in enumerate(pages):
+        path = f"{out_prefix}-{i}.png"
+        page.save(path, "PNG", optimize=False)
+        paths.append(path)
+    return paths
+
+
+# Export steps
+
+class GuideExporter:
+    """Walks the content once and writes each requested format"""
+
+    def __init__(self, content, output_dir, image_dir=IMG_DIR, workers=None):
+        self.content = content
+        self.output_dir = output_dir
+        self.image_dir = image_dir
+        self.workers = workers
+        self.cache_dir = os.path.join(output_dir, ".cache")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.conditions = [(category, c) for category, items in content["conditions"].items()
+                           for c in items]
+        self.stats = {"rendered": 0, "cached": 0}
+
+    def _condition_key(self, category, condition):
+        source = os.path.join(self.image_dir, condition.image)
+        title = self.content["categories"][category]["title"]
+        return _hash(category, title, condition.as_dict(), file_signature(source))
+
+    def prepare_figures(self, pool):
+        """Resized figure per condition, keyed by figure signature; returns {image: path}"""
+        jobs, figures = {}, {}
+        for _, condition in self.conditions:
+            source = os.path.join(self.image_dir, condition.image)
+            signature = file_signature(source)
+            if signature is None:
+                continue
+            out_path = os.path.join(self.cache_dir, f"fig-{_hash(condition.image, signature)}.jpg")
+            figures[condition.image] = out_path
+            if not os.path.exists(out_path) and condition.image not in jobs:
+                jobs[condition.image] = pool.submit(resize_figure, source, out_path)
+        for future in jobs.values():
+            future.result()
+        return figures
+
+    def export_html(self, figures):
+        site_dir = os.path.join(self.output_dir, "site")
+        image_dir = os.path.join(site_dir, "images")
+        os.makedirs(image_dir, exist_ok=True)
+        for image_name, path in figures.items():
+            target = os.path.join(image_dir, os.path.splitext(image_name)[0] + ".jpg")
+            if file_signature(target) != file_signature(path):
+                shutil.copy2(path, target)
+
+        categories = self.content["categories"]
+        nav = "<nav>" + "".join(
+            f'<a href="{html.escape(key)}.html">{html.escape(meta["title"])}</a>'
+            for key, meta in categories.items()
+        ) + '<a href="index.html">Quick Reference</a></nav>'
+
+        def page(title, body):
+            return (f"<!doctype html><html><head><meta charset='utf-8'>"
+                    f"<title>{html.escape(title)}</title><style>{SITE_CSS}</style></head>"
+                    f"<body><h1>{html.escape(title)}</h1>{nav}{body}</body></html>")
+
+        tables = "".join(self._table_html(t, self.content[key], headers) for t, key, headers in TABLES)
+        self._write(os.path.join(site_dir, "index.html"),
+                    page("Neonatal Dermatology Study Guide", tables))
+        for category, meta in categories.items():
+            cards = ""
+            for _, title, conditions in self.content["sections"][category]:
+                if title:
+                    cards += f"<h2>{html.escape(title)}</h2>"
+                cards += "".join(self._condition_html(c, figures) for c in conditions)
+            self._write(os.path.join(site_dir, f"{category}.html"), page(meta["title"], cards))
+        return site_dir
+
+    def _condition_html(self, condition, figures):
+        figure = ""
+        if condition.image in figures:
+            src = "images/" + os.path.splitext(condition.image)[0] + ".jpg"
+            figure = (f'<figure><img src="{html.escape(src)}" loading="lazy" '
+                      f'alt="{html.escape(condition.name)}">'
+                      f'<figcaption>{html.escape(condition.figure)}</figcaption></figure>')
+        features = "".join(f"<p><strong>{html.escape(label)}:</strong> {html.escape(value)}</p>"
+                           for label, value in condition.features)
+        return (f'<div class="condition-card">{figure}<div>'
+                f'<h2>{html.escape(condition.name)}</h2>{features}</div></div>')
+
+    def _table_html(self, title, rows, headers):
+        head = "".join(f"<th>{html.escape(h)}</th>" for h in headers)
+        body = "".join("<tr>" + "".join(f"<td>{html.escape(cell)}</td>" for cell in row) + "</tr>"
+                       for row in rows)
+        return f"<h2>{html.escape(title)}</h2><table><tr>{head}</tr>{body}</table>"
+
+    def _write(self, path, text):
+        """Write only if the contents changed, so unchanged pages keep their mtime"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                if f.read() == text:
+                    return
+        except OSError:
+            pass
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def export_xlsx(self):
+        from openpyxl import Workbook
+        from openpyxl.styles import Alignment, Font
+
+        workbook = Workbook()
+        # Chapter name and title, so the workbook loads back under the same header
+        meta = workbook.active
+        meta.title = "meta"
+        meta.append(["schema_version", SCHEMA_VERSION])
+        meta.append(["chapter", ", ".join(self.content["chapters"])])
+        meta.append(["title", self.content["title"] or None])
+        sheet = workbook.create_sheet("conditions")
+        sheet.append(["category", "name", "image", "figure", "label", "value", "subgroup"])
+        for category, condition in self.conditions:
+            for label, value in condition.features:
+                sheet.append([category, condition.name, condition.image,
+                              condition.figure, label, value, condition.subgroup])
+        categories = workbook.create_sheet("categories")
+        categories.append(["key", "title", "header", "style", "notice kind", "notice text",
+                           "subgroups"])
+        for key, meta in self.content["categories"].items():
+            notice = meta["notice"] or (None, None)
+            subgroups = "; ".join(f"{k}={title}" for k, title in meta["subgroups"])
+            categories.append([key, meta["title"], meta["header"], meta["style"], *notice,
+                               subgroups or None])
+        # Every table content_loader reads, so the workbook loads back as a chapter
+        headers_by_key = {key: headers for _, key, headers in TABLES}
+        headers_by_key["findings"] = ("Finding", "Group", "Match Terms")
+        for key in TABLE_COLUMNS:
+            table = workbook.create_sheet(key)
+            table.append(list(headers_by_key[key]))
+            for row in self.content[key]:
+                table.append(list(row))
+        for sheet in workbook.worksheets:
+            for cell in sheet[1]:
+                cell.font = Font(bold=True)
+            for column in sheet.columns:
+                sheet.column_dimensions[column[0].column_letter].width = 40
+                for cell in column:
+                    cell.alignment = Alignment(wrap_text=True, vertical="top")
+            sheet.freeze_panes = "A2"
+
+        path = os.path.join(self.output_dir, "guide.xlsx")
+        workbook.save(path)
+        return path
+
+    def export_pdf(self, pool, figures):
+        """Render (or reuse) every condition's and table's pages, then bind them"""
+        jobs = []
+        for category, condition in self.conditions:
+            prefix = os.path.join(self.cache_dir, f"cond-{self._condition_key(category, condition)}")
+            title = self.content["categories"][category]["title"]
+            jobs.append((prefix, render_condition_pages,
+                         (condition, title, figures.get(condition.image), prefix)))
+        for title, key, headers in TABLES:
+            prefix = os.path.join(self.cache_dir, f"table-{_hash(title, headers, self.content[key])}")
+            jobs.append((prefix, render_table_pages, (title, headers, self.content[key], prefix)))
+
+        futures = []
+        for prefix, render, args in jobs:
+            cached = self._cached_pages(prefix)
+            if cached:
+                self.stats["cached"] += 1
+                futures.append(cached)
+            else:
+                self.stats["rendered"] += 1
+                futures.append(pool.submit(render, *args))
+        page_paths = [f if isinstance(f, list) else f.result() for f in futures]
+
+        from PIL import Image
+
+        paths = [p for paths in page_paths for p in paths]
+        path = os.path.join(self.output_dir, "guide.pdf")
+        tmp_path = path + ".tmp"
+        for start in range(0, len(paths), PDF_CHUNK_PAGES):
+            pages = [Image.open(p) for p in paths[start:start + PDF_CHUNK_PAGES]]
+            try:
+                # Later chunks are appended to the PDF as incremental updates
+                pages[0].save(tmp_path, "PDF", resolution=PDF_DPI, save_all=True,
+                              append_images=pages[1:], append=start > 0)
+            finally:
+                for page in pages:
+                    page.close()
+        os.replace(tmp_path, path)
+        return path
+
+    def _cached_pages(self, prefix):
+        paths = []
+        while os.path.exists(f"{prefix}-{len(paths)}.png"):
+            paths.append(f"{prefix}-{len(paths)}.png")
+        return paths
+
+    def run(self, formats=("html", "xlsx", "pdf")):
+        written = []
+        with ProcessPoolExecutor(self.workers) as pool:
+            figures = self.prepare_figures(pool) if {"html", "pdf"} & set(formats) else {}
+            if "html" in formats:
+                written.append(self.export_html(figures))
+            if "xlsx" in formats:
+                written.append(self.export_xlsx())
+            if "pdf" in formats:
+                written.append(self.export_pdf(pool, figures))
+        return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the guide to HTML, XLSX and PDF")
+    parser.add_argument("--output", default="export")
+    parser.add_argument("--content-dir", default=CONTENT_DIR)
+    parser.add_argument("--image-dir", default=IMG_DIR)
+    parser.add_argument("--formats", nargs="+", choices=("html", "xlsx", "pdf"),
+                        default=["html", "xlsx", "pdf"])
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    exporter = GuideExporter(load_content(args.content_dir), args.output, args.image_dir,
+                             args.workers)
+    for path in exporter.run(args.formats):
+        print(f"Wrote {path}")
+    if "pdf" in args.formats:
+        print(f"PDF sections: {exporter.stats['rendered']} rendered, "
+              f"{exporter.stats['cached']} from cache")
+
+
+if __name__ == "__main__":
+    main()
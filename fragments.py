@@ -0,0 +1,91 @@
+"""
+Pre-rendered HTML fragments
+Every static piece of markup (condition card text, card wrappers, clinical
+pearl and red-flag boxes, morphology tiles, header and footer) is built once
+per content version with all content HTML-escaped. Reruns only look up and
+concatenate these strings, and text from external chapter files can't inject
+markup into pages rendered with unsafe_allow_html.
+"""
+
+from html import escape
+
+HEADER_HTML = """
+<div class="main-header">
+    <h1 style="color: white; margin: 0;">👶 Neonatal Rash and Dermatologic Problems</h1>
+    <p style="color: #bfdbfe; margin: 0.5rem 0 0 0;">Study Guide with Clinical Photographs - Based on {chapters}</p>
+</div>
+"""
+
+FOOTER_HTML = """
+<div style="text-align: center; color: #6b7280;">
+    <p>Neonatal Dermatology Study Guide - Based on {chapters}</p>
+    <p style="font-size: 0.875rem;">{figures} Clinical Photographs • All Information Preserved</p>
+</div>
+"""
+
+
+def card_open_html(style):
+    """Opening wrapper of a condition card for a category style"""
+    return f'<div class="condition-card {escape(style)}">'
+
+
+def condition_html(condition):
+    """Heading and feature lines of a condition card"""
+    lines = [f"<h3>{escape(condition.name)}</h3>"]
+    lines += [f"<p><strong>{escape(label)}:</strong> {escape(value)}</p>"
+              for label, value in condition.features]
+    return "\n".join(lines)
+
+
+def morphology_tile_html(term, size, desc):
+    """HTML tile for one lesion morphology term"""
+    return f"""
+    <div style="background: white; padding: 1rem; border-radius: 0.5rem; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
+        <h4 style="color: #1e40af; margin: 0;">{escape(term)}</h4>
+        <p style="color: #6b7280; font-size: 0.875rem; margin: 0.25rem 0;">{escape(size)}</p>
+        <p style="margin: 0;">{escape(desc)}</p>
+    </div>
+    """
+
+
+def pearl_html(finding, diagnosis):
+    """One clinical pearl box"""
+    return f"""
+    <div class="pearl-box">
+        <strong>{escape(finding)}</strong><br/>
+        → {escape(diagnosis)}
+    </div>
+    """
+
+
+def red_flag_html(flag, action):
+    """One red-flag box"""
+    return f"""
+    <div class="red-flag">
+        <strong>⚠️ {escape(flag)}</strong><br/>
+        <span style="color: #dc2626;">→ {escape(action)}</span>
+    </div>
+    """
+
+
+def build_fragments(content):
+    """Every static fragment for one content version
+
+    Returns a dict: header, footer, pearls and red_flags (whole blocks),
+    morphology (tiles in table order), card_open ({style: html}) and
+    conditions ({Condition: card text html}).
+    """
+    chapters = escape(", ".join(content["chapters"]))
+    return {
+        "version": content["version"],
+        "header": HEADER_HTML.format(chapters=chapters),
+        "footer": FOOTER_HTML.format(chapters=chapters, figures=content["stats"]["figures"]),
+        "pearls": "".join(pearl_html(*row) for row in content["clinical_pearls"]),
+        "red_flags": "".join(red_flag_html(*row) for row in content["red_flags"]),
+        "morphology": [morphology_tile_html(*row) for row in content["lesion_morphology"]],
+        "card_open": {meta["style"]: card_open_html(meta["style"])
+                      for meta in content["categories"].values()},
+        "conditions": {condition: condition_html(condition)
+                       for conditions in content["conditions"].values()
+                       for condition in conditions},
+    }
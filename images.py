@@ -0,0 +1,186 @@
+"""
+Image store for the clinical photographs
+Process-wide LRU cache of ready-to-serve image bytes, plus the file helpers
+(listing, change signatures, content hashes) the image indexes share
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Image directory: NEONATAL_IMAGE_DIR, else images/ next to the app
+IMG_DIR = os.environ.get(
+    "NEONATAL_IMAGE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "images"))
+
+# Derivatives written by build_renditions.py, relative to IMG_DIR
+RENDITIONS_SUBDIR = "renditions"
+RENDITIONS_MANIFEST = "manifest.json"
+
+# Files treated as photographs
+IMAGE_EXTENSIONS = (".jpeg", ".jpg", ".png")
+
+# Default cache budget (bytes), overridable via NEONATAL_IMAGE_CACHE_MB
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, or None if it is missing; changes whenever it is rewritten"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def file_digest(path, prefix=b""):
+    """SHA-256 hex digest of prefix followed by the file's contents"""
+    sha = hashlib.sha256(prefix)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def list_images(image_dir=IMG_DIR):
+    """{name: (mtime_ns, size)} for the photographs directly in image_dir"""
+    entries = {}
+    with os.scandir(image_dir) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                stat = entry.stat()
+                entries[entry.name] = (stat.st_mtime_ns, stat.st_size)
+    return entries
+
+
+def cache_budget_from_env():
+    """Read the image cache byte budget from the environment"""
+    megabytes = os.environ.get("NEONATAL_IMAGE_CACHE_MB")
+    if megabytes:
+        return int(float(megabytes) * 1024 * 1024)
+    return DEFAULT_CACHE_BYTES
+
+
+class ImageCache:
+    """Thread-safe LRU cache of encoded image bytes keyed by filename and mtime
+
+    trusted maps filenames to the mtime recorded by validate_images.py; those
+    files are not stat'ed on every get().
+    """
+
+    def __init__(self, image_dir=IMG_DIR, max_bytes=DEFAULT_CACHE_BYTES, trusted=None):
+        self.image_dir = image_dir
+        self.max_bytes = max_bytes
+        self.trusted = trusted or {}
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._current_keys = {}
+        self._lock = threading.Lock()
+
+    def get(self, image_name):
+        """Return the file's bytes, or None if the file is missing"""
+        return self.get_versioned(image_name)[0]
+
+    def get_versioned(self, image_name):
+        """(bytes, mtime_ns) of the file, or (None, None) if it is missing
+
+        The mtime identifies the cached version, so callers can key derived
+        data (e.g. ETags) on it without holding on to the bytes.
+        """
+        image_path = os.path.join(self.image_dir, image_name)
+        mtime = self.trusted.get(image_name)
+        if mtime is None:
+            try:
+                mtime = os.stat(image_path).st_mtime_ns
+            except OSError:
+                return None, None
+
+        key = (image_name, mtime)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data, mtime
+
+        # Read outside the lock so a slow disk doesn't block other sessions
+        try:
+            with open(image_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None, None
+
+        with self._lock:
+            self.misses += 1
+            self._store(key, data)
+        return data, mtime
+
+    def _store(self, key, data):
+        """Insert an entry, dropping stale versions and evicting LRU entries"""
+        stale = self._current_keys.get(key[0])
+        if stale is not None and stale != key and stale in self._entries:
+            self.current_bytes -= len(self._entries.pop(stale))
+        if key in self._entries or len(data) > self.max_bytes:
+            return
+        self._entries[key] = data
+        self._current_keys[key[0]] = key
+        self.current_bytes += len(data)
+        while self.current_bytes > self.max_bytes:
+            (evicted_name, _), evicted = self._entries.popitem(last=False)
+            self._current_keys.pop(evicted_name, None)
+            self.current_bytes -= len(evicted)
+
+    def clear(self):
+        """Drop every cached image"""
+        with self._lock:
+            self._entries.clear()
+            self._current_keys.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Return a snapshot of cache usage counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def load_rendition_manifest(image_dir=IMG_DIR):
+    """Read the renditions manifest, or return an empty one if not built yet"""
+    path = os.path.join(image_dir, RENDITIONS_SUBDIR, RENDITIONS_MANIFEST)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"images": {}}
+
+
+def pick_rendition(manifest, image_name, width, formats=("jpeg",)):
+    """Return the path (relative to IMG_DIR) of the smallest rendition that fits width
+
+    Picks the narrowest rendition at least `width` pixels wide, then the one
+    with the fewest bytes among `formats`. Falls back to the widest rendition
+    when none is wide enough, and to the original when none were built.
+    """
+    entry = manifest.get("images", {}).get(image_name)
+    if not entry:
+        return image_name
+
+    candidates = [r for r in entry["renditions"] if r["format"] in formats]
+    if not candidates:
+        return image_name
+
+    wide_enough = [r for r in candidates if r["width"] >= width]
+    if wide_enough:
+        best = min(wide_enough, key=lambda r: (r["width"], r["bytes"]))
+    else:
+        best = max(candidates, key=lambda r: (r["width"], -r["bytes"]))
+    return f"{RENDITIONS_SUBDIR}/{best['file']}"
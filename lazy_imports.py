@@ -0,0 +1,40 @@
+"""
+Lazy accessors for heavy optional dependencies
+numpy, OpenCV and TensorFlow add seconds to a cold start, so modules fetch
+them through these accessors on first use instead of importing them at
+module level.
+"""
+
+import importlib
+import threading
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def lazy_module(name):
+    """Import `name` on first call and return the cached module afterwards"""
+    module = _loaded.get(name)
+    if module is not None:
+        return module
+    with _lock:
+        module = _loaded.get(name)
+        if module is None:
+            module = importlib.import_module(name)
+            _loaded[name] = module
+    return module
+
+
+def numpy():
+    """numpy, imported on first use"""
+    return lazy_module("numpy")
+
+
+def cv2():
+    """OpenCV, imported on first use"""
+    return lazy_module("cv2")
+
+
+def tensorflow():
+    """TensorFlow, imported on first use"""
+    return lazy_module("tensorflow")
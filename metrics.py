@@ -0,0 +1,291 @@
+"""
+Lightweight tracing spans and metrics for the hot paths
+Spans record wall time into fixed-bucket histograms shared by every session
+in the process. The histograms can be exported as Prometheus text to a file
+and/or an HTTP port, and a sampling profiler can be switched on at runtime
+to see where the time inside a span goes.
+
+Environment:
+    NEONATAL_METRICS_FILE      write the Prometheus text here every few seconds
+    NEONATAL_METRICS_PORT      serve it at http://0.0.0.0:<port>/metrics
+    NEONATAL_METRICS_INTERVAL  seconds between file writes (default 15)
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+METRIC_PREFIX = "neonatal"
+
+# Histogram bucket upper bounds (seconds), Prometheus-style
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+DEFAULT_EXPORT_INTERVAL_S = 15
+PROFILER_INTERVAL_S = 0.005
+PROFILER_MAX_DEPTH = 40
+
+
+class Histogram:
+    """Thread-safe cumulative histogram of durations in seconds"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        slot = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                slot = i
+                break
+        with self._lock:
+            self.counts[slot] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    def snapshot(self):
+        """(per-bucket counts, count, sum, max) taken under the lock"""
+        with self._lock:
+            return list(self.counts), self.count, self.sum, self.max
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        counts, count, _, maximum = self.snapshot()
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        lower = 0.0
+        for i, n in enumerate(counts):
+            upper = min(self.buckets[i], maximum) if i < len(self.buckets) else maximum
+            if n and seen + n >= rank:
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+            lower = upper
+        return maximum
+
+
+# span name -> Histogram
+SPANS = {}
+_spans_lock = threading.Lock()
+
+# gauge name -> callable returning {label value: number} or a number
+GAUGES = {}
+
+
+def histogram(name):
+    """The histogram for span `name`, created on first use"""
+    hist = SPANS.get(name)
+    if hist is None:
+        with _spans_lock:
+            hist = SPANS.setdefault(name, Histogram())
+    return hist
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block into the `name` histogram"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram(name).observe(time.perf_counter() - start)
+
+
+def register_gauge(name, read):
+    """Export read() (a number, or {label: number}) as gauge `name` at scrape time"""
+    GAUGES[name] = read
+
+
+def summary():
+    """[(span, count, mean s, p50 s, p95 s, p99 s, max s)] sorted by total time"""
+    rows = []
+    for name, hist in list(SPANS.items()):
+        _, count, total, maximum = hist.snapshot()
+        if count:
+            rows.append((name, count, total / count, hist.quantile(0.5), hist.quantile(0.95),
+                         hist.quantile(0.99), maximum, total))
+    rows.sort(key=lambda r: -r[-1])
+    return [r[:-1] for r in rows]
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text():
+    """All spans and gauges in the Prometheus text exposition format"""
+    family = f"{METRIC_PREFIX}_span_seconds"
+    lines = [f"# HELP {family} Wall time spent in instrumented code paths",
+             f"# TYPE {family} histogram"]
+    for name, hist in sorted(SPANS.items()):
+        counts, count, total, _ = hist.snapshot()
+        label = f'span="{_escape_label(name)}"'
+        cumulative = 0
+        for bound, n in zip(hist.buckets, counts):
+            cumulative += n
+            lines.append(f'{family}_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f'{family}_bucket{{{label},le="+Inf"}} {count}')
+        lines.append(f"{family}_sum{{{label}}} {total:.6f}")
+        lines.append(f"{family}_count{{{label}}} {count}")
+
+    for name, read in sorted(GAUGES.items()):
+        try:
+            value = read()
+        except Exception:
+            continue
+        gauge = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# TYPE {gauge} gauge")
+        if isinstance(value, dict):
+            for key, v in sorted(value.items()):
+                lines.append(f'{gauge}{{key="{_escape_label(key)}"}} {v}')
+        else:
+            lines.append(f"{gauge} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    """Write the current metrics to `path` atomically (for node_exporter's textfile collector)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+
+def serve_prometheus(port, host="0.0.0.0"):
+    """Serve /metrics on a daemon thread and return the server"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def _write_periodically(path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            write_prometheus(path)
+        except OSError:
+            pass
+
+
+def start_exporters_from_env():
+    """Start the file writer and/or HTTP endpoint configured in the environment
+
+    Returns a dict describing what was started; call once per process.
+    """
+    started = {}
+    path = os.environ.get("NEONATAL_METRICS_FILE")
+    if path:
+        interval = float(os.environ.get("NEONATAL_METRICS_INTERVAL", DEFAULT_EXPORT_INTERVAL_S))
+        threading.Thread(target=_write_periodically, args=(path, interval),
+                         name="metrics-file", daemon=True).start()
+        started["file"] = path
+    port = os.environ.get("NEONATAL_METRICS_PORT")
+    if port:
+        serve_prometheus(int(port))
+        started["port"] = int(port)
+    return started
+
+
+# Sampling profiler
+
+class SamplingProfiler:
+    """Samples every thread's Python stack at a fixed interval while running
+
+    Cheap enough to leave on briefly under production traffic; results are
+    collapsed stacks ("outer;inner;leaf" -> samples), the flame graph input
+    format.
+    """
+
+    def __init__(self, interval=PROFILER_INTERVAL_S, thread_prefix=None):
+        self.interval = interval
+        self.thread_prefix = thread_prefix  # only sample threads whose name starts with this
+        self.stacks = Counter()
+        self.samples = 0
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler",
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._stop.set()
+            if self._thread is not None:
+                self._thread.join()
+            self._thread = None
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                if self.thread_prefix and not names.get(thread_id, "").startswith(self.thread_prefix):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < PROFILER_MAX_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def top_functions(self, n=20):
+        """[(function, samples)] by self time (leaf frame)"""
+        leaves = Counter()
+        for stack, count in list(self.stacks.items()):
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(n)
+
+    def collapsed(self):
+        """Collapsed-stack text for flamegraph.pl / speedscope"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# Streamlit runs each session's script on a "ScriptRunner.scriptThread" thread;
+# sampling only those keeps the server's idle event loop out of the profile
+PROFILER = SamplingProfiler(thread_prefix="ScriptRunner")
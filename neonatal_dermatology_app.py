@@ -4,9 +4,29 @@ A comprehensive Streamlit web application with clinical photographs
 Based on Gomella's Neonatology, Chapter 80
 """
 
-import streamlit as st
-from PIL import Image
 import os
+import time
+import uuid
+
+import streamlit as st
+
+from content_loader import CONTENT_DIR, ContentStore
+from differential import DifferentialIndex
+from fragments import build_fragments, card_open_html, condition_html
+from images import (IMG_DIR, ImageCache, cache_budget_from_env, file_signature,
+                    load_rendition_manifest, pick_rendition)
+from metrics import (PROFILER, prometheus_text, register_gauge, span,
+                     start_exporters_from_env, summary)
+from ocr_index import index_path as ocr_index_path
+from ocr_index import read_figure_texts
+from prefetch import Prefetcher
+from quiz import GRADES, QUESTIONS, ReviewStore, build_deck, schedule
+from rash_classifier import ClassifierBusy, load_batching_classifier
+from search_index import SearchIndex
+from similarity_index import SimilarityIndex
+from static_images import ContentHashes, start_image_server
+from validate_images import (load_manifest, manifest_path, startup_problems,
+                             trusted_versions)
 
 # Page configuration
 st.set_page_config(
@@ -16,8 +36,25 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Image directory
-IMG_DIR = "/home/z/my-project/download/original_images"
+# Target rendition widths (px): the 1/3-width figure column on the wide
+# layout, and thumbnails in the "similar-looking" strip
+FIGURE_WIDTH = 640
+THUMBNAIL_WIDTH = 160
+SIMILAR_FIGURES = 3
+
+# Browsers decode WebP natively, so statically served figures may use it
+STATIC_FORMATS = ("jpeg", "webp")
+
+# Pagination: only the cards on the current page are rendered and their
+# images loaded, so page cost stays flat however large a category grows
+CARDS_PER_PAGE = 10
+NAMES_PER_PAGE = 50
+
+# Figures warmed in the background: top sidebar search hits
+PREFETCH_SEARCH_HITS = 5
+
+# Opt-in admin page with timing histograms and the sampling profiler
+ADMIN_ENABLED = os.environ.get("NEONATAL_ADMIN") == "1"
 
 # Custom CSS
 st.markdown("""
@@ -54,501 +91,714 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Data structures
-CONDITIONS = {
-    "benign": [
-        {
-            "name": "Aplasia Cutis Congenita",
-            "image": "01_aplasia_cutis.jpeg",
-            "figure": "Figure 1",
-            "features": [
-                ("Appearance", "Localized absence of skin, most commonly on scalp"),
-                ("Cause", "Can be associated with methimazole or valproic acid exposure in pregnancy"),
-                ("Treatment", "Small lesions: local wound care; Large lesions: may require surgical excision, skin grafting"),
-            ]
-        },
-        {
-            "name": "Erythema Toxicum (Most Common Newborn Rash)",
-            "image": "02_erythema_toxicum.jpeg",
-            "figure": "Figure 2",
-            "features": [
-                ("Appearance", "Erythematous macules with central papule or pustule"),
-                ("Timing", "First 48 hours of life; can be present at birth"),
-                ("Location", "Trunk, extremities, perineum; more common in term infants"),
-                ("Course", "Resolves by 2 weeks; new lesions may appear"),
-                ("Diagnosis", "Wright stain shows eosinophils (vs neutrophils in infection)"),
-            ]
-        },
-        {
-            "name": "Transient Neonatal Pustular Melanosis",
-            "image": "03_transient_pustular_melanosis.jpeg",
-            "figure": "Figure 3",
-            "features": [
-                ("Appearance", "2-5 mm pustules present at birth"),
-                ("Location", "Face, sacrum; typically in full-term infants"),
-                ("Course", "Pustules resolve in 48 hours; hyperpigmented macules fade over months"),
-            ]
-        },
-        {
-            "name": "Milia",
-            "image": "04_milia.jpeg",
-            "figure": "Figure 4",
-            "features": [
-                ("Appearance", "Tiny 1-mm white-yellow papules"),
-                ("Location", "Face, chin, forehead, scalp"),
-                ("Cause", "Sebaceous retention cysts"),
-                ("Course", "Resolves spontaneously; no treatment needed"),
-            ]
-        },
-        {
-            "name": "Acropustulosis of Infancy",
-            "image": "05_acropustulosis.jpeg",
-            "figure": "Figure 5",
-            "features": [
-                ("Appearance", "Pruritic vesicopustules"),
-                ("Location", "Palmar surface of hands, plantar surface of feet"),
-                ("Course", "Recurrent; each episode lasts 7-14 days"),
-                ("Key Point", "Distinguish from scabies; intense itching"),
-            ]
-        },
-        {
-            "name": "Neonatal Acne",
-            "image": "06_neonatal_acne.jpeg",
-            "figure": "Figure 6",
-            "features": [
-                ("Appearance", "Erythematous comedones, papules, and pustules"),
-                ("Location", "Face"),
-                ("Course", "Resolves over weeks to months; no treatment needed"),
-            ]
-        },
-        {
-            "name": "Subcutaneous Fat Necrosis",
-            "image": "07_subcutaneous_fat_necrosis.jpeg",
-            "figure": "Figure 7",
-            "features": [
-                ("Appearance", "Erythematous nodules and plaques"),
-                ("Location", "Face, back, arms, legs, buttocks (areas of trauma)"),
-                ("Timing", "First few weeks of life; resolves by 2 months"),
-                ("Complication", "⚠️ Hypercalcemia can occur if lesions calcify - monitor calcium!"),
-            ]
-        },
-        {
-            "name": "Mongolian Spots (Congenital Dermal Melanocytosis)",
-            "image": "08_mongolian_spots.jpeg",
-            "figure": "Figure 8",
-            "features": [
-                ("Appearance", "Blue-black macular discoloration"),
-                ("Location", "Base of spine, buttocks"),
-                ("Prevalence", ">90% in Black infants; 81% in Asian infants"),
-                ("Course", "Usually fades over several years"),
-            ]
-        },
-    ],
-    "infectious": [
-        {
-            "name": "Staphylococcal Scalded Skin Syndrome (SSSS)",
-            "image": "09_ssss.jpeg",
-            "figure": "Figure 9",
-            "features": [
-                ("Cause", "Toxin-mediated disease (exfoliative toxins A and B)"),
-                ("Appearance", "Tender scarlatiniform rash with flaking and desquamation"),
-                ("Complications", "Bacteremia rare; superinfection and dehydration can occur"),
-                ("Treatment", "IV penicillinase-resistant antistaphylococcal antibiotics; supportive care; fluid management"),
-            ]
-        },
-        {
-            "name": "Herpes Simplex Virus (HSV)",
-            "image": "10_hsv.jpeg",
-            "figure": "Figure 10",
-            "features": [
-                ("Types", "Congenital HSV, Neonatal HSV (birth to 6 weeks)"),
-                ("Forms", "Disseminated, Localized CNS, SEM (Skin/Eyes/Mouth)"),
-                ("Appearance", "Erythematous papules/vesicles progressing to pustular clusters with intense erythema"),
-                ("Treatment", "🔴 Start acyclovir early, even if diagnosis not confirmed!"),
-            ]
-        },
-        {
-            "name": "Varicella-Zoster",
-            "image": "11_varicella.jpeg",
-            "figure": "Figure 11",
-            "features": [
-                ("Congenital/Fetal syndrome", "Acquired in utero < 20 weeks; cicatricial scars at birth"),
-                ("Perinatal varicella", "Acquired late 3rd trimester; centripetal rash days 10-12"),
-                ("Postnatally acquired", "Typical chickenpox rash; all stages present (red macules, clear vesicles, crusting)"),
-            ]
-        },
-        {
-            "name": "Congenital Cutaneous Candidiasis",
-            "image": "12_candidiasis.jpeg",
-            "figure": "Figure 12",
-            "features": [
-                ("Timing", "Acquired in utero; extensive rash within 12 hours of birth"),
-                ("Key Feature", "⚠️ Involves palms and soles (unlike erythema toxicum)"),
-                ("Treatment", "Systemic antifungals for disseminated; topical for isolated skin lesions"),
-            ]
-        },
-    ],
-    "other": [
-        {
-            "name": "Lamellar Ichthyosis",
-            "image": "13_ichthyosis.jpeg",
-            "figure": "Figure 13",
-            "features": [
-                ("Types", "May present as 'harlequin fetus' or 'collodion baby'"),
-                ("Appearance", "Thick, scaly skin; shiny membrane at birth that peels off"),
-                ("Complications", "Skin prone to cracking and infection; temperature instability"),
-                ("Treatment", "Aggressive supportive care; fluid/electrolyte monitoring"),
-            ]
-        },
-        {
-            "name": "Neonatal Lupus",
-            "image": "14_neonatal_lupus.jpeg",
-            "figure": "Figure 14",
-            "features": [
-                ("Cause", "Maternal autoantibodies (SSA/Ro, SSB/La)"),
-                ("Appearance", "0.5-3 cm annular erythematous papules with central scale"),
-                ("Manifestations", "Skin, Cardiac (heart block), Liver/hematologic"),
-                ("Treatment", "Cardiac exam, LFTs, CBC; sunscreen; avoid sunlight 4-6 months"),
-            ]
-        },
-        {
-            "name": "Epidermolysis Bullosa",
-            "image": "15_epidermolysis_bullosa.jpeg",
-            "figure": "Figure 15",
-            "features": [
-                ("Type", "Group of inherited diseases causing blistering"),
-                ("Appearance", "Trauma-induced blisters; congenital localized absence of skin"),
-                ("Complications", "Dysphagia from scarring; infection risk"),
-                ("Treatment", "Meticulous skin care; infection prevention; nutrition support"),
-            ]
-        },
-        {
-            "name": "Incontinentia Pigmenti",
-            "image": "16_incontinentia_pigmenti.jpeg",
-            "figure": "Figure 16",
-            "features": [
-                ("Inheritance", "Rare X-linked dominant; more common in females"),
-                ("Stage 1", "Vesiculobullous lesions in linear distribution (can be confused with HSV!)"),
-                ("Associations", "Neurologic, dental, ophthalmologic abnormalities"),
-            ]
-        },
-        {
-            "name": "Port Wine Stain (Nevus Flammeus)",
-            "image": "17_port_wine_stain.jpeg",
-            "figure": "Figure 17",
-            "features": [
-                ("Appearance", "Flat pink-red capillary angioma"),
-                ("Location", "Usually face or extremities"),
-                ("Course", "Permanent; does not fade"),
-                ("Associations", "Sturge-Weber syndrome (if V1 distribution); Klippel-Trenaunay syndrome"),
-            ]
-        },
-        {
-            "name": "'Blueberry Muffin' Lesions",
-            "image": "18_blueberry_muffin.jpeg",
-            "figure": "Figure 18",
-            "features": [
-                ("Appearance", "Widespread purpura and papules"),
-                ("Causes", "TORCH infections, Hemolytic disease, Neuroblastoma, Congenital leukemia"),
-                ("Workup", "TORCH titers, CBC, consider malignancy workup"),
-            ]
-        },
-    ],
-    "malignant": [
-        {
-            "name": "Congenital Melanocytic Nevus",
-            "image": "19_melanocytic_nevus.jpeg",
-            "figure": "Figure 19",
-            "features": [
-                ("Small (< 1.5 cm)", "Small melanoma risk; monitor; removal optional"),
-                ("Intermediate (< 20 cm)", "Small risk; monitor; consider removal"),
-                ("Large/Giant (> 20 cm)", "⚠️ 5-15% melanoma risk; removal recommended; monitor for neurocutaneous melanosis"),
-            ]
-        },
-        {
-            "name": "Giant Congenital Melanocytic Nevus",
-            "image": "20_giant_nevus.jpeg",
-            "figure": "Figure 20",
-            "features": [
-                ("Size", "> 40 cm in diameter"),
-                ("Melanoma risk", "5-15% lifetime risk"),
-                ("Additional risk", "Neurocutaneous melanosis - MRI screening may be indicated"),
-                ("Management", "Dermatology referral; consider surgical removal; close monitoring"),
-            ]
-        },
-        {
-            "name": "Sebaceous Nevus of Jadassohn",
-            "image": "21_sebaceous_nevus.jpeg",
-            "figure": "Figure 21",
-            "features": [
-                ("Appearance", "Congenital hamartomatous lesion; yellow-orange waxy plaque"),
-                ("Location", "Scalp"),
-                ("Prevalence", "~0.3% of newborns"),
-                ("Malignant potential", "Can transform to basal cell carcinoma or benign trichoblastoma"),
-            ]
-        },
-    ],
-}
 
-CLINICAL_PEARLS = [
-    ("Palms and soles involved", "Congenital candidiasis, Syphilis, Scabies, Acropustulosis"),
-    ("'Blueberry muffin' rash", "TORCH infections, Hemolytic disease, Neuroblastoma, Leukemia"),
-    ("Non-blanching lesions", "Thrombocytopenia, DIC, infection - check platelets and coagulation"),
-    ("Vesicles in linear distribution", "Incontinentia pigmenti vs HSV - differentiate urgently!"),
-    ("Ill-appearing infant with rash", "Immediate sepsis workup; start acyclovir empirically"),
-    (">6 café-au-lait spots >5 mm", "Neurofibromatosis, Tuberous sclerosis"),
-    ("Port wine stain in V1", "Sturge-Weber syndrome - ophthalmology/neurology evaluation"),
-    ("Eosinophils on Wright stain", "Erythema toxicum (benign)"),
-    ("Neutrophils on Wright stain", "Bacterial infection (requires treatment)"),
-]
-
-RED_FLAGS = [
-    ("Ill-appearing/febrile infant with rash", "Immediate sepsis workup; start acyclovir empirically"),
-    ("Widespread petechiae/purpura", "Urgent CBC, coagulation; consider sepsis, DIC, leukemia"),
-    ("Vesicular rash in newborn", "PCR for HSV; start acyclovir pending results"),
-    ("Large/giant melanocytic nevus", "Dermatology referral; monitor for neurocutaneous melanosis"),
-    ("Port wine stain in V1", "Evaluate for Sturge-Weber; ophthalmology for glaucoma"),
-]
-
-LAB_TESTS = [
-    ("Sepsis evaluation", "Systemic infection suspected", "Cultures, PCR from lesions"),
-    ("CBC, platelets", "Active bleeding suspected", "Thrombocytopenia, anemia"),
-    ("TORCH titers", "Congenital infection", "Elevated IgM titers"),
-    ("KOH prep", "Candida/fungal", "Pseudohyphae"),
-    ("Wright stain", "Differentiate rash type", "Eosinophils (benign) vs Neutrophils (infection)"),
-    ("Mineral oil prep", "Scabies", "Mites and ova"),
-    ("PCR/DFA", "Herpes", "HSV DNA"),
-    ("Coagulation studies", "Bleeding disorder/DIC", "Prolonged PT/PTT, low fibrinogen"),
-]
-
-TREATMENTS = [
-    ("Benign skin disorders", "No treatment necessary; parental reassurance"),
-    ("Aplasia cutis congenita", "Local wound care; larger lesions may need surgical excision"),
-    ("Skin/soft tissue infections", "I&D; cultures; antibiotics (nafcillin/vancomycin)"),
-    ("HSV infection", "🔴 Start acyclovir early, even before confirmed diagnosis!"),
-    ("Candida", "Systemic antifungals for disseminated; topical for skin lesions"),
-    ("Ichthyoses/EB", "Supportive care; fluid/electrolyte monitoring; infection prevention"),
-    ("Neonatal lupus", "Cardiac exam; sunscreen; avoid sunlight 4-6 months"),
-]
-
-DIAGNOSTIC_QUESTIONS = [
-    ("What are the rash characteristics?", "Morphology: macular, papular, vesicular, bullous, pustular", "Lesion morphology aids differential diagnosis"),
-    ("Are there petechiae, purpura, ecchymosis?", "Check for blanching; non-blanching = intradermal bleeding", "May indicate thrombocytopenia"),
-    ("History of congenital infection?", "TORCH infections, maternal history", "Can cause serious systemic disease"),
-    ("Is the infant ill-appearing?", "Fever, vital signs, overall appearance", "Well infant = likely benign; ill = workup needed"),
-    ("Maternal medications?", "Pregnancy/delivery meds; breastfeeding meds", "Methimazole, valproic acid → aplasia cutis"),
-]
-
-LESION_MORPHOLOGY = [
-    ("Macule", "< 1 cm", "Flat lesion"),
-    ("Papule", "up to 1 cm", "Raised, solid"),
-    ("Vesicle", "< 1 cm", "Clear fluid"),
-    ("Bulla", "> 1 cm", "Large, clear fluid"),
-    ("Pustule", "Variable", "Purulent fluid"),
-    ("Petechiae", "Pinpoint", "Non-blanching red dots"),
-    ("Purpura", "Larger", "Non-blanching, blood under tissue"),
-    ("Nodule", "up to 2 cm", "Raised, deeper"),
-]
-
-
-def load_image(image_name):
-    """Load image from the images directory"""
-    image_path = os.path.join(IMG_DIR, image_name)
-    if os.path.exists(image_path):
-        return Image.open(image_path)
-    return None
+@st.cache_resource
+def get_image_cache():
+    """Image cache shared by every session in this server process"""
+    return ImageCache(IMG_DIR, cache_budget_from_env())
+
+
+@st.cache_resource(max_entries=2)
+def get_image_manifest(integrity_signature):
+    """Integrity manifest from validate_images.py (None if it hasn't been run)
+
+    Re-read whenever validate_images.py rewrites it; the image cache then
+    trusts the newly validated files.
+    """
+    manifest = load_manifest(IMG_DIR)
+    get_image_cache().trusted = trusted_versions(manifest)
+    return manifest
+
+
+@st.cache_resource(max_entries=4)
+def get_image_problems(content_version, integrity_signature, _content):
+    """Referenced figures that are missing, broken or changed
+
+    Checked once per content version and integrity manifest, so fixing the
+    files and re-running validate_images.py takes effect without a restart.
+    """
+    return startup_problems(IMG_DIR, _content, get_image_manifest(integrity_signature))
+
+
+@st.cache_data(ttl=60)
+def get_rendition_manifest():
+    """Renditions manifest from build_renditions.py (re-read at most once a minute)"""
+    return load_rendition_manifest(IMG_DIR)
+
+
+def rendition_paths(image_names, width=FIGURE_WIDTH):
+    """Paths (relative to IMG_DIR) that load_image/image_source will read for these figures"""
+    manifest = get_rendition_manifest()
+    formats = STATIC_FORMATS if get_static_images() else ("jpeg",)
+    return [pick_rendition(manifest, name, width, formats) for name in image_names]
+
+
+def load_image(image_name, width=FIGURE_WIDTH):
+    """Load the best-fitting rendition's bytes via the shared cache"""
+    with span("load_image"):
+        path = pick_rendition(get_rendition_manifest(), image_name, width)
+        return get_image_cache().get(path) or get_image_cache().get(image_name)
+
+
+@st.cache_resource
+def get_static_images():
+    """(public base URL, ContentHashes) when figures are served as static files, else None
+
+    NEONATAL_IMAGE_PORT starts the image server inside this process and
+    requires NEONATAL_IMAGE_BASE_URL, the address browsers reach it at;
+    NEONATAL_IMAGE_BASE_URL alone points at one run separately (or a CDN in
+    front of it).
+    """
+    port = os.environ.get("NEONATAL_IMAGE_PORT")
+    base_url = os.environ.get("NEONATAL_IMAGE_BASE_URL")
+    if port:
+        if not base_url:
+            # localhost would only work for a browser on the server itself
+            raise ValueError("NEONATAL_IMAGE_PORT is set but NEONATAL_IMAGE_BASE_URL is not: "
+                             "set it to the public URL browsers reach the image server at "
+                             f"(port {port}), using https if the app is served over https.")
+        _, hashes = start_image_server(IMG_DIR, int(port))
+    elif base_url:
+        hashes = ContentHashes(IMG_DIR)
+    else:
+        return None
+    return base_url.rstrip("/"), hashes
+
+
+def image_source(image_name, width=FIGURE_WIDTH):
+    """Content-hashed URL of the best-fitting rendition, or its bytes without an image server"""
+    static = get_static_images()
+    if static is None:
+        return load_image(image_name, width)
+    base_url, hashes = static
+    with span("image_url"):
+        path = pick_rendition(get_rendition_manifest(), image_name, width, STATIC_FORMATS)
+        url_path = hashes.url_path(path) or hashes.url_path(image_name)
+    return base_url + url_path if url_path else None
+
+
+@st.cache_resource
+def get_content_store():
+    """Content store shared by every session in this server process"""
+    return ContentStore(CONTENT_DIR)
+
+
+def get_content():
+    """Current content, hot-reloading any chapter file edited since the last rerun"""
+    return get_content_store().refresh()
+
+
+@st.cache_resource(max_entries=2)
+def get_figure_texts(index_signature):
+    """(build time, {image name: text}) from ocr_index.py, shared and re-read only when the index file changes"""
+    return read_figure_texts(IMG_DIR)
+
+
+@st.cache_resource(max_entries=2)
+def get_search_index(content_version, figure_text_version, _content, _figure_texts):
+    """Search index over conditions, reference tables and figure text
+
+    Built once per content version and figure text index build.
+    """
+    return SearchIndex.build(_content["conditions"], _content["clinical_pearls"],
+                             _content["red_flags"], _content["lab_tests"],
+                             _content["treatments"], _figure_texts)
+
+
+def current_search_index(content):
+    """Search index for this content and the latest figure text index"""
+    figure_text_version, figure_texts = get_figure_texts(file_signature(ocr_index_path(IMG_DIR)))
+    return get_search_index(content["version"], figure_text_version, content, figure_texts)
+
+
+@st.cache_resource(max_entries=2)
+def get_differential_index(content_version, _content):
+    """Findings x conditions evidence index, built once per content version"""
+    return DifferentialIndex.build(_content["conditions"], _content["findings"],
+                                   _content["clinical_pearls"], _content["red_flags"])
+
+
+def category_style(content, category):
+    """CSS class for a category's condition cards"""
+    return content["categories"][category]["style"]
+
+
+@st.cache_resource(max_entries=2)
+def get_fragments(content_version, _content):
+    """Escaped HTML fragments, rendered once per content version"""
+    return build_fragments(_content)
+
+
+def current_fragments():
+    """Fragments for the content this rerun is rendering"""
+    content = get_content_store().current()
+    return get_fragments(content["version"], content)
+
+
+@st.cache_resource(max_entries=2)
+def get_condition_lookup(content_version, _content):
+    """(category, condition) by condition name and by figure file stem"""
+    lookup = {}
+    for category, conditions in _content["conditions"].items():
+        for condition in conditions:
+            lookup[condition.name] = (category, condition)
+            lookup[os.path.splitext(condition.image)[0]] = (category, condition)
+    return lookup
+
+
+@st.cache_resource
+def get_similarity_index():
+    """Visual similarity index prebuilt by similarity_index.py, shared by every session
+
+    Never built inside the server: a missing index just means no
+    similar-looking strip.
+    """
+    index = SimilarityIndex(IMG_DIR)
+    index.load()
+    return index
+
+
+def similar_figures(image_name, k=SIMILAR_FIGURES):
+    """[(image name, score)] of the figures that look most like image_name, [] if unavailable"""
+    try:
+        index = get_similarity_index()
+        index.refresh(build=False)
+        return index.similar(image_name, k)
+    except (OSError, ValueError):
+        return []
+
+
+@st.cache_resource
+def get_prefetcher():
+    """Background prefetcher shared by every session
+
+    With a static image server, warming means hashing the file (which also
+    pulls it into the OS page cache); otherwise loading it into the image cache.
+    """
+    static = get_static_images()
+    return Prefetcher(static[1].digest if static else get_image_cache().get)
+
+
+def prefetch_figures(purpose, image_names):
+    """Warm these figures for this session, replacing its earlier request for the same purpose"""
+    session = st.session_state.setdefault("prefetch_session", uuid.uuid4().hex)
+    get_prefetcher().schedule((session, purpose), rendition_paths(image_names))
+
+
+def prefetch_adjacent_pages(content, page_titles, page):
+    """Queue the first page of figures of the category pages next to `page` in the navigation"""
+    categories = {meta["title"]: key for key, meta in content["categories"].items()}
+    position = page_titles.index(page)
+    image_names = []
+    for neighbour in page_titles[max(position - 1, 0):position + 2]:
+        category = categories.get(neighbour)
+        if neighbour == page or category is None:
+            continue
+        for _, _, conditions in content["sections"][category]:
+            image_names += [c.image for c in conditions[:CARDS_PER_PAGE]]
+    prefetch_figures("navigation", image_names)
+
+
+@st.cache_resource
+def start_metrics():
+    """Register process gauges and start the configured exporters (once per process)"""
+    register_gauge("image_cache", lambda: get_image_cache().stats())
+    register_gauge("prefetch", lambda: get_prefetcher().stats())
+    return start_exporters_from_env()
+
+
+@st.cache_resource
+def get_review_store():
+    """Quiz review store shared by every session (one SQLite writer thread per process)"""
+    return ReviewStore()
+
+
+@st.cache_resource(max_entries=2)
+def get_quiz_deck(content_version, _content):
+    """{card_id: Card} quiz cards, built once per content version"""
+    return build_deck(_content)
+
+
+@st.cache_resource
+def get_classifier():
+    """Rash classifier shared by every session (None if no model is installed)"""
+    return load_batching_classifier()
 
 
 def display_condition(condition, category_style):
     """Display a single condition with image and features"""
-    st.markdown(f'<div class="condition-card {category_style}">', unsafe_allow_html=True)
+    with span("display_condition"):
+        fragments = current_fragments()
+        card_open = fragments["card_open"].get(category_style) or card_open_html(category_style)
+        st.markdown(card_open, unsafe_allow_html=True)
+        
+        col1, col2 = st.columns([1, 2])
+        
+        with col1:
+            img = image_source(condition.image)
+            if img:
+                st.image(img, use_container_width=True)
+                st.caption(condition.figure)
+                display_similar_strip(condition.image)
+        
+        with col2:
+            card = fragments["conditions"].get(condition) or condition_html(condition)
+            st.markdown(card, unsafe_allow_html=True)
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+
+
+def display_similar_strip(image_name):
+    """Thumbnails of the figures that look most like image_name"""
+    similar = similar_figures(image_name)
+    if not similar:
+        return
+    content = get_content_store().current()
+    lookup = get_condition_lookup(content["version"], content)
+    st.markdown("<small>Similar-looking:</small>", unsafe_allow_html=True)
+    for col, (name, _) in zip(st.columns(len(similar)), similar):
+        thumb = image_source(name, THUMBNAIL_WIDTH)
+        if thumb:
+            match = lookup.get(os.path.splitext(name)[0])
+            col.image(thumb, caption=match[1].name if match else name,
+                      use_container_width=True)
+
+
+def _set_page(key, page):
+    st.session_state[key] = page
+
+
+def paginate(items, key, per_page=CARDS_PER_PAGE):
+    """Items on the current page, with Previous/Next controls when there is more than one page"""
+    pages = max(1, -(-len(items) // per_page))
+    page = max(0, min(st.session_state.get(key, 0), pages - 1))
+    if pages > 1:
+        prev_col, label_col, next_col = st.columns([1, 2, 1])
+        prev_col.button("◀ Previous", key=f"{key}_prev", disabled=page == 0,
+                        on_click=_set_page, args=(key, page - 1))
+        label_col.markdown(f'<div style="text-align: center;">Page {page + 1} of {pages} '
+                           f'· {len(items)} entries</div>', unsafe_allow_html=True)
+        next_col.button("Next ▶", key=f"{key}_next", disabled=page == pages - 1,
+                        on_click=_set_page, args=(key, page + 1))
+    start = page * per_page
+    return items[start:start + per_page]
+
+
+def display_light_table(rows):
+    """Render a list of row dicts as a markdown table
+
+    Unlike st.table this doesn't pull pandas/pyarrow onto the cold-start path,
+    so the Overview page renders without loading them.
+    """
+    headers = list(rows[0])
+    lines = ["| " + " | ".join(headers) + " |", "|" + " --- |" * len(headers)]
+    for row in rows:
+        lines.append("| " + " | ".join(str(row[h]).replace("|", "\\|") for h in headers) + " |")
+    st.markdown("\n".join(lines))
+
+
+# Page bodies
+# Each is a fragment: widgets inside one rerun only that page's body, not the
+# CSS, header, sidebar or footer.
+
+@st.fragment
+def render_overview(content):
+    st.header("1. Key Diagnostic Questions")
+    st.markdown("Ask these questions when evaluating a neonatal rash:")
     
-    col1, col2 = st.columns([1, 2])
+    questions_df = [{
+        "Question": q[0],
+        "What to Assess": q[1],
+        "Clinical Significance": q[2]
+    } for q in content["diagnostic_questions"]]
+    display_light_table(questions_df)
     
-    with col1:
-        img = load_image(condition["image"])
-        if img:
-            st.image(img, use_container_width=True)
-            st.caption(condition["figure"])
+    st.header("2. Lesion Morphology Classification")
+    morphology_cols = st.columns(4)
+    tiles = get_fragments(content["version"], content)["morphology"]
+    for i, tile in enumerate(tiles):
+        with morphology_cols[i % 4]:
+            st.markdown(tile, unsafe_allow_html=True)
     
-    with col2:
-        st.markdown(f"### {condition['name']}")
-        for label, value in condition["features"]:
-            st.markdown(f"**{label}:** {value}")
+    st.header("3. Critical Point")
+    st.warning("🔴 Acyclovir is recommended early in cases of infants with a vesicular skin rash, even if the diagnosis of herpes is not confirmed. Early treatment significantly improves outcomes.")
+
+
+# Streamlit call for each category notice kind
+NOTICES = {"info": st.info, "success": st.success, "warning": st.warning, "error": st.error}
+
+
+@st.fragment
+def render_category(content, category):
+    """One category page: its notice, then each subgroup's cards"""
+    meta = content["categories"][category]
+    st.header(meta["header"])
+    if meta["notice"]:
+        kind, text = meta["notice"]
+        NOTICES[kind](text)
     
-    st.markdown('</div>', unsafe_allow_html=True)
+    for subgroup, title, conditions in content["sections"][category]:
+        if title:
+            st.subheader(title)
+        for condition in paginate(conditions, f"page_{category}_{subgroup or 'all'}"):
+            display_condition(condition, meta["style"])
+
+
+@st.fragment
+def render_quick_reference(content):
+    st.header("📖 Quick Reference")
+    
+    # Clinical Pearls
+    st.subheader("Clinical Pearls")
+    fragments = get_fragments(content["version"], content)
+    st.markdown(fragments["pearls"], unsafe_allow_html=True)
+    
+    # Red Flags
+    st.subheader("🚨 Red Flags - Immediate Action Required")
+    st.markdown(fragments["red_flags"], unsafe_allow_html=True)
+    
+    # Laboratory Studies
+    st.subheader("Laboratory Studies")
+    lab_df = [{
+        "Test": t[0],
+        "Indication": t[1],
+        "Findings": t[2]
+    } for t in content["lab_tests"]]
+    st.table(lab_df)
+    
+    # Treatment Summary
+    st.subheader("Treatment Summary")
+    treatment_df = [{
+        "Condition": t[0],
+        "Treatment": t[1]
+    } for t in content["treatments"]]
+    st.table(treatment_df)
+
+
+@st.fragment
+def render_search_all(content):
+    st.header("🔍 Search All Conditions")
+    
+    # Typing here reruns only this fragment
+    search = st.text_input("Enter search term:", value=st.session_state.get("search", ""))
+    
+    # A new query starts again from the first page of results
+    if st.session_state.get("search_results_for") != search:
+        st.session_state["search_results_for"] = search
+        for key in ("page_search_conditions", "page_search_reference", "page_search_names"):
+            st.session_state.pop(key, None)
+    
+    if search:
+        with span("search"):
+            hits = current_search_index(content).search(search)
+        condition_hits = [h for h in hits if h.document.kind == "condition"]
+        reference_hits = [h for h in hits if h.document.kind != "condition"]
+        
+        if hits:
+            st.success(f"Found {len(condition_hits)} matching conditions "
+                       f"and {len(reference_hits)} reference entries")
+            for hit in paginate(condition_hits, "page_search_conditions"):
+                st.caption(f"Matched {hit.field} ({hit.match})")
+                display_condition(hit.document.ref, category_style(content, hit.document.category))
+            
+            if reference_hits:
+                st.subheader("Reference Tables")
+                for hit in paginate(reference_hits, "page_search_reference", NAMES_PER_PAGE):
+                    row = hit.document.ref
+                    st.markdown(f"**{hit.document.kind.title()}: {row[0]}** → {' · '.join(row[1:])}")
+        else:
+            st.warning("No matching conditions found")
+    else:
+        st.info("Enter a search term to find conditions")
+        
+        # Show all conditions count
+        st.markdown(f"**Total conditions in database: {content['stats']['conditions']}**")
+        
+        # Show all conditions as a list, a page of names at a time
+        categories = content["categories"]
+        names = [(categories[category]["title"], c.name)
+                 for category, conditions in content["conditions"].items() for c in conditions]
+        counts = " · ".join(f"{categories[category]['title']}: {count}"
+                            for category, count in content["table"].counts("category").items())
+        st.caption(counts)
+        st.markdown("\n".join(f"- {name} *({category})*"
+                               for category, name in paginate(names, "page_search_names",
+                                                              NAMES_PER_PAGE)))
+
+
+@st.fragment
+def render_differential(content):
+    st.header("🩺 Differential Diagnosis")
+    st.info("Select the findings you see to rank the conditions in this guide that explain them.")
+    
+    index = get_differential_index(content["version"], content)
+    groups = index.groups()
+    selected = []
+    group_cols = st.columns(3)
+    for i, (group, labels) in enumerate(groups.items()):
+        with group_cols[i % 3]:
+            selected += st.multiselect(group, labels, key=f"findings_{group}")
+    
+    if not selected:
+        return
+    
+    for kind, row in index.guidance(selected):
+        if kind == "red flag":
+            st.error(f"🚨 **{row[0]}** → {row[1]}")
+        else:
+            st.info(f"💡 **{row[0]}** → {row[1]}")
+    
+    differential = index.query(selected)
+    if not differential:
+        st.warning("No conditions in this guide match these findings")
+        return
+    
+    st.subheader(f"Ranked Differential ({len(differential)})")
+    for rank, entry in enumerate(differential, start=1):
+        coverage = "all findings" if entry.complete else f"{len(entry.matched)} of {len(selected)} findings"
+        st.caption(f"#{rank} · explains {coverage}: {', '.join(entry.matched)}")
+        display_condition(entry.condition, category_style(content, entry.category))
+
+
+@st.fragment
+def render_photo_match(content):
+    st.header("📷 Identify from Photo")
+    st.info("Upload one or more photographs to rank the most similar conditions in this guide. This is a study aid, not a diagnostic tool.")
+    
+    classifier = get_classifier()
+    if classifier is None:
+        st.warning("No classifier model is installed. Train one with `train_classifier.py` and restart the app.")
+        return
+    
+    uploads = st.file_uploader("Upload photo(s)", type=["jpg", "jpeg", "png"],
+                               accept_multiple_files=True)
+    if not uploads:
+        return
+    top_k = st.slider("Matches per photo", 1, 5, 3)
+    
+    try:
+        results = classifier.classify([u.getvalue() for u in uploads], k=top_k)
+    except ClassifierBusy:
+        st.warning("The classifier is busy. Please try again in a moment.")
+        return
+    except ValueError as exc:
+        st.error(f"Could not read an uploaded image: {exc}")
+        return
+    
+    lookup = get_condition_lookup(content["version"], content)
+    for upload, matches in zip(uploads, results):
+        st.subheader(upload.name)
+        st.image(upload.getvalue(), width=320)
+        for rank, (label, probability) in enumerate(matches, start=1):
+            match = lookup.get(label)
+            if match is None:
+                continue
+            category, condition = match
+            st.caption(f"Match {rank}: {probability:.0%}")
+            display_condition(condition, category_style(content, category))
+
+
+@st.fragment
+def render_admin(content):
+    st.header("🛠️ Admin: Performance")
+    st.caption("Timings are shared by every session in this server process.")
+    
+    rows = [{
+        "Span": name,
+        "Count": count,
+        "Mean (ms)": f"{mean * 1000:.1f}",
+        "p50 (ms)": f"{p50 * 1000:.1f}",
+        "p95 (ms)": f"{p95 * 1000:.1f}",
+        "p99 (ms)": f"{p99 * 1000:.1f}",
+        "Max (ms)": f"{maximum * 1000:.1f}",
+    } for name, count, mean, p50, p95, p99, maximum in summary()]
+    if rows:
+        display_light_table(rows)
+    else:
+        st.info("No spans recorded yet. Browse a few pages first.")
+    
+    st.subheader("Image Cache")
+    display_light_table([get_image_cache().stats()])
+    prefetch_stats = get_prefetcher().stats()
+    if prefetch_stats:
+        st.caption("Prefetch: " + ", ".join(f"{k} {v}" for k, v in sorted(prefetch_stats.items())))
+    
+    exporters = start_metrics()
+    st.caption("Exporters: " + (", ".join(f"{k} = {v}" for k, v in exporters.items())
+                                or "none (set NEONATAL_METRICS_FILE or NEONATAL_METRICS_PORT)"))
+    st.download_button("Download Prometheus metrics", prometheus_text(),
+                       file_name="neonatal_metrics.prom", mime="text/plain")
+    
+    st.subheader("Sampling Profiler")
+    enabled = st.toggle("Profile script runs", value=PROFILER.running)
+    if enabled and not PROFILER.running:
+        PROFILER.start()
+    elif not enabled and PROFILER.running:
+        PROFILER.stop()
+    if st.button("Reset profile"):
+        PROFILER.reset()
+    st.caption(f"{PROFILER.samples} samples every {PROFILER.interval * 1000:.0f} ms")
+    top = PROFILER.top_functions()
+    if top:
+        display_light_table([{"Function": f, "Samples": n} for f, n in top])
+        st.download_button("Download collapsed stacks", PROFILER.collapsed(),
+                           file_name="neonatal_profile.folded", mime="text/plain")
+
+
+def _reveal_card(card_id):
+    st.session_state["quiz_revealed"] = card_id
+
+
+def _grade_card(user, state, quality):
+    get_review_store().record(user, schedule(state, quality))
+    st.session_state.pop("quiz_revealed", None)
+
+
+@st.fragment
+def render_quiz(content):
+    st.header("🧠 Quiz")
+    st.info("Spaced repetition: cards you find hard come back sooner, easy ones later.")
+    
+    user = st.text_input("Your name (keeps your review schedule):", key="quiz_user").strip()
+    if not user:
+        return
+    
+    store = get_review_store()
+    deck = get_quiz_deck(content["version"], content)
+    if st.session_state.get("quiz_enrolled") != (user, content["version"]):
+        store.enroll(user, deck)
+        st.session_state["quiz_enrolled"] = (user, content["version"])
+    
+    due, total = store.counts(user)
+    st.caption(f"{due} of {total} cards due")
+    
+    # Cards of removed content may still be scheduled; skip them
+    state = next((s for s in store.due_cards(user, limit=10) if s.card_id in deck), None)
+    if state is None:
+        next_due = store.next_due_time(user)
+        if next_due is not None:
+            minutes = max(1, round((next_due - time.time()) / 60))
+            st.success(f"All caught up! Next card due in about {minutes} minutes.")
+        else:
+            st.success("All caught up!")
+        return
+    
+    card = deck[state.card_id]
+    if card.image:
+        src = image_source(card.image)
+        if src:
+            st.image(src, width=400)
+    if card.prompt:
+        st.markdown(f"### {card.prompt}")
+    st.markdown(f"**{QUESTIONS[card.kind]}**")
+    
+    if st.session_state.get("quiz_revealed") != card.card_id:
+        st.button("Show answer", on_click=_reveal_card, args=(card.card_id,))
+        return
+    
+    st.success(card.answer)
+    for col, (label, quality) in zip(st.columns(len(GRADES)), GRADES.items()):
+        col.button(label, key=f"grade_{label}", on_click=_grade_card,
+                   args=(user, state, quality), use_container_width=True)
+
+
+# Pages after the generated category pages
+TOOL_PAGES = {
+    "Quick Reference": render_quick_reference,
+    "Search All": render_search_all,
+    "Differential Diagnosis": render_differential,
+    "Identify from Photo": render_photo_match,
+    "Quiz": render_quiz,
+}
+if ADMIN_ENABLED:
+    TOOL_PAGES["Admin"] = render_admin
+
+
+def _category_page(category):
+    return lambda content: render_category(content, category)
+
+
+@st.cache_resource(max_entries=2)
+def get_pages(content_version, _content):
+    """Navigation for a content version: Overview, one page per category, then the tools"""
+    pages = {"Overview": render_overview}
+    for key, meta in _content["categories"].items():
+        pages[meta["title"]] = _category_page(key)
+    pages.update(TOOL_PAGES)
+    return pages
+
+
+def _on_sidebar_search():
+    st.session_state["sidebar_search_changed"] = True
+
+
+@st.fragment
+def render_sidebar_search(content, page):
+    """Sidebar search box; keystrokes rerun only this fragment unless Search All is open"""
+    st.markdown("### 🔍 Quick Search")
+    search = st.text_input("Search conditions...", key="search", on_change=_on_sidebar_search)
+    if not st.session_state.pop("sidebar_search_changed", False):
+        return
+    if page == "Search All":
+        st.rerun(scope="app")
+    elif search:
+        # Warm the top hits' figures before the user opens Search All
+        hits = current_search_index(content).search(search, kinds=("condition",),
+                                                                    limit=PREFETCH_SEARCH_HITS)
+        prefetch_figures("search", [hit.document.ref.image for hit in hits])
 
 
 # Main App
 def main():
+    start_metrics()
+    with span("rerun"):
+        render_app()
+
+
+def render_app():
+    """Header, navigation, the selected page and footer"""
+    content = get_content()
+    try:
+        get_static_images()
+    except ValueError as exc:
+        st.error(str(exc))
+        st.stop()
+    problems = get_image_problems(content["version"], file_signature(manifest_path(IMG_DIR)), content)
+    if problems:
+        # A broken deployment: stop here rather than render cards without figures
+        st.error(f"{len(problems)} referenced images failed validation in {IMG_DIR}. "
+                 "Fix them and run `python validate_images.py` (add `--accept-changes` "
+                 "for images you replaced on purpose).")
+        st.code("\n".join(problems))
+        st.stop()
+    pages = get_pages(content["version"], content)
+    fragments = get_fragments(content["version"], content)
+    
     # Header
-    st.markdown("""
-    <div class="main-header">
-        <h1 style="color: white; margin: 0;">👶 Neonatal Rash and Dermatologic Problems</h1>
-        <p style="color: #bfdbfe; margin: 0.5rem 0 0 0;">Study Guide with Clinical Photographs - Based on Gomella's Neonatology, Chapter 80</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(fragments["header"], unsafe_allow_html=True)
+    for error in content["errors"]:
+        st.warning(f"A chapter file failed to load; showing its last good version, if any. {error}")
     
     # Sidebar navigation
     st.sidebar.title("📚 Navigation")
     page = st.sidebar.radio(
         "Go to:",
-        ["Overview", "Benign Rashes", "Infectious Rashes", "Other Conditions", 
-         "Malignant Risk", "Quick Reference", "Search All"],
+        list(pages),
         label_visibility="collapsed"
     )
     
     # Search in sidebar
     st.sidebar.markdown("---")
-    st.sidebar.markdown("### 🔍 Quick Search")
-    search_term = st.sidebar.text_input("Search conditions...", key="search")
+    with st.sidebar:
+        render_sidebar_search(content, page)
     
-    # Overview Page
-    if page == "Overview":
-        st.header("1. Key Diagnostic Questions")
-        st.markdown("Ask these questions when evaluating a neonatal rash:")
-        
-        questions_df = [{
-            "Question": q[0],
-            "What to Assess": q[1],
-            "Clinical Significance": q[2]
-        } for q in DIAGNOSTIC_QUESTIONS]
-        st.table(questions_df)
-        
-        st.header("2. Lesion Morphology Classification")
-        morphology_cols = st.columns(4)
-        for i, (term, size, desc) in enumerate(LESION_MORPHOLOGY):
-            with morphology_cols[i % 4]:
-                st.markdown(f"""
-                <div style="background: white; padding: 1rem; border-radius: 0.5rem; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
-                    <h4 style="color: #1e40af; margin: 0;">{term}</h4>
-                    <p style="color: #6b7280; font-size: 0.875rem; margin: 0.25rem 0;">{size}</p>
-                    <p style="margin: 0;">{desc}</p>
-                </div>
-                """, unsafe_allow_html=True)
-        
-        st.header("3. Critical Point")
-        st.warning("🔴 Acyclovir is recommended early in cases of infants with a vesicular skin rash, even if the diagnosis of herpes is not confirmed. Early treatment significantly improves outcomes.")
-    
-    # Benign Rashes Page
-    elif page == "Benign Rashes":
-        st.header("🌿 Benign Skin Disorders")
-        st.info("These rashes are very common in newborns and typically resolve spontaneously without intervention. Recognition helps avoid unnecessary testing.")
-        
-        for condition in CONDITIONS["benign"]:
-            display_condition(condition, "benign")
-    
-    # Infectious Rashes Page
-    elif page == "Infectious Rashes":
-        st.header("🦠 Infectious Causes of Rashes")
-        st.error("These typically require intervention. Common pathogens: *S. aureus*, *Streptococcus*, *Candida albicans*, and HSV.")
-        
-        for condition in CONDITIONS["infectious"]:
-            display_condition(condition, "infectious")
-    
-    # Other Conditions Page
-    elif page == "Other Conditions":
-        st.header("⚠️ Other Conditions")
-        
-        st.subheader("Scaling & Blistering Rashes")
-        for condition in CONDITIONS["other"][:4]:
-            display_condition(condition, "serious")
-        
-        st.subheader("Vascular Birthmarks & Serious Lesions")
-        for condition in CONDITIONS["other"][4:]:
-            display_condition(condition, "serious")
-    
-    # Malignant Risk Page
-    elif page == "Malignant Risk":
-        st.header("⚠️ Conditions with Malignant Transformation Risk")
-        st.warning("These lesions require close monitoring and may need surgical intervention.")
-        
-        for condition in CONDITIONS["malignant"]:
-            display_condition(condition, "malignant")
-    
-    # Quick Reference Page
-    elif page == "Quick Reference":
-        st.header("📖 Quick Reference")
-        
-        # Clinical Pearls
-        st.subheader("Clinical Pearls")
-        for finding, diagnosis in CLINICAL_PEARLS:
-            st.markdown(f"""
-            <div class="pearl-box">
-                <strong>{finding}</strong><br/>
-                → {diagnosis}
-            </div>
-            """, unsafe_allow_html=True)
-        
-        # Red Flags
-        st.subheader("🚨 Red Flags - Immediate Action Required")
-        for flag, action in RED_FLAGS:
-            st.markdown(f"""
-            <div class="red-flag">
-                <strong>⚠️ {flag}</strong><br/>
-                <span style="color: #dc2626;">→ {action}</span>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        # Laboratory Studies
-        st.subheader("Laboratory Studies")
-        lab_df = [{
-            "Test": t[0],
-            "Indication": t[1],
-            "Findings": t[2]
-        } for t in LAB_TESTS]
-        st.table(lab_df)
-        
-        # Treatment Summary
-        st.subheader("Treatment Summary")
-        treatment_df = [{
-            "Condition": t[0],
-            "Treatment": t[1]
-        } for t in TREATMENTS]
-        st.table(treatment_df)
-    
-    # Search All Page
-    elif page == "Search All":
-        st.header("🔍 Search All Conditions")
-        
-        search = st.text_input("Enter search term:", value=search_term)
-        
-        if search:
-            results = []
-            for category, conditions in CONDITIONS.items():
-                for condition in conditions:
-                    # Search in name and features
-                    if (search.lower() in condition["name"].lower() or
-                        any(search.lower() in f[1].lower() for f in condition["features"])):
-                        results.append((category, condition))
-            
-            if results:
-                st.success(f"Found {len(results)} matching conditions")
-                for category, condition in results:
-                    display_condition(condition, category)
-            else:
-                st.warning("No matching conditions found")
-        else:
-            st.info("Enter a search term to find conditions")
-            
-            # Show all conditions count
-            total = sum(len(c) for c in CONDITIONS.values())
-            st.markdown(f"**Total conditions in database: {total}**")
-            
-            # Show all conditions as a list
-            for category, conditions in CONDITIONS.items():
-                st.markdown(f"**{category.title()} ({len(conditions)} conditions)**")
-                for condition in conditions:
-                    st.markdown(f"- {condition['name']}")
+    with span(f"page: {page}"):
+        pages[page](content)
+    prefetch_adjacent_pages(content, list(pages), page)
     
     # Footer
     st.markdown("---")
-    st.markdown("""
-    <div style="text-align: center; color: #6b7280;">
-        <p>Neonatal Dermatology Study Guide - Based on Gomella's Neonatology, Chapter 80</p>
-        <p style="font-size: 0.875rem;">21 Clinical Photographs • All Information Preserved</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(fragments["footer"], unsafe_allow_html=True)
 
 
 if __name__ == "__main__":
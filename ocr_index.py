@@ -0,0 +1,234 @@
+"""
+Figure text index
+Extracts the labels, arrows-with-captions and other annotations burned into
+the photographs (OCR with Tesseract after OpenCV clean-up) plus any caption
+stored in the image metadata, so search can match text that only appears in
+a figure. Results live in <IMG_DIR>/ocr/index.json keyed by file content
+hash: an image is only re-read when its mtime or size changes, and only
+re-OCR'd when its content actually changed (a renamed or touched file reuses
+its text). New images are processed in parallel on a process pool.
+
+Needs the pytesseract package and the tesseract binary for building; the app
+only reads the index and searches without figure text if there is none.
+
+Usage: python ocr_index.py [--image-dir DIR] [--workers N] [--force]
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from images import IMG_DIR, file_digest, list_images
+from lazy_imports import cv2, lazy_module
+
+OCR_SUBDIR = "ocr"
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+
+# Tesseract: sparse text (labels scattered over a photo), English
+TESSERACT_CONFIG = "--psm 11 --oem 1"
+TESSERACT_LANG = "eng"
+
+# Words below this confidence (0-100) are photo texture, not text
+MIN_CONFIDENCE = 70
+
+# Upscale so the shorter side is at least this many pixels before OCR
+MIN_OCR_SIDE = 1200
+
+# Fan out to a process pool once this many images need OCR
+PARALLEL_THRESHOLD = 4
+
+# EXIF ImageDescription, and PNG text chunks that carry captions
+EXIF_DESCRIPTION = 0x010E
+CAPTION_KEYS = ("Description", "Title", "Comment", "Caption")
+
+WORD_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9.%/+-]*")
+
+
+def preprocess(image):
+    """Grayscale, upscaled, denoised binary images of both polarities for OCR
+
+    Annotations are dark-on-light as often as light-on-dark, so Tesseract
+    (which expects dark text) gets the Otsu-thresholded image and its inverse.
+    """
+    cv = cv2()
+    gray = cv.cvtColor(image, cv.COLOR_BGR2GRAY)
+    scale = MIN_OCR_SIDE / min(gray.shape[:2])
+    if scale > 1:
+        gray = cv.resize(gray, None, fx=scale, fy=scale, interpolation=cv.INTER_CUBIC)
+    gray = cv.medianBlur(gray, 3)
+    _, binary = cv.threshold(gray, 0, 255, cv.THRESH_BINARY + cv.THRESH_OTSU)
+    return binary, cv.bitwise_not(binary)
+
+
+def ocr_words(binary):
+    """Confident words Tesseract reads in one binary image, in reading order"""
+    pytesseract = lazy_module("pytesseract")
+    data = pytesseract.image_to_data(binary, lang=TESSERACT_LANG, config=TESSERACT_CONFIG,
+                                     output_type=pytesseract.Output.DICT)
+    words = []
+    for text, confidence in zip(data["text"], data["conf"]):
+        text = text.strip()
+        if float(confidence) >= MIN_CONFIDENCE and WORD_RE.fullmatch(text) and len(text) > 1:
+            words.append(text)
+    return words
+
+
+def metadata_caption(image_path):
+    """Caption embedded in the file (EXIF description or PNG text), or ''"""
+    from PIL import Image
+
+    with Image.open(image_path) as image:
+        captions = [image.getexif().get(EXIF_DESCRIPTION)]
+        captions += [image.info.get(key) for key in CAPTION_KEYS]
+    seen = []
+    for caption in captions:
+        if isinstance(caption, bytes):
+            caption = caption.decode("utf-8", "replace")
+        if isinstance(caption, str) and caption.strip() and caption.strip() not in seen:
+            seen.append(caption.strip())
+    return " ".join(seen)
+
+
+def figure_text(image_path):
+    """Metadata caption plus OCR'd annotation words for one image"""
+    cv = cv2()
+    image = cv.imread(image_path, cv.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"Could not decode {image_path}")
+    words = []
+    for binary in preprocess(image):
+        for word in ocr_words(binary):
+            if word not in words:
+                words.append(word)
+    return " ".join(filter(None, [metadata_caption(image_path), " ".join(words)]))
+
+
+def _extract(image_path):
+    """(text, None) or (None, error message); one bad file must not stop the run"""
+    try:
+        return figure_text(image_path), None
+    except (OSError, ValueError, RuntimeError) as exc:
+        return None, str(exc)
+
+
+def index_path(image_dir=IMG_DIR):
+    return os.path.join(image_dir, OCR_SUBDIR, INDEX_FILE)
+
+
+class OcrIndex:
+    """Image name -> content hash -> extracted text, persisted as JSON"""
+
+    def __init__(self, image_dir=IMG_DIR):
+        self.image_dir = image_dir
+        self.path = index_path(image_dir)
+        self.files = {}   # image name -> [mtime_ns, size, sha256]
+        self.texts = {}   # sha256 -> text
+        self.built_at = None
+
+    def load(self):
+        """Read the on-disk index; returns False if it is missing or from another version"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if meta.get("version") != INDEX_VERSION:
+            return False
+        self.files, self.texts, self.built_at = meta["files"], meta["texts"], meta["built_at"]
+        return True
+
+    def figure_texts(self):
+        """{image name: text} for every indexed image with any text"""
+        texts = {}
+        for name, (_, _, digest) in self.files.items():
+            text = self.texts.get(digest)
+            if text:
+                texts[name] = text
+        return texts
+
+    def update(self, workers=None, force=False):
+        """Bring the index up to date with image_dir
+
+        Returns (images OCR'd, images reused, {image name: error}).
+        """
+        self.load()
+        current = list_images(self.image_dir)
+
+        # Hash only files whose mtime or size changed
+        files = {}
+        for name, (mtime_ns, size) in current.items():
+            known = self.files.get(name)
+            if known and tuple(known[:2]) == (mtime_ns, size):
+                files[name] = known
+            else:
+                files[name] = [mtime_ns, size, file_digest(os.path.join(self.image_dir, name))]
+
+        # OCR each new content hash once, whatever it is named
+        pending = {}
+        for name, (_, _, digest) in sorted(files.items()):
+            if (force or digest not in self.texts) and digest not in pending:
+                pending[digest] = os.path.join(self.image_dir, name)
+        paths = list(pending.values())
+        if paths:
+            # Fail once here, not once per image, if the tesseract binary is missing
+            lazy_module("pytesseract").get_tesseract_version()
+        if len(paths) >= PARALLEL_THRESHOLD:
+            with ProcessPoolExecutor(workers) as pool:
+                results = list(pool.map(_extract, paths))
+        else:
+            results = [_extract(p) for p in paths]
+
+        live = {digest for _, _, digest in files.values()}
+        texts = {d: t for d, t in self.texts.items() if d in live}
+        errors = {}
+        for (digest, path), (text, error) in zip(pending.items(), results):
+            if error is None:
+                texts[digest] = text
+            else:
+                errors[os.path.basename(path)] = error
+                texts.pop(digest, None)
+
+        self.files, self.texts, self.built_at = files, texts, time.time()
+        self._write()
+        return len(paths) - len(errors), len(files) - len(paths), errors
+
+    def _write(self):
+        """Write the index via an atomic rename"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "built_at": self.built_at,
+                       "files": self.files, "texts": self.texts}, f)
+        os.replace(tmp_path, self.path)
+
+
+def read_figure_texts(image_dir=IMG_DIR):
+    """(build time, {image name: text}) from the index, or (None, {}) if it hasn't been built"""
+    index = OcrIndex(image_dir)
+    if not index.load():
+        return None, {}
+    return index.built_at, index.figure_texts()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or update the figure text (OCR) index")
+    parser.add_argument("--image-dir", default=IMG_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="re-OCR every image")
+    args = parser.parse_args(argv)
+
+    index = OcrIndex(args.image_dir)
+    computed, reused, errors = index.update(args.workers, args.force)
+    for name, error in sorted(errors.items()):
+        print(f"  skipped {name}: {error}")
+    with_text = len(index.figure_texts())
+    print(f"Indexed {len(index.files)} images ({computed} OCR'd, {reused} reused, "
+          f"{len(errors)} failed); {with_text} have text")
+
+
+if __name__ == "__main__":
+    main()
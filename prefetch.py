@@ -0,0 +1,76 @@
+"""
+Background prefetcher
+Warms a cache (the image cache, or the static server's content hashes) for
+what a session is likely to open next while it reads the current page.
+Concurrency and queue length are bounded, and each new schedule() call for
+the same owner cancels that owner's queued work: once the user navigates
+away, the old page's prefetches are dropped instead of competing with the
+new page's reads.
+"""
+
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+PREFETCH_WORKERS = 4
+PREFETCH_MAX_QUEUED = 64
+
+# Owners (session + purpose) remembered for cancellation; the oldest are forgotten
+MAX_OWNERS = 10000
+
+
+class Prefetcher:
+    """Runs fetch(item) on a small thread pool, newest request per owner wins"""
+
+    def __init__(self, fetch, workers=PREFETCH_WORKERS, max_queued=PREFETCH_MAX_QUEUED):
+        self.fetch = fetch
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="prefetch")
+        self._slots = threading.BoundedSemaphore(max_queued)
+        self._owners = OrderedDict()  # owner -> (generation, [futures])
+        self._lock = threading.Lock()
+        self._stats = Counter()
+
+    def schedule(self, owner, items):
+        """Cancel owner's queued prefetches and queue `items` instead
+
+        Items that don't fit in the queue are dropped; prefetching is only
+        ever an optimization.
+        """
+        with self._lock:
+            generation, futures = self._owners.pop(owner, (0, []))
+            for future in futures:
+                if future.cancel():
+                    self._slots.release()
+                    self._stats["cancelled"] += 1
+            generation += 1
+            futures = []
+            # Registered before submitting, so workers that start right away see it
+            self._owners[owner] = (generation, futures)
+            for item in dict.fromkeys(items):
+                if not self._slots.acquire(blocking=False):
+                    self._stats["dropped"] += 1
+                    continue
+                futures.append(self._pool.submit(self._run, owner, generation, item))
+            while len(self._owners) > MAX_OWNERS:
+                self._owners.popitem(last=False)
+
+    def _run(self, owner, generation, item):
+        try:
+            # Superseded after it was picked up but before it started
+            current = self._owners.get(owner)
+            if current is None or current[0] != generation:
+                outcome = "skipped"
+            else:
+                self.fetch(item)
+                outcome = "fetched"
+        except Exception:
+            outcome = "failed"
+        finally:
+            self._slots.release()
+        with self._lock:
+            self._stats[outcome] += 1
+
+    def stats(self):
+        """Counts of fetched, cancelled, skipped, dropped and failed prefetches"""
+        with self._lock:
+            return dict(self._stats)
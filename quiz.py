@@ -0,0 +1,306 @@
+"""
+Spaced-repetition quiz
+Builds flashcards from the content (figure -> diagnosis, pearl finding ->
+condition, red flag -> action) and schedules them per learner with SM-2.
+Review state lives in SQLite in WAL mode: reads use a small connection pool
+and never block on writes, and every write goes through one writer thread
+that commits in batches. An index on (user, due) makes "next due card" a
+B-tree seek however many cards a learner has reviewed.
+"""
+
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+DB_PATH = os.environ.get(
+    "NEONATAL_QUIZ_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "quiz.sqlite3"))
+
+# SM-2 parameters
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+DAY_S = 86400
+RELEARN_DELAY_S = 600  # a failed card comes back after 10 minutes
+
+# Question shown under each kind of card's prompt
+QUESTIONS = {
+    "figure": "What is the diagnosis?",
+    "pearl": "Which condition does this finding point to?",
+    "red flag": "What is the next step?",
+}
+
+# Answer buttons: label -> SM-2 quality (0-5)
+GRADES = {"Again": 1, "Hard": 3, "Good": 4, "Easy": 5}
+
+# Writer batching
+WRITE_BATCH = 256
+WRITE_WAIT_S = 0.05
+READ_CONNECTIONS = 8
+
+Card = namedtuple("Card", ["card_id", "kind", "prompt", "answer", "image", "category"])
+
+# Scheduling state of one card for one learner
+ReviewState = namedtuple("ReviewState", ["card_id", "repetitions", "interval_days", "ease", "due"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    user TEXT NOT NULL,
+    card TEXT NOT NULL,
+    repetitions INTEGER NOT NULL,
+    interval_days REAL NOT NULL,
+    ease REAL NOT NULL,
+    due REAL NOT NULL,
+    reviewed_at REAL,
+    PRIMARY KEY (user, card)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS reviews_user_due ON reviews (user, due);
+"""
+
+UPSERT_SQL = """
+INSERT INTO reviews (user, card, repetitions, interval_days, ease, due, reviewed_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (user, card) DO UPDATE SET
+    repetitions = excluded.repetitions, interval_days = excluded.interval_days,
+    ease = excluded.ease, due = excluded.due, reviewed_at = excluded.reviewed_at
+"""
+
+ENROLL_SQL = """
+INSERT OR IGNORE INTO reviews (user, card, repetitions, interval_days, ease, due, reviewed_at)
+VALUES (?, ?, 0, 0, ?, ?, NULL)
+"""
+
+EXISTS_SQL = "SELECT 1 FROM reviews WHERE user = ? AND card = ?"
+
+
+def _card_id(kind, text):
+    return f"{kind}:{hashlib.sha1(text.encode()).hexdigest()[:12]}"
+
+
+def build_deck(content):
+    """{card_id: Card} for every condition figure, clinical pearl and red flag"""
+    deck = {}
+    for category, conditions in content["conditions"].items():
+        for condition in conditions:
+            card = Card(_card_id("figure", condition.image), "figure", "",
+                        condition.name, condition.image, category)
+            deck[card.card_id] = card
+    for finding, diagnosis in content["clinical_pearls"]:
+        card = Card(_card_id("pearl", finding), "pearl", finding, diagnosis, None, None)
+        deck[card.card_id] = card
+    for flag, action in content["red_flags"]:
+        card = Card(_card_id("red flag", flag), "red flag", flag, action, None, None)
+        deck[card.card_id] = card
+    return deck
+
+
+def schedule(state, quality, now=None):
+    """SM-2: the state after answering with quality 0-5"""
+    now = time.time() if now is None else now
+    ease = max(MIN_EASE, state.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    if quality < 3:
+        return ReviewState(state.card_id, 0, 0, ease, now + RELEARN_DELAY_S)
+    if state.repetitions == 0:
+        interval = 1
+    elif state.repetitions == 1:
+        interval = 6
+    else:
+        interval = round(state.interval_days * state.ease)
+    return ReviewState(state.card_id, state.repetitions + 1, interval, ease, now + interval * DAY_S)
+
+
+class ReviewStore:
+    """Per-learner review state in SQLite (WAL), with writes batched on one thread"""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        self._writes = queue.Queue()
+        self._pending = {}  # (user, card) -> ReviewState not yet committed
+        self._pending_lock = threading.Lock()
+        self._totals = {}  # user -> committed row count, loaded on first use
+        self._totals_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write_loop, name="quiz-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints, safe with WAL
+        return conn
+
+    @contextmanager
+    def _reader(self):
+        """Borrow a read connection from the pool, opening one if under the limit"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._reader_lock:
+                can_open = self._reader_count < READ_CONNECTIONS
+                if can_open:
+                    self._reader_count += 1
+            conn = self._connect() if can_open else self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    # Writes
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batch = [self._writes.get()]
+            deadline = time.monotonic() + WRITE_WAIT_S
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self._writes.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            # Totals are bumped under the same lock as the commit, so a total
+            # loaded concurrently never counts the batch twice
+            with self._totals_lock:
+                inserted = {}
+                try:
+                    with conn:  # one transaction per batch
+                        for sql, rows, _ in batch:
+                            if sql:
+                                inserted[rows[0][0]] = (inserted.get(rows[0][0], 0)
+                                                        + self._apply(conn, sql, rows))
+                    committed = True
+                except sqlite3.Error:
+                    # Keep the states pending so this process still serves them
+                    committed = False
+                if committed:
+                    for user, count in inserted.items():
+                        if user in self._totals:
+                            self._totals[user] += count
+            for sql, rows, done in batch:
+                if committed and sql == UPSERT_SQL:
+                    self._clear_pending(rows)
+                if done is not None:
+                    done.set()
+
+    def _apply(self, conn, sql, rows):
+        """Run one queued write (rows of a single learner); returns the rows it inserted"""
+        if sql == UPSERT_SQL:
+            new = sum(conn.execute(EXISTS_SQL, row[:2]).fetchone() is None for row in rows)
+            conn.executemany(sql, rows)
+            return new
+        return conn.executemany(sql, rows).rowcount
+
+    def _clear_pending(self, rows):
+        with self._pending_lock:
+            for user, card, _, _, _, due, _ in rows:
+                state = self._pending.get((user, card))
+                if state is not None and state.due == due:
+                    del self._pending[(user, card)]
+
+    def enroll(self, user, card_ids, now=None):
+        """Add cards the learner has never seen, due now in deck order (blocks until stored)"""
+        now = time.time() if now is None else now
+        card_ids = list(card_ids)
+        rows = [(user, card_id, INITIAL_EASE, now - (len(card_ids) - i) * 1e-6)
+                for i, card_id in enumerate(card_ids)]
+        done = threading.Event()
+        self._writes.put((ENROLL_SQL, rows, done))
+        done.wait()
+
+    def record(self, user, state, now=None):
+        """Queue a new scheduling state; visible to this store's reads immediately"""
+        now = time.time() if now is None else now
+        with self._pending_lock:
+            self._pending[(user, state.card_id)] = state
+        row = (user, state.card_id, state.repetitions, state.interval_days, state.ease,
+               state.due, now)
+        self._writes.put((UPSERT_SQL, [row], None))
+
+    def flush(self):
+        """Block until every queued write is committed"""
+        done = threading.Event()
+        self._writes.put((None, [], done))
+        done.wait()
+
+    # Reads
+
+    def _earliest(self, user, until, limit):
+        """The learner's first `limit` cards by due time (up to `until`), pending writes applied"""
+        with self._pending_lock:
+            pending = {card: s for (u, card), s in self._pending.items() if u == user}
+        with self._reader() as conn:
+            # Over-fetch by the pending count: those rows may have moved later
+            rows = conn.execute(
+                "SELECT card, repetitions, interval_days, ease, due FROM reviews "
+                "WHERE user = ? AND due <= ? ORDER BY due LIMIT ?",
+                (user, until, limit + len(pending))).fetchall()
+        states = {row[0]: ReviewState(*row) for row in rows}
+        states.update(pending)
+        return sorted((s for s in states.values() if s.due <= until), key=lambda s: s.due)[:limit]
+
+    def due_cards(self, user, now=None, limit=1):
+        """[ReviewState] due at `now`, most overdue first"""
+        return self._earliest(user, time.time() if now is None else now, limit)
+
+    def state(self, user, card_id):
+        """Current ReviewState of one card, or None if not enrolled"""
+        with self._pending_lock:
+            pending = self._pending.get((user, card_id))
+        if pending is not None:
+            return pending
+        with self._reader() as conn:
+            row = conn.execute(
+                "SELECT card, repetitions, interval_days, ease, due FROM reviews "
+                "WHERE user = ? AND card = ?", (user, card_id)).fetchone()
+        return ReviewState(*row) if row else None
+
+    def next_due_time(self, user):
+        """Timestamp of the learner's next scheduled card, or None"""
+        earliest = self._earliest(user, float("inf"), 1)
+        return earliest[0].due if earliest else None
+
+    def _enrolled(self, user, conn):
+        """Committed row count for the learner: counted once, then kept by the writer"""
+        with self._totals_lock:
+            total = self._totals.get(user)
+            if total is None:
+                total = self._totals[user] = conn.execute(
+                    "SELECT COUNT(*) FROM reviews WHERE user = ?", (user,)).fetchone()[0]
+        return total
+
+    def counts(self, user, now=None):
+        """(cards due now, cards enrolled) for the learner
+
+        The due count is a range scan of the (user, due) index; the enrolled
+        total is a counter this store keeps, not a scan of the learner's rows.
+        """
+        now = time.time() if now is None else now
+        with self._pending_lock:
+            pending = {card: s for (u, card), s in self._pending.items() if u == user}
+        with self._reader() as conn:
+            total = self._enrolled(user, conn)
+            due = conn.execute("SELECT COUNT(*) FROM reviews WHERE user = ? AND due <= ?",
+                               (user, now)).fetchone()[0]
+            committed = {}
+            if pending:
+                placeholders = ", ".join("?" * len(pending))
+                committed = dict(conn.execute(
+                    f"SELECT card, due FROM reviews WHERE user = ? AND card IN ({placeholders})",
+                    (user, *pending)).fetchall())
+        # Correct for states still queued behind the writer
+        for card, state in pending.items():
+            if card not in committed:
+                total += 1
+            elif committed[card] <= now:
+                due -= 1
+            due += state.due <= now
+        return due, total
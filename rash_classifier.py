@@ -0,0 +1,192 @@
+"""
+On-device CPU rash classifier
+Runs a quantized TensorFlow Lite image model over uploaded photos and ranks
+the guide's conditions. One interpreter is loaded per process and owned by a
+worker thread that batches requests from concurrent sessions through a
+bounded queue.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from lazy_imports import cv2, numpy, tensorflow
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.environ.get(
+    "NEONATAL_CLASSIFIER_MODEL", os.path.join(APP_DIR, "models", "rash_classifier.tflite"))
+
+# Batching defaults: at most BATCH_SIZE images per invoke, waiting at most
+# MAX_WAIT_MS for a batch to fill once the first request arrives
+BATCH_SIZE = 8
+MAX_WAIT_MS = 10
+QUEUE_SIZE = 64
+
+
+class ClassifierBusy(RuntimeError):
+    """The request queue is full or a request timed out; the caller should retry shortly"""
+
+
+def labels_path(model_path):
+    """Labels file written next to the model by train_classifier.py"""
+    return os.path.splitext(model_path)[0] + ".labels.json"
+
+
+def _interpreter_class():
+    """Prefer the standalone TFLite runtime; fall back to TensorFlow's"""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        return tensorflow().lite.Interpreter
+
+
+class RashClassifier:
+    """A TFLite model and its condition labels; not thread-safe on its own"""
+
+    def __init__(self, model_path=MODEL_PATH, num_threads=None, batch_size=BATCH_SIZE):
+        with open(labels_path(model_path), encoding="utf-8") as f:
+            self.labels = json.load(f)
+
+        self.interpreter = _interpreter_class()(
+            model_path=model_path, num_threads=num_threads or os.cpu_count())
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.height, self.width = self.input["shape"][1:3]
+        # Allocated once: smaller batches are zero-padded, larger ones split
+        self.batch_size = batch_size
+        self.interpreter.resize_tensor_input(
+            self.input["index"], [batch_size, self.height, self.width, 3])
+        self.interpreter.allocate_tensors()
+
+    def preprocess(self, image_bytes):
+        """Decode, resize and (if needed) quantize one image to the model's input"""
+        np = numpy()
+        cv = cv2()
+        image = cv.imdecode(np.frombuffer(image_bytes, np.uint8), cv.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("Could not decode image")
+        image = cv.cvtColor(image, cv.COLOR_BGR2RGB)
+        image = cv.resize(image, (int(self.width), int(self.height)),
+                          interpolation=cv.INTER_AREA)
+
+        dtype = self.input["dtype"]
+        if dtype == np.float32:
+            return image.astype(np.float32) / 255.0
+        # Quantized input: map [0, 1] floats through the tensor's scale/zero point
+        scale, zero_point = self.input["quantization"]
+        if not scale:
+            return image.astype(dtype)
+        info = np.iinfo(dtype)
+        quantized = np.round(image.astype(np.float32) / 255.0 / scale + zero_point)
+        return np.clip(quantized, info.min, info.max).astype(dtype)
+
+    def predict(self, inputs):
+        """Class probabilities for a list of preprocessed images"""
+        np = numpy()
+        if len(inputs) > self.batch_size:
+            return np.concatenate([self.predict(inputs[i:i + self.batch_size])
+                                   for i in range(0, len(inputs), self.batch_size)])
+        batch = np.zeros((self.batch_size, self.height, self.width, 3), self.input["dtype"])
+        batch[:len(inputs)] = inputs
+        self.interpreter.set_tensor(self.input["index"], batch)
+        self.interpreter.invoke()
+        scores = self.interpreter.get_tensor(self.output["index"])[:len(inputs)]
+
+        scale, zero_point = self.output["quantization"]
+        if scale:
+            scores = (scores.astype(np.float32) - zero_point) * scale
+        # Models exported without a softmax head return logits
+        if scores.min() < 0 or not np.allclose(scores.sum(axis=1), 1.0, atol=0.05):
+            scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+            scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def top_k(self, scores, k=3):
+        """[(label, probability), ...] for the k best classes of one score row"""
+        best = numpy().argsort(scores)[::-1][:k]
+        return [(self.labels[i], float(scores[i])) for i in best]
+
+
+class BatchingClassifier:
+    """Shares one RashClassifier between sessions, batching concurrent requests"""
+
+    def __init__(self, classifier, batch_size=BATCH_SIZE, max_wait_ms=MAX_WAIT_MS,
+                 queue_size=QUEUE_SIZE):
+        self.classifier = classifier
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._worker = threading.Thread(target=self._run, name="rash-classifier", daemon=True)
+        self._worker.start()
+
+    def submit(self, image_bytes, k=3):
+        """Queue one image; the Future resolves to its top-k [(label, probability)]"""
+        future = Future()
+        try:
+            self._queue.put_nowait((image_bytes, k, future))
+        except queue.Full:
+            raise ClassifierBusy("Classifier queue is full") from None
+        return future
+
+    def classify(self, images, k=3, timeout=30):
+        """Classify several images, blocking until all are done
+
+        Raises ClassifierBusy if the queue is full or the results take longer
+        than timeout seconds.
+        """
+        futures = [self.submit(image, k) for image in images]
+        try:
+            return [f.result(timeout=timeout) for f in futures]
+        except FutureTimeout:
+            for f in futures:
+                f.cancel()
+            raise ClassifierBusy(f"Classifier did not answer within {timeout}s") from None
+
+    def _next_batch(self):
+        """Block for one request, then gather more until full or the wait expires"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            inputs, ready = [], []
+            for image_bytes, k, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    inputs.append(self.classifier.preprocess(image_bytes))
+                    ready.append((k, future))
+                except Exception as exc:
+                    future.set_exception(exc)
+            if not inputs:
+                continue
+            try:
+                scores = self.classifier.predict(inputs)
+            except Exception as exc:
+                for _, future in ready:
+                    future.set_exception(exc)
+                continue
+            for row, (k, future) in zip(scores, ready):
+                future.set_result(self.classifier.top_k(row, k))
+
+
+def load_batching_classifier(model_path=MODEL_PATH):
+    """Load the model behind a batching worker, or None if no model is installed"""
+    if not os.path.exists(model_path) or not os.path.exists(labels_path(model_path)):
+        return None
+    return BatchingClassifier(RashClassifier(model_path))
@@ -0,0 +1,147 @@
+"""
+Record types for the guide's conditions
+Conditions and their features are frozen, slotted dataclasses: no per-record
+__dict__, attribute access instead of string-key lookups, and feature labels
+interned so every "Appearance" or "Treatment" is one shared string.
+ConditionTable is a columnar view over a list of conditions (category,
+chapter and subgroup codes plus CSR-style feature columns in compact arrays)
+for vectorized filtering and counting.
+"""
+
+import sys
+from array import array
+from dataclasses import dataclass
+
+from lazy_imports import numpy
+
+
+@dataclass(frozen=True, slots=True)
+class Feature:
+    label: str
+    value: str
+
+    def __iter__(self):
+        """Unpack as (label, value), like the pairs in the content files"""
+        yield self.label
+        yield self.value
+
+    def __reduce__(self):
+        # Re-intern the label when loaded from a content snapshot
+        return make_feature, (self.label, self.value)
+
+
+@dataclass(frozen=True, slots=True)
+class Condition:
+    name: str
+    image: str
+    figure: str
+    features: tuple
+    chapter: str = ""
+    category: str = ""
+    subgroup: str = None
+
+    def as_dict(self):
+        """The content-file shape of this condition (features as [label, value] lists)"""
+        return {"name": self.name, "image": self.image, "figure": self.figure,
+                "features": [[f.label, f.value] for f in self.features],
+                "chapter": self.chapter, "category": self.category, "subgroup": self.subgroup}
+
+
+def make_feature(label, value):
+    """Feature with an interned label"""
+    return Feature(sys.intern(label), value)
+
+
+def make_condition(name, image, figure, features, chapter="", category="", subgroup=None):
+    """Condition from raw (label, value) pairs, interning the repeated strings"""
+    return Condition(name, image, figure, tuple(make_feature(l, v) for l, v in features),
+                     sys.intern(chapter), sys.intern(category),
+                     sys.intern(subgroup) if subgroup else None)
+
+
+class _Codes:
+    """Distinct strings of one column and their integer codes"""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ConditionTable:
+    """Columnar view of conditions for vectorized filtering
+
+    Row i is conditions[i]. Per-row columns hold codes into the distinct
+    category/chapter/subgroup values; feature columns are flattened, with
+    feature_rows giving the owning row of each feature.
+    """
+
+    COLUMNS = ("category", "chapter", "subgroup")
+
+    def __init__(self, conditions):
+        self.conditions = tuple(conditions)
+        self._codes = {column: _Codes() for column in self.COLUMNS}
+        self._columns = {column: array("I") for column in self.COLUMNS}
+        self.labels = _Codes()
+        self.feature_rows = array("I")
+        self.feature_labels = array("I")
+        self.feature_values = []
+        for row, condition in enumerate(self.conditions):
+            for column in self.COLUMNS:
+                self._columns[column].append(self._codes[column].code(getattr(condition, column)))
+            for feature in condition.features:
+                self.feature_rows.append(row)
+                self.feature_labels.append(self.labels.code(feature.label))
+                self.feature_values.append(feature.value)
+
+    def __len__(self):
+        return len(self.conditions)
+
+    def column(self, name):
+        """numpy view (no copy) of a code column"""
+        np = numpy()
+        return np.frombuffer(self._columns[name], dtype=np.uint32)
+
+    def values(self, name):
+        """Distinct values of a column, indexed by code"""
+        return self._codes[name].values
+
+    def mask(self, **filters):
+        """Boolean row mask; each filter is a column value or a collection of accepted values
+
+        label= keeps rows that have a feature with that label.
+        """
+        np = numpy()
+        mask = np.ones(len(self.conditions), dtype=bool)
+        for name, accepted in filters.items():
+            if isinstance(accepted, str) or accepted is None:
+                accepted = [accepted]
+            if name == "label":
+                codes = [self.labels.codes[a] for a in accepted if a in self.labels.codes]
+                labels = np.frombuffer(self.feature_labels, dtype=np.uint32)
+                rows = np.frombuffer(self.feature_rows, dtype=np.uint32)[np.isin(labels, codes)]
+                has = np.zeros(len(self.conditions), dtype=bool)
+                has[rows] = True
+                mask &= has
+            else:
+                known = self._codes[name].codes
+                codes = [known[a] for a in accepted if a in known]
+                mask &= np.isin(self.column(name), codes)
+        return mask
+
+    def select(self, mask):
+        """Conditions whose mask entry is True, in row order"""
+        np = numpy()
+        return [self.conditions[i] for i in np.flatnonzero(mask)]
+
+    def counts(self, name):
+        """{value: row count} for a column, in first-seen order"""
+        np = numpy()
+        counts = np.bincount(self.column(name), minlength=len(self.values(name)))
+        return dict(zip(self.values(name), counts.tolist()))
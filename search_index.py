@@ -0,0 +1,215 @@
+"""
+Inverted index over the study-guide content
+Tokenized once at startup; supports prefix matching, single-typo tolerance
+and ranked results that report which field matched and how strongly.
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import namedtuple
+
+# Relative importance of each indexed field
+FIELD_WEIGHTS = {
+    "name": 5.0,
+    "feature label": 1.5,
+    "feature": 2.0,
+    "finding": 3.0,
+    "diagnosis": 2.0,
+    "red flag": 3.0,
+    "action": 1.5,
+    "lab test": 3.0,
+    "indication": 1.5,
+    "lab findings": 1.5,
+    "treatment topic": 3.0,
+    "treatment": 1.5,
+    "figure text": 1.0,
+}
+
+# How strongly a query token matched an indexed token
+MATCH_STRENGTH = {"exact": 1.0, "prefix": 0.7, "fuzzy": 0.5}
+
+# Bonus multiplier when the whole query appears verbatim in the field
+PHRASE_BONUS = 1.5
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from if in is of on or the to vs with".split()
+)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# One indexed unit: a condition or a row of a reference table
+Document = namedtuple("Document", ["kind", "category", "title", "ref", "fields"])
+
+# A ranked search result
+SearchHit = namedtuple("SearchHit", ["document", "score", "field", "match"])
+
+
+def normalize(text):
+    """Lowercase and strip accents so 'Café' matches 'cafe'"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    """Split text into normalized, non-stopword tokens"""
+    return [t for t in TOKEN_RE.findall(normalize(text)) if t not in STOPWORDS]
+
+
+def _deletes(token):
+    """All strings one deletion away from token"""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _within_one_edit(a, b):
+    """True if a and b differ by at most one insert, delete, substitute or transpose"""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diffs = [i for i in range(la) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return (len(diffs) == 2 and diffs[1] == diffs[0] + 1
+                and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]])
+    if la > lb:
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+def condition_document(category, condition, figure_text=None):
+    """Indexed fields of one condition, plus text read off its figure (ocr_index.py)"""
+    fields = [("name", condition.name)]
+    for label, value in condition.features:
+        fields.append(("feature label", label))
+        fields.append(("feature", value))
+    if figure_text:
+        fields.append(("figure text", figure_text))
+    return Document("condition", category, condition.name, condition, fields)
+
+
+def table_documents(clinical_pearls, red_flags, lab_tests, treatments):
+    """Indexed fields of every reference-table row"""
+    docs = []
+    for row in clinical_pearls:
+        docs.append(Document("pearl", None, row[0], row,
+                             [("finding", row[0]), ("diagnosis", row[1])]))
+    for row in red_flags:
+        docs.append(Document("red flag", None, row[0], row,
+                             [("red flag", row[0]), ("action", row[1])]))
+    for row in lab_tests:
+        docs.append(Document("lab test", None, row[0], row,
+                             [("lab test", row[0]), ("indication", row[1]),
+                              ("lab findings", row[2])]))
+    for row in treatments:
+        docs.append(Document("treatment", None, row[0], row,
+                             [("treatment topic", row[0]), ("treatment", row[1])]))
+    return docs
+
+
+class SearchIndex:
+    """Token -> postings index with prefix and typo-tolerant lookup"""
+
+    def __init__(self, documents):
+        self.documents = list(documents)
+        self.postings = {}
+        self._field_text = []
+
+        for doc_id, doc in enumerate(self.documents):
+            texts = {}
+            for field, text in doc.fields:
+                texts.setdefault(field, []).append(normalize(text))
+                weight = FIELD_WEIGHTS[field]
+                for token in tokenize(text):
+                    field_weights = self.postings.setdefault(token, {}).setdefault(doc_id, {})
+                    field_weights[field] = weight
+            self._field_text.append({f: " ".join(t) for f, t in texts.items()})
+
+        self.vocabulary = sorted(self.postings)
+        self._delete_index = {}
+        for token in self.vocabulary:
+            if len(token) >= 4:
+                for variant in _deletes(token):
+                    self._delete_index.setdefault(variant, set()).add(token)
+
+    @classmethod
+    def build(cls, conditions, clinical_pearls=(), red_flags=(), lab_tests=(), treatments=(),
+              figure_texts=None):
+        """Index every condition and reference-table row
+
+        figure_texts maps image names to text extracted from the figures.
+        """
+        figure_texts = figure_texts or {}
+        docs = [condition_document(category, c, figure_texts.get(c.image))
+                for category, items in conditions.items() for c in items]
+        docs.extend(table_documents(clinical_pearls, red_flags, lab_tests, treatments))
+        return cls(docs)
+
+    def _expand(self, token):
+        """Indexed tokens matching a query token, with the strongest match kind"""
+        matches = {}
+        if token in self.postings:
+            matches[token] = "exact"
+
+        if len(token) >= 2:
+            start = bisect_left(self.vocabulary, token)
+            for candidate in self.vocabulary[start:]:
+                if not candidate.startswith(token):
+                    break
+                matches.setdefault(candidate, "prefix")
+
+        if len(token) >= 4 and not matches:
+            candidates = set(self._delete_index.get(token, ()))
+            for variant in _deletes(token):
+                if variant in self.postings:
+                    candidates.add(variant)
+                candidates.update(self._delete_index.get(variant, ()))
+            for candidate in candidates:
+                if _within_one_edit(token, candidate):
+                    matches.setdefault(candidate, "fuzzy")
+        return matches
+
+    def search(self, query, limit=None, kinds=None):
+        """Return SearchHits for docs matching every query token, best first"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        # doc_id -> [total score, best (contribution, field, match)]
+        scores = None
+        for token in tokens:
+            token_scores = {}
+            for candidate, match in self._expand(token).items():
+                strength = MATCH_STRENGTH[match]
+                for doc_id, fields in self.postings[candidate].items():
+                    for field, weight in fields.items():
+                        contribution = weight * strength
+                        best = token_scores.get(doc_id)
+                        if best is None or contribution > best[0]:
+                            token_scores[doc_id] = (contribution, field, match)
+
+            if scores is None:
+                scores = {d: [c[0], c] for d, c in token_scores.items()}
+            else:
+                scores = {d: [s[0] + token_scores[d][0], max(s[1], token_scores[d])]
+                          for d, s in scores.items() if d in token_scores}
+            if not scores:
+                return []
+
+        phrase = normalize(query).strip()
+        hits = []
+        for doc_id, (score, (_, field, match)) in scores.items():
+            doc = self.documents[doc_id]
+            if kinds and doc.kind not in kinds:
+                continue
+            if len(tokens) > 1 and phrase in self._field_text[doc_id].get(field, ""):
+                score *= PHRASE_BONUS
+            hits.append(SearchHit(doc, score, field, match))
+
+        hits.sort(key=lambda h: (-h.score, h.document.title))
+        return hits[:limit] if limit else hits
@@ -0,0 +1,247 @@
+"""
+Visual similarity index over the figure photographs
+Stores a 64-bit perceptual hash and a colour/layout feature vector per image
+in memory-mapped arrays under <IMG_DIR>/similarity/. Lookups are one
+vectorized pass over those arrays; rebuilding only recomputes images whose
+mtime or size changed.
+
+Usage: python similarity_index.py [--image-dir DIR]   (build or update the index)
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from images import IMG_DIR, list_images
+from lazy_imports import cv2, numpy
+
+SIMILARITY_SUBDIR = "similarity"
+INDEX_FILE = "index.json"
+FEATURES_FILE = "features.f32"
+HASHES_FILE = "hashes.u8"
+
+INDEX_VERSION = 1
+HIST_BINS = (8, 4, 4)  # hue, saturation, value
+THUMB_SIZE = 16
+FEATURE_DIM = HIST_BINS[0] * HIST_BINS[1] * HIST_BINS[2] + THUMB_SIZE * THUMB_SIZE
+HASH_BYTES = 8
+
+# Weight of perceptual-hash distance against feature cosine similarity
+HASH_WEIGHT = 0.5
+
+# Fan out to a process pool once this many images need (re)computing
+PARALLEL_THRESHOLD = 16
+
+
+def image_signature(image_path):
+    """(perceptual hash bytes, L2-normalized feature vector) for one image"""
+    np = numpy()
+    cv = cv2()
+    image = cv.imread(image_path, cv.IMREAD_REDUCED_COLOR_4)
+    if image is None:
+        raise ValueError(f"Could not decode {image_path}")
+
+    # pHash: sign of the low-frequency 8x8 DCT block against its median
+    gray = cv.cvtColor(image, cv.COLOR_BGR2GRAY)
+    dct = cv.dct(cv.resize(gray, (32, 32), interpolation=cv.INTER_AREA).astype(np.float32))
+    low = dct[:8, :8].flatten()
+    phash = np.packbits(low > np.median(low[1:]))
+
+    # Colour distribution plus a coarse grayscale layout
+    hsv = cv.cvtColor(image, cv.COLOR_BGR2HSV)
+    hist = cv.calcHist([hsv], [0, 1, 2], None, list(HIST_BINS), [0, 180, 0, 256, 0, 256])
+    hist = hist.flatten() / max(hist.sum(), 1.0)
+    thumb = cv.resize(gray, (THUMB_SIZE, THUMB_SIZE), interpolation=cv.INTER_AREA)
+    thumb = thumb.astype(np.float32).flatten()
+    thumb -= thumb.mean()
+    thumb /= np.linalg.norm(thumb) or 1.0
+
+    vector = np.concatenate([hist / (np.linalg.norm(hist) or 1.0), thumb]).astype(np.float32)
+    vector /= np.linalg.norm(vector) or 1.0
+    return phash, vector
+
+
+def _safe_signature(image_path):
+    """(signature, None) or (None, error message); one bad file must not stop the build"""
+    try:
+        return image_signature(image_path), None
+    except (OSError, ValueError) as exc:
+        return None, str(exc)
+
+
+def _listed_entries(image_dir):
+    """Sorted [(name, mtime_ns, size)], the form index entries are stored in"""
+    return sorted((name,) + signature for name, signature in list_images(image_dir).items())
+
+
+class SimilarityIndex:
+    """Memory-mapped hashes and feature vectors with vectorized nearest-neighbour lookup"""
+
+    def __init__(self, image_dir=IMG_DIR):
+        self.image_dir = image_dir
+        self.index_dir = os.path.join(image_dir, SIMILARITY_SUBDIR)
+        self.entries = []
+        self.failed = []  # (name, mtime_ns, size, error) of images that couldn't be indexed
+        self.features = None
+        self.hashes = None
+        self._positions = {}
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._checked_at = 0.0
+
+    def _path(self, name):
+        return os.path.join(self.index_dir, name)
+
+    def load(self):
+        """Map the on-disk index; returns False if it is missing or from another version"""
+        np = numpy()
+        try:
+            with open(self._path(INDEX_FILE), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if meta.get("version") != INDEX_VERSION or meta.get("dim") != FEATURE_DIM:
+            return False
+
+        entries = [tuple(e) for e in meta["entries"]]
+        failed = [tuple(e) for e in meta.get("failed", [])]
+        if entries:
+            features = np.memmap(self._path(FEATURES_FILE), dtype=np.float32, mode="r",
+                                 shape=(len(entries), FEATURE_DIM))
+            hashes = np.memmap(self._path(HASHES_FILE), dtype=np.uint8, mode="r",
+                               shape=(len(entries), HASH_BYTES))
+        else:
+            features = np.zeros((0, FEATURE_DIM), np.float32)
+            hashes = np.zeros((0, HASH_BYTES), np.uint8)
+        with self._lock:
+            self.entries, self.features, self.hashes = entries, features, hashes
+            self.failed = failed
+            self._positions = {e[0]: i for i, e in enumerate(entries)}
+        return True
+
+    def is_stale(self):
+        """True if images were added, removed or modified since the index was built"""
+        indexed = sorted(self.entries + [f[:3] for f in self.failed])
+        return _listed_entries(self.image_dir) != indexed
+
+    def refresh(self, max_age_s=60, build=True):
+        """Incrementally update if the image directory changed, checking at most every max_age_s
+
+        With build=False the index is only re-read from disk (picking up a
+        rebuild done by the CLI), never computed. Concurrent callers never
+        wait: if another thread is already checking or rebuilding, the current
+        arrays keep serving lookups.
+        """
+        if time.monotonic() - self._checked_at < max_age_s:
+            return
+        if not self._update_lock.acquire(blocking=False):
+            return
+        try:
+            self._checked_at = time.monotonic()
+            if self.is_stale():
+                if build:
+                    self.update()
+                else:
+                    self.load()
+        finally:
+            self._update_lock.release()
+
+    def update(self, workers=None):
+        """Rebuild the index, recomputing only new or changed images
+
+        Images that fail to decode are recorded in self.failed (and not
+        retried until they change) instead of aborting the build. Returns the
+        number of images whose signatures were computed.
+        """
+        np = numpy()
+        if self.features is None:
+            self.load()
+        listed = _listed_entries(self.image_dir)
+        known = {e: i for i, e in enumerate(self.entries)}
+        failed_before = {f[:3]: f for f in self.failed}
+        changed = [e for e in listed if e not in known and e not in failed_before]
+
+        paths = [os.path.join(self.image_dir, e[0]) for e in changed]
+        if len(paths) >= PARALLEL_THRESHOLD:
+            with ProcessPoolExecutor(workers) as pool:
+                results = list(pool.map(_safe_signature, paths, chunksize=8))
+        else:
+            results = [_safe_signature(p) for p in paths]
+        signatures = {}
+        failed = [failed_before[e] for e in listed if e in failed_before]
+        for entry, (signature, error) in zip(changed, results):
+            if error is None:
+                signatures[entry] = signature
+            else:
+                failed.append(entry + (error,))
+        current = [e for e in listed if e in known or e in signatures]
+
+        features = np.zeros((len(current), FEATURE_DIM), np.float32)
+        hashes = np.zeros((len(current), HASH_BYTES), np.uint8)
+        reused = [(row, known[e]) for row, e in enumerate(current) if e in known]
+        if reused:
+            rows, old_rows = map(list, zip(*reused))
+            features[rows] = self.features[old_rows]
+            hashes[rows] = self.hashes[old_rows]
+        positions = {e: row for row, e in enumerate(current)}
+        for entry, (phash, vector) in signatures.items():
+            hashes[positions[entry]] = phash
+            features[positions[entry]] = vector
+
+        self._write(current, features, hashes, failed)
+        self.load()
+        return len(signatures)
+
+    def _write(self, entries, features, hashes, failed):
+        """Write arrays then metadata, each via an atomic rename"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        for name, array in ((FEATURES_FILE, features), (HASHES_FILE, hashes)):
+            tmp_path = self._path(name) + ".tmp"
+            array.tofile(tmp_path)
+            os.replace(tmp_path, self._path(name))
+        tmp_path = self._path(INDEX_FILE) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "dim": FEATURE_DIM,
+                       "entries": [list(e) for e in entries],
+                       "failed": [list(e) for e in failed]}, f)
+        os.replace(tmp_path, self._path(INDEX_FILE))
+
+    def similar(self, image_name, k=3):
+        """[(image name, score)] of the k most similar other images, best first"""
+        np = numpy()
+        with self._lock:
+            position = self._positions.get(image_name)
+            if position is None or len(self.entries) < 2:
+                return []
+            features, hashes, entries = self.features, self.hashes, self.entries
+
+        cosine = features @ features[position]
+        hamming = np.unpackbits(hashes ^ hashes[position], axis=1).sum(axis=1)
+        scores = cosine - HASH_WEIGHT * hamming / (HASH_BYTES * 8)
+        scores[position] = -np.inf
+
+        k = min(k, len(entries) - 1)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(entries[i][0], float(scores[i])) for i in best]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or update the visual similarity index")
+    parser.add_argument("--image-dir", default=IMG_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    index = SimilarityIndex(args.image_dir)
+    computed = index.update(args.workers)
+    for name, _, _, error in index.failed:
+        print(f"  skipped {name}: {error}")
+    print(f"Indexed {len(index.entries)} images ({computed} computed, "
+          f"{len(index.entries) - computed} reused, {len(index.failed)} failed)")
+
+
+if __name__ == "__main__":
+    main()
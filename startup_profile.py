@@ -0,0 +1,84 @@
+"""
+Startup profiler: report import time per module for the Streamlit entry point
+Runs `python -X importtime` on neonatal_dermatology_app.py in a fresh
+interpreter and prints the slowest imports, so heavy dependencies creeping
+onto the cold-start path show up before deploy.
+
+Usage: python startup_profile.py [--top 25] [--json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_MODULE = "neonatal_dermatology_app"
+
+# Modules that must not be imported while rendering the Overview page
+HEAVY_MODULES = ("numpy", "pandas", "pyarrow", "cv2", "tensorflow", "PIL")
+
+
+def profile_imports(module=APP_MODULE):
+    """Import `module` in a fresh interpreter and return per-module timings (µs)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR, capture_output=True, text=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr[-2000:]}")
+    return timings
+
+
+def summarize(timings, top=25):
+    """Top-level packages by cumulative time, plus any heavy modules loaded"""
+    packages = {}
+    for t in timings:
+        package = t["module"].split(".")[0]
+        packages[package] = packages.get(package, 0) + t["self_us"]
+    loaded = sorted({t["module"].split(".")[0] for t in timings} & set(HEAVY_MODULES))
+    return {
+        "total_us": sum(t["self_us"] for t in timings),
+        "packages": sorted(packages.items(), key=lambda p: -p[1])[:top],
+        "slowest": sorted(timings, key=lambda t: -t["cumulative_us"])[:top],
+        "heavy_loaded": loaded,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report per-module import time for the app")
+    parser.add_argument("--module", default=APP_MODULE)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable output")
+    args = parser.parse_args(argv)
+
+    summary = summarize(profile_imports(args.module), args.top)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"Total import time: {summary['total_us'] / 1000:.1f} ms")
+    print("\nBy top-level package (self time):")
+    for package, us in summary["packages"]:
+        print(f"  {us / 1000:8.1f} ms  {package}")
+    print("\nSlowest modules (cumulative):")
+    for t in summary["slowest"]:
+        print(f"  {t['cumulative_us'] / 1000:8.1f} ms  {t['module']}")
+    if summary["heavy_loaded"]:
+        print(f"\nHeavy modules imported at startup: {', '.join(summary['heavy_loaded'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Static file server for the clinical photographs
+Serves the photographs in IMG_DIR (originals and renditions; nothing else
+under the root) under content-hashed URLs such as
+/img/3f2a9c0d1e5b7a46/renditions/foo-640.jpeg, so responses can be cached as
+immutable by browsers and proxies across reloads and users. Supports
+ETag/If-None-Match, Last-Modified/If-Modified-Since, single byte ranges and
+HEAD, and sends file bodies with sendfile() instead of copying them through
+Python.
+
+Usage: python static_images.py [--image-dir DIR] [--port 8502]
+"""
+
+import argparse
+import email.utils
+import mimetypes
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from images import IMAGE_EXTENSIONS, IMG_DIR, file_digest
+
+URL_PREFIX = "/img"
+HASH_CHARS = 16
+DEFAULT_PORT = 8502
+
+# Originals plus every rendition codec; manifests and index files are never served
+SERVED_EXTENSIONS = IMAGE_EXTENSIONS + (".webp", ".avif")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "public, no-cache"
+
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+
+
+class ContentHashes:
+    """SHA-256 prefixes of files under a root, recomputed only when mtime or size change"""
+
+    def __init__(self, root=IMG_DIR):
+        self.root = root
+        self._hashes = {}  # relative path -> (mtime_ns, size, digest)
+        self._lock = threading.Lock()
+
+    def resolve(self, relative_path):
+        """Absolute path of relative_path, or None if it escapes the root"""
+        root = os.path.realpath(self.root)
+        path = os.path.realpath(os.path.join(root, relative_path))
+        if os.path.commonpath([root, path]) != root:
+            return None
+        return path
+
+    def digest(self, relative_path, stat=None):
+        """Content hash prefix of a file under the root, or None if it is missing"""
+        path = self.resolve(relative_path)
+        if path is None:
+            return None
+        try:
+            stat = stat or os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            known = self._hashes.get(relative_path)
+        if known and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            return known[2]
+
+        try:
+            digest = file_digest(path)[:HASH_CHARS]
+        except OSError:
+            return None
+        with self._lock:
+            self._hashes[relative_path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def url_path(self, relative_path):
+        """'/img/<hash>/<relative path>' for a file, or None if it is missing"""
+        digest = self.digest(relative_path)
+        if digest is None:
+            return None
+        return f"{URL_PREFIX}/{digest}/{relative_path}"
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single 'bytes=' range, None to ignore it, or 'invalid'"""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        elif last:
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            return None
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return "invalid"
+    return start, min(end, size - 1)
+
+
+def make_handler(hashes):
+    """Request handler class serving files known to `hashes`"""
+
+    class ImageHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_HEAD(self):
+            self._serve(send_body=False)
+
+        def do_GET(self):
+            self._serve(send_body=True)
+
+        def _serve(self, send_body):
+            parts = unquote(self.path.split("?", 1)[0]).split("/", 3)
+            if len(parts) != 4 or "/" + parts[1] != URL_PREFIX:
+                self._error(404)
+                return
+            requested_hash, relative_path = parts[2], parts[3]
+            if not relative_path.lower().endswith(SERVED_EXTENSIONS):
+                self._error(404)
+                return
+            path = hashes.resolve(relative_path)
+            try:
+                stat = os.stat(path) if path else None
+            except OSError:
+                stat = None
+            if stat is None or not os.path.isfile(path):
+                self._error(404)
+                return
+
+            digest = hashes.digest(relative_path, stat)
+            etag = f'"{digest}"'
+            last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+            # A stale hash still gets the file, but must not be cached as immutable
+            cache_control = IMMUTABLE_CACHE if requested_hash == digest else REVALIDATE_CACHE
+
+            if self._not_modified(etag, stat):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", cache_control)
+                self.end_headers()
+                return
+
+            size = stat.st_size
+            byte_range = None
+            if_range = self.headers.get("If-Range")
+            if not if_range or if_range == etag:
+                byte_range = parse_range(self.headers.get("Range"), size)
+            if byte_range == "invalid":
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            start, end = byte_range or (0, size - 1)
+            length = end - start + 1 if size else 0
+            self.send_response(206 if byte_range else 200)
+            self.send_header("Content-Type",
+                             mimetypes.guess_type(path)[0] or "application/octet-stream")
+            self.send_header("Content-Length", str(length))
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.send_header("Cache-Control", cache_control)
+            if byte_range:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.end_headers()
+            if send_body and length:
+                self.wfile.flush()
+                with open(path, "rb") as f:
+                    # socket.sendfile uses os.sendfile: the kernel copies page cache to socket
+                    self.connection.sendfile(f, offset=start, count=length)
+
+        def _not_modified(self, etag, stat):
+            if_none_match = self.headers.get("If-None-Match")
+            if if_none_match:
+                return etag in [t.strip() for t in if_none_match.split(",")] or if_none_match == "*"
+            if_modified_since = self.headers.get("If-Modified-Since")
+            if if_modified_since:
+                try:
+                    since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+                except (TypeError, ValueError):
+                    return False
+                return int(stat.st_mtime) <= since
+            return False
+
+        def _error(self, code):
+            self.send_response(code)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    return ImageHandler
+
+
+def start_image_server(image_dir=IMG_DIR, port=DEFAULT_PORT, host="0.0.0.0"):
+    """Serve image_dir on a daemon thread; returns (server, ContentHashes)"""
+    hashes = ContentHashes(image_dir)
+    server = ThreadingHTTPServer((host, port), make_handler(hashes))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="image-server", daemon=True).start()
+    return server, hashes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the clinical photographs with long-lived caching")
+    parser.add_argument("--image-dir", default=IMG_DIR)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    hashes = ContentHashes(args.image_dir)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(hashes))
+    print(f"Serving {args.image_dir} at http://{args.host}:{args.port}{URL_PREFIX}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import asyncio
+import gzip
+import json
+import os
+
+import pytest
+
+from api import MAX_SEARCH_LIMIT, GuideApi
+from build_renditions import build_all
+from conftest import write_image
+from validate_images import validate, write_manifest
+
+
+def validate_root(image_dir, accept_changes=False):
+    write_manifest(validate(image_dir, workers=2, accept_changes=accept_changes), image_dir)
+
+
+@pytest.fixture
+def api(image_dir):
+    build_all(image_dir, widths=(64,), codecs=["jpeg"])
+    validate_root(image_dir)
+    guide = GuideApi(image_dir=image_dir)
+    guide._swap(guide.load())
+    return guide
+
+
+def call(app, path, query="", headers=None, method="GET"):
+    """(status, {header: value}, body) of one request"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": method, "path": path,
+             "query_string": query.encode(),
+             "headers": [(k.encode(), v.encode()) for k, v in (headers or {}).items()]}
+    asyncio.run(app(scope, receive, send))
+    response_headers = {k.decode(): v.decode() for k, v in messages[0]["headers"]}
+    return messages[0]["status"], response_headers, messages[1]["body"]
+
+
+def get_json(app, path, query=""):
+    status, _, body = call(app, path, query)
+    return status, json.loads(body)
+
+
+def test_health_and_listing(api, content):
+    status, health = get_json(api, "/api/health")
+    assert status == 200 and health["status"] == "ok"
+    assert health["content_version"] == content["version"]
+    _, listing = get_json(api, "/api/conditions")
+    assert listing["count"] == content["stats"]["conditions"]
+    _, benign = get_json(api, "/api/conditions", "category=benign")
+    assert benign["count"] == len(content["conditions"]["benign"])
+
+
+def test_condition_lookup(api, content):
+    condition = content["conditions"]["infectious"][0]
+    for key in (condition.name, condition.name.upper(), os.path.splitext(condition.image)[0]):
+        status, detail = get_json(api, f"/api/conditions/{key}")
+        assert status == 200 and detail["name"] == condition.name
+    assert get_json(api, "/api/conditions/nothing")[0] == 404
+    assert get_json(api, "/api/reference/red_flags")[1]["rows"]
+    assert get_json(api, "/api/reference/secrets")[0] == 404
+    assert call(api, "/api/health", method="POST")[0] == 405
+
+
+def test_search_limits(api):
+    status, everything = get_json(api, "/api/search", "q=rash&limit=100")
+    assert status == 200 and everything["count"] > 2
+    _, two = get_json(api, "/api/search", "q=rash&limit=2")
+    assert two["results"] == everything["results"][:2]
+    for limit in ("0", "-3", "x"):
+        assert get_json(api, "/api/search", f"q=rash&limit={limit}")[0] == 400, limit
+    assert get_json(api, "/api/search", f"q=rash&limit={MAX_SEARCH_LIMIT + 50}")[0] == 200
+    assert get_json(api, "/api/search", "q=")[0] == 400
+    _, pearls = get_json(api, "/api/search", "q=rash&kind=pearl")
+    assert {r["kind"] for r in pearls["results"]} == {"pearl"}
+
+
+def test_json_compression_and_etags(api):
+    _, headers, body = call(api, "/api/conditions", headers={"accept-encoding": "gzip"})
+    assert headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body))["count"]
+    status, _, body = call(api, "/api/conditions",
+                           headers={"accept-encoding": "gzip", "if-none-match": headers["etag"]})
+    assert status == 304 and body == b""
+
+
+def test_figures(api, image_dir, content):
+    name = content["conditions"]["benign"][0].image
+    status, headers, body = call(api, f"/api/figures/{name}", "width=64")
+    assert status == 200 and headers["content-type"] == "image/jpeg"
+    with open(os.path.join(image_dir, "renditions", name.replace(".jpeg", "-64.jpeg")), "rb") as f:
+        assert body == f.read()
+    status, _, body = call(api, f"/api/figures/{name}", "width=64",
+                           headers={"if-none-match": headers["etag"]})
+    assert status == 304 and body == b""
+    assert call(api, f"/api/figures/{name}", "width=wide")[0] == 400
+    for other in ("integrity.json", "renditions/manifest.json", "missing.jpeg"):
+        assert call(api, f"/api/figures/{other}")[0] == 404
+
+
+def test_replaced_figure_is_served_after_revalidation(api, image_dir, content):
+    name = content["conditions"]["benign"][0].image
+    path = os.path.join(image_dir, name)
+    width = 5000  # wider than every rendition: served from the widest one
+    os.remove(os.path.join(image_dir, "renditions", "manifest.json"))
+    api._swap(api.load())
+    _, old_headers, old = call(api, f"/api/figures/{name}", f"width={width}")
+
+    stat = os.stat(path)
+    write_image(path, (200, 100), (0, 0, 0))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    validate_root(image_dir, accept_changes=True)
+    api._swap(api.load())
+
+    status, headers, body = call(api, f"/api/figures/{name}", f"width={width}")
+    assert status == 200
+    with open(path, "rb") as f:
+        assert body == f.read()
+    assert body != old and headers["etag"] != old_headers["etag"]
+
+
+def test_startup_fails_on_image_problems(image_dir, content):
+    os.remove(os.path.join(image_dir, content["conditions"]["benign"][0].image))
+    guide = GuideApi(image_dir=image_dir)
+    messages = [{"type": "lifespan.startup"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(guide({"type": "lifespan"}, receive, send))
+    assert sent[0]["type"] == "lifespan.startup.failed"
+    assert "missing" in sent[0]["message"]
@@ -0,0 +1,26 @@
+import os
+
+from build_renditions import build_all
+from conftest import write_image
+from images import RENDITIONS_SUBDIR, load_rendition_manifest, pick_rendition
+
+
+def test_build_all_never_upscales(tmp_path):
+    write_image(tmp_path / "a.jpeg", (800, 400))
+    manifest = build_all(str(tmp_path), widths=(320, 640, 960), codecs=["jpeg"])
+    renditions = manifest["images"]["a.jpeg"]["renditions"]
+    assert [(r["width"], r["height"]) for r in renditions] == [(320, 160), (640, 320), (800, 400)]
+    for rendition in renditions:
+        assert os.path.exists(tmp_path / RENDITIONS_SUBDIR / rendition["file"])
+    assert load_rendition_manifest(str(tmp_path)) == manifest
+
+
+def test_pick_rendition(tmp_path):
+    write_image(tmp_path / "a.jpeg", (800, 400))
+    manifest = build_all(str(tmp_path), widths=(320, 640), codecs=["jpeg"])
+    assert pick_rendition(manifest, "a.jpeg", 300) == f"{RENDITIONS_SUBDIR}/a-320.jpeg"
+    assert pick_rendition(manifest, "a.jpeg", 500) == f"{RENDITIONS_SUBDIR}/a-640.jpeg"
+    assert pick_rendition(manifest, "a.jpeg", 2000) == f"{RENDITIONS_SUBDIR}/a-800.jpeg"
+    assert pick_rendition(manifest, "a.jpeg", 500, formats=("webp",)) == "a.jpeg"
+    assert pick_rendition(manifest, "other.jpeg", 500) == "other.jpeg"
+    assert load_rendition_manifest(str(tmp_path / "missing")) == {"images": {}}
@@ -0,0 +1,102 @@
+import json
+import os
+
+import pytest
+
+from content_loader import CACHE_SUBDIR, ContentError, ContentStore, load_content, validate
+
+
+def chapter(name, conditions, title=""):
+    return {"schema_version": 1, "chapter": name, "title": title,
+            "categories": [{"key": "benign", "title": "Benign Rashes",
+                            "subgroups": [["common", "Common"]]}],
+            "conditions": {"benign": [
+                {"name": c, "image": f"{c.lower()}.jpeg", "figure": f"Figure {i}",
+                 "features": [["Appearance", f"{c} appearance"]], "subgroup": "common"}
+                for i, c in enumerate(conditions, start=1)]},
+            "clinical_pearls": [[f"{name} finding", "Diagnosis"]]}
+
+
+def write(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    # Distinct signature even within one mtime tick
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def names(content):
+    return [c.name for items in content["conditions"].values() for c in items]
+
+
+def test_validate_rejects_bad_content():
+    with pytest.raises(ContentError, match="unsupported schema_version"):
+        validate({"schema_version": 99})
+    bad = chapter("c", ["Milia"])
+    del bad["conditions"]["benign"][0]["figure"]
+    with pytest.raises(ContentError, match="missing figure"):
+        validate(bad)
+    bad = chapter("c", ["Milia"])
+    bad["conditions"]["benign"][0]["subgroup"] = "rare"
+    with pytest.raises(ContentError, match="unknown subgroup"):
+        validate(bad)
+
+
+def test_chapters_merge_in_file_order(tmp_path):
+    write(tmp_path / "a.json", chapter("Chapter A", ["Milia"], title="Guide"))
+    write(tmp_path / "b.json", chapter("Chapter B", ["Miliaria"]))
+    content = load_content(str(tmp_path))
+    assert content["chapters"] == ["Chapter A", "Chapter B"]
+    assert content["title"] == "Guide"
+    assert names(content) == ["Milia", "Miliaria"]
+    assert content["stats"] == {"conditions": 2, "figures": 2, "chapters": 2}
+    assert [title for _, title, _ in content["sections"]["benign"]] == ["Common"]
+
+
+def test_refresh_only_changes_version_when_content_changes(tmp_path):
+    write(tmp_path / "a.json", chapter("Chapter A", ["Milia"]))
+    store = ContentStore(str(tmp_path))
+    first = store.refresh()
+    assert store.refresh() is first
+    write(tmp_path / "a.json", chapter("Chapter A", ["Milia", "Miliaria"]))
+    second = store.refresh()
+    assert second["version"] != first["version"]
+    assert names(second) == ["Milia", "Miliaria"]
+
+
+def test_bad_chapter_keeps_last_good_version(tmp_path):
+    write(tmp_path / "a.json", chapter("Chapter A", ["Milia"]))
+    store = ContentStore(str(tmp_path))
+    good = store.refresh()
+    with open(tmp_path / "a.json", "w") as f:
+        f.write('{"schema_version": 1, "chap')
+    content = store.refresh()
+    assert names(content) == ["Milia"] and content["version"] == good["version"]
+    assert len(content["errors"]) == 1 and "a.json" in content["errors"][0]
+    with pytest.raises(ContentError):
+        load_content(str(tmp_path))
+    write(tmp_path / "a.json", chapter("Chapter A", ["Miliaria"]))
+    assert store.refresh()["errors"] == []
+
+
+def test_stale_snapshots_are_pruned(tmp_path):
+    write(tmp_path / "a.json", chapter("Chapter A", ["Milia"]))
+    store = ContentStore(str(tmp_path))
+    store.refresh()
+    cache_dir = tmp_path / CACHE_SUBDIR
+    before = os.listdir(cache_dir)
+    assert len(before) == 1
+    write(tmp_path / "a.json", chapter("Chapter A", ["Miliaria"]))
+    store.refresh()
+    after = os.listdir(cache_dir)
+    assert len(after) == 1 and after != before
+
+
+def test_unreadable_snapshot_is_a_cache_miss(tmp_path):
+    write(tmp_path / "a.json", chapter("Chapter A", ["Milia"]))
+    ContentStore(str(tmp_path)).refresh()
+    cache_dir = tmp_path / CACHE_SUBDIR
+    (snapshot,) = os.listdir(cache_dir)
+    # A pickle of a class from a module that no longer exists
+    (cache_dir / snapshot).write_bytes(b"\x80\x04\x8c\x07gone_mo\x94\x8c\x01x\x94\x93\x94.")
+    assert names(ContentStore(str(tmp_path)).refresh()) == ["Milia"]
@@ -0,0 +1,64 @@
+from differential import PEARL_WEIGHT, TEXT_WEIGHT, DifferentialIndex, parse_findings
+from records import make_condition
+
+FINDINGS = [("Vesicles", "Morphology", "vesicle; vesicular"),
+            ("Fever", "Systemic", "fever; febrile"),
+            ("Scalp", "Location", "scalp")]
+CONDITIONS = {
+    "infectious": [
+        make_condition("Neonatal Herpes Simplex", "hsv.jpeg", "Figure 1",
+                       [("Appearance", "Grouped vesicles on an erythematous base")]),
+        make_condition("Bullous Impetigo", "impetigo.jpeg", "Figure 2",
+                       [("Appearance", "Flaccid bullae")]),
+    ],
+    "benign": [
+        make_condition("Aplasia Cutis", "aplasia.jpeg", "Figure 3",
+                       [("Location", "Most commonly on the scalp")]),
+    ],
+}
+PEARLS = [("Febrile neonate with vesicles", "Herpes simplex until proven otherwise")]
+RED_FLAGS = [("Fever with any rash", "Sepsis workup")]
+
+
+def build():
+    return DifferentialIndex.build(CONDITIONS, FINDINGS, PEARLS, RED_FLAGS)
+
+
+def names(results):
+    return [r.condition.name for r in results]
+
+
+def test_parse_findings():
+    assert parse_findings(FINDINGS)[0].terms == ("vesicle", "vesicular")
+
+
+def test_text_and_pearl_evidence():
+    index = build()
+    (hsv,) = index.query(["Vesicles"])
+    assert hsv.condition.name == "Neonatal Herpes Simplex"
+    assert hsv.score == PEARL_WEIGHT and hsv.complete
+    assert names(index.query(["Scalp"])) == ["Aplasia Cutis"]
+    assert index.query(["Scalp"])[0].score == TEXT_WEIGHT
+
+
+def test_conditions_explaining_more_findings_rank_first():
+    results = build().query(["Fever", "Vesicles", "Scalp"])
+    assert names(results) == ["Neonatal Herpes Simplex", "Aplasia Cutis"]
+    assert results[0].matched == ["Fever", "Vesicles"]
+    assert not results[0].complete
+    assert build().query(["Unknown"]) == []
+    assert len(build().query(["Fever", "Vesicles", "Scalp"], limit=1)) == 1
+
+
+def test_guidance_lists_red_flags_first():
+    guidance = build().guidance(["Fever", "Vesicles"])
+    assert [kind for kind, _ in guidance] == ["red flag", "pearl"]
+    assert build().guidance(["Scalp"]) == []
+
+
+def test_shipped_content_builds(content):
+    index = DifferentialIndex.build(content["conditions"], content["findings"],
+                                    content["clinical_pearls"], content["red_flags"])
+    assert sum(len(labels) for labels in index.groups().values()) == len(content["findings"])
+    label = content["findings"][0][0]
+    assert all(label in r.matched for r in index.query([label]))
@@ -0,0 +1,47 @@
+import os
+import shutil
+
+from content_loader import TABLE_COLUMNS, load_content
+from export_guide import GuideExporter
+
+
+def test_xlsx_round_trips_as_a_chapter(tmp_path, content):
+    (path,) = GuideExporter(content, str(tmp_path / "out")).run(["xlsx"])
+    reloaded_dir = tmp_path / "content"
+    reloaded_dir.mkdir()
+    shutil.copy(path, reloaded_dir)
+    reloaded = load_content(str(reloaded_dir))
+
+    assert reloaded["chapters"] == content["chapters"]
+    assert reloaded["title"] == content["title"]
+    assert reloaded["categories"] == content["categories"]
+    assert ([c.as_dict() for c in reloaded["table"].conditions]
+            == [c.as_dict() for c in content["table"].conditions])
+    for table in TABLE_COLUMNS:
+        assert reloaded[table] == content[table]
+
+
+def test_html_site_has_every_category_and_figure(tmp_path, content, image_dir):
+    (site,) = GuideExporter(content, str(tmp_path / "out"), image_dir).run(["html"])
+    pages = set(os.listdir(site))
+    assert {f"{key}.html" for key in content["categories"]} | {"index.html"} <= pages
+    figures = os.listdir(os.path.join(site, "images"))
+    assert len(figures) == content["stats"]["figures"]
+    with open(os.path.join(site, "benign.html"), encoding="utf-8") as f:
+        page = f.read()
+    assert content["conditions"]["benign"][0].name in page
+
+
+def test_pdf_reuses_rendered_pages(tmp_path, content, image_dir):
+    from PIL import PdfParser
+
+    exporter = GuideExporter(content, str(tmp_path / "out"), image_dir)
+    (pdf,) = exporter.run(["pdf"])
+    pages = len(PdfParser.PdfParser(pdf).pages)
+    assert pages >= len(exporter.conditions)
+    assert exporter.stats["cached"] == 0
+
+    again = GuideExporter(content, str(tmp_path / "out"), image_dir)
+    again.run(["pdf"])
+    assert again.stats == {"rendered": 0, "cached": exporter.stats["rendered"]}
+    assert len(PdfParser.PdfParser(pdf).pages) == pages
@@ -0,0 +1,21 @@
+from fragments import build_fragments, condition_html, pearl_html
+from records import make_condition
+
+
+def test_content_is_escaped():
+    condition = make_condition("<script>x</script>", "x.jpeg", "Figure 1", [("A&B", "<b>bold</b>")])
+    html = condition_html(condition)
+    assert "<script>" not in html and "&lt;script&gt;" in html
+    assert "<strong>A&amp;B:</strong> &lt;b&gt;bold&lt;/b&gt;" in html
+    assert "&lt;img" in pearl_html("<img src=x>", "dx")
+
+
+def test_build_fragments_covers_content(content):
+    fragments = build_fragments(content)
+    assert fragments["version"] == content["version"]
+    assert len(fragments["morphology"]) == len(content["lesion_morphology"])
+    assert set(fragments["card_open"]) == {meta["style"] for meta in content["categories"].values()}
+    conditions = [c for group in content["conditions"].values() for c in group]
+    assert set(fragments["conditions"]) == set(conditions)
+    assert str(content["stats"]["figures"]) in fragments["footer"]
+    assert fragments["pearls"].count("pearl-box") == len(content["clinical_pearls"])
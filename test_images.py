@@ -0,0 +1,72 @@
+import os
+
+from images import ImageCache, file_digest, file_signature, list_images
+
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_get_reads_once_then_hits(tmp_path):
+    write(tmp_path / "a.jpeg", b"a" * 10)
+    cache = ImageCache(str(tmp_path), max_bytes=100)
+    assert cache.get("a.jpeg") == b"a" * 10
+    assert cache.get("a.jpeg") == b"a" * 10
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.get("missing.jpeg") is None
+
+
+def test_lru_stays_within_byte_budget(tmp_path):
+    for name in "abc":
+        write(tmp_path / f"{name}.jpeg", name.encode() * 40)
+    cache = ImageCache(str(tmp_path), max_bytes=100)
+    cache.get("a.jpeg")
+    cache.get("b.jpeg")
+    cache.get("a.jpeg")  # b is now least recently used
+    cache.get("c.jpeg")
+    stats = cache.stats()
+    assert stats["bytes"] == 80 and stats["entries"] == 2
+    cache.get("b.jpeg")
+    assert cache.misses == 4
+
+
+def test_oversized_file_is_served_but_not_cached(tmp_path):
+    write(tmp_path / "big.jpeg", b"x" * 200)
+    cache = ImageCache(str(tmp_path), max_bytes=100)
+    assert len(cache.get("big.jpeg")) == 200
+    assert cache.stats()["entries"] == 0
+
+
+def test_changed_file_replaces_stale_entry(tmp_path):
+    path = tmp_path / "a.jpeg"
+    write(path, b"old")
+    cache = ImageCache(str(tmp_path), max_bytes=100)
+    data, version = cache.get_versioned("a.jpeg")
+    assert data == b"old"
+    write(path, b"newer")
+    os.utime(path, ns=(version + 10**9, version + 10**9))
+    assert cache.get_versioned("a.jpeg") == (b"newer", version + 10**9)
+    assert cache.stats()["bytes"] == len(b"newer")
+
+
+def test_trusted_version_skips_stat_until_trust_changes(tmp_path):
+    path = tmp_path / "a.jpeg"
+    write(path, b"old")
+    cache = ImageCache(str(tmp_path), trusted={"a.jpeg": 1})
+    assert cache.get("a.jpeg") == b"old"
+    write(path, b"new")
+    assert cache.get("a.jpeg") == b"old"  # trusted version unchanged: cached bytes
+    cache.trusted = {"a.jpeg": 2}
+    assert cache.get("a.jpeg") == b"new"
+
+
+def test_file_helpers(tmp_path):
+    write(tmp_path / "a.jpeg", b"abc")
+    write(tmp_path / "notes.txt", b"")
+    os.mkdir(tmp_path / "renditions.png")
+    assert list(list_images(str(tmp_path))) == ["a.jpeg"]
+    assert file_signature(str(tmp_path / "a.jpeg"))[1] == 3
+    assert file_signature(str(tmp_path / "missing")) is None
+    assert file_digest(str(tmp_path / "a.jpeg")) == (
+        "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad")
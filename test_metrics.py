@@ -0,0 +1,45 @@
+import pytest
+
+import metrics
+from metrics import Histogram, histogram, prometheus_text, register_gauge, span, summary
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(metrics, "SPANS", {})
+    monkeypatch.setattr(metrics, "GAUGES", {})
+
+
+def test_histogram_buckets_and_quantiles():
+    hist = Histogram(buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0, 10.0):
+        hist.observe(value)
+    counts, count, total, maximum = hist.snapshot()
+    assert counts == [1, 2, 1, 1]
+    assert (count, total, maximum) == (5, 16.5, 10.0)
+    assert 1.0 <= hist.quantile(0.5) <= 2.0
+    assert hist.quantile(1.0) == 10.0
+    assert Histogram().quantile(0.5) is None
+
+
+def test_span_records_even_when_the_block_raises():
+    with span("work"):
+        pass
+    with pytest.raises(RuntimeError):
+        with span("work"):
+            raise RuntimeError
+    assert histogram("work").count == 2
+    assert [row[:2] for row in summary()] == [("work", 2)]
+
+
+def test_prometheus_text():
+    with span('page: "Quiz"'):
+        pass
+    register_gauge("cache", lambda: {"hits": 3})
+    register_gauge("broken", lambda: 1 / 0)
+    text = prometheus_text()
+    assert '# TYPE neonatal_span_seconds histogram' in text
+    assert 'neonatal_span_seconds_count{span="page: \\"Quiz\\""} 1' in text
+    assert 'neonatal_span_seconds_bucket{span="page: \\"Quiz\\"",le="+Inf"} 1' in text
+    assert 'neonatal_cache{key="hits"} 3' in text
+    assert "broken" not in text
@@ -0,0 +1,65 @@
+import os
+import shutil
+from types import SimpleNamespace
+
+import pytest
+
+import ocr_index
+from conftest import write_image
+from ocr_index import OcrIndex, metadata_caption
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    """Records which files are OCR'd; the text is the file name"""
+    seen = []
+
+    def extract(path):
+        seen.append(os.path.basename(path))
+        if "broken" in path:
+            return None, "Could not decode"
+        return f"text of {os.path.basename(path)}", None
+
+    monkeypatch.setattr(ocr_index, "lazy_module", lambda name: SimpleNamespace(get_tesseract_version=lambda: "5"))
+    monkeypatch.setattr(ocr_index, "_extract", extract)
+    monkeypatch.setattr(ocr_index, "PARALLEL_THRESHOLD", 10 ** 6)
+    return seen
+
+
+def test_png_text_chunk_is_a_caption(tmp_path):
+    from PIL import Image, PngImagePlugin
+
+    info = PngImagePlugin.PngInfo()
+    info.add_text("Description", "Arrow: pustule")
+    path = tmp_path / "captioned.png"
+    Image.new("RGB", (10, 10)).save(path, pnginfo=info)
+    assert metadata_caption(str(path)) == "Arrow: pustule"
+    write_image(tmp_path / "plain.png")
+    assert metadata_caption(str(tmp_path / "plain.png")) == ""
+
+
+def test_only_changed_content_is_ocrd(tmp_path, fake_ocr):
+    write_image(tmp_path / "a.png", color=(1, 2, 3))
+    write_image(tmp_path / "b.png", color=(4, 5, 6))
+    assert OcrIndex(str(tmp_path)).update()[:2] == (2, 0)
+
+    # Unchanged and renamed files reuse their text; new content is read
+    shutil.move(tmp_path / "b.png", tmp_path / "renamed.png")
+    write_image(tmp_path / "c.png", color=(7, 8, 9))
+    fake_ocr.clear()
+    assert OcrIndex(str(tmp_path)).update()[:2] == (1, 2)
+    assert fake_ocr == ["c.png"]
+
+    index = OcrIndex(str(tmp_path))
+    assert index.load()
+    assert index.figure_texts() == {"a.png": "text of a.png", "renamed.png": "text of b.png",
+                                    "c.png": "text of c.png"}
+
+
+def test_errors_are_reported_not_indexed(tmp_path, fake_ocr):
+    write_image(tmp_path / "ok.png")
+    (tmp_path / "broken.png").write_bytes(b"not an image")
+    done, reused, errors = OcrIndex(str(tmp_path)).update()
+    assert (done, reused) == (1, 0)
+    assert errors == {"broken.png": "Could not decode"}
+    assert set(ocr_index.read_figure_texts(str(tmp_path))[1]) == {"ok.png"}
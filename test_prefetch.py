@@ -0,0 +1,52 @@
+import threading
+
+from prefetch import Prefetcher
+
+
+def wait_for(prefetcher, total):
+    for _ in range(500):
+        stats = prefetcher.stats()
+        if sum(stats.values()) >= total:
+            return stats
+        threading.Event().wait(0.01)
+    raise AssertionError(prefetcher.stats())
+
+
+def test_fetches_each_item_once():
+    fetched = []
+    prefetcher = Prefetcher(fetched.append, workers=2)
+    prefetcher.schedule("s1", ["a", "b", "a"])
+    assert wait_for(prefetcher, 2) == {"fetched": 2}
+    assert sorted(fetched) == ["a", "b"]
+
+
+def test_new_schedule_cancels_queued_work():
+    release = threading.Event()
+    fetched = []
+
+    def fetch(item):
+        release.wait(5)
+        fetched.append(item)
+
+    prefetcher = Prefetcher(fetch, workers=1)
+    prefetcher.schedule("s1", ["old1", "old2", "old3"])
+    prefetcher.schedule("s1", ["new"])
+    release.set()
+    stats = wait_for(prefetcher, 4)
+    assert "new" in fetched and "old3" not in fetched
+    assert stats["cancelled"] + stats.get("skipped", 0) >= 2
+
+
+def test_overflow_is_dropped_and_failures_counted():
+    release = threading.Event()
+
+    def fetch(item):
+        release.wait(5)
+        if item == "bad":
+            raise OSError(item)
+
+    prefetcher = Prefetcher(fetch, workers=1, max_queued=2)
+    prefetcher.schedule("s1", ["bad", "ok", "extra"])
+    release.set()
+    stats = wait_for(prefetcher, 3)
+    assert stats == {"dropped": 1, "failed": 1, "fetched": 1}
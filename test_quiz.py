@@ -0,0 +1,82 @@
+import pytest
+
+from quiz import (DAY_S, INITIAL_EASE, MIN_EASE, RELEARN_DELAY_S, ReviewState, ReviewStore,
+                  build_deck, schedule)
+
+NOW = 1_000_000.0
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ReviewStore(str(tmp_path / "quiz.sqlite3"))
+
+
+def new_card(card_id="c"):
+    return ReviewState(card_id, 0, 0, INITIAL_EASE, NOW)
+
+
+def test_sm2_intervals_grow_1_6_then_by_ease():
+    state = schedule(new_card(), 4, NOW)
+    assert (state.repetitions, state.interval_days, state.due) == (1, 1, NOW + DAY_S)
+    state = schedule(state, 4, NOW)
+    assert (state.repetitions, state.interval_days) == (2, 6)
+    ease = state.ease
+    state = schedule(state, 4, NOW)
+    assert state.interval_days == round(6 * ease)
+    assert state.due == NOW + state.interval_days * DAY_S
+
+
+def test_sm2_ease_adjusts_with_quality():
+    assert schedule(new_card(), 5, NOW).ease == pytest.approx(INITIAL_EASE + 0.1)
+    assert schedule(new_card(), 4, NOW).ease == pytest.approx(INITIAL_EASE)
+    assert schedule(new_card(), 3, NOW).ease == pytest.approx(INITIAL_EASE - 0.14)
+    hard = new_card()
+    for _ in range(20):
+        hard = schedule(hard, 3, NOW)
+    assert hard.ease == MIN_EASE
+
+
+def test_sm2_failure_resets_and_relearns_soon():
+    state = schedule(schedule(new_card(), 5, NOW), 5, NOW)
+    failed = schedule(state, 1, NOW)
+    assert (failed.repetitions, failed.interval_days) == (0, 0)
+    assert failed.due == NOW + RELEARN_DELAY_S
+
+
+def test_build_deck_has_a_card_per_figure_pearl_and_flag(content):
+    deck = build_deck(content)
+    kinds = [card.kind for card in deck.values()]
+    assert kinds.count("figure") == content["stats"]["figures"]
+    assert kinds.count("pearl") == len(content["clinical_pearls"])
+    assert kinds.count("red flag") == len(content["red_flags"])
+    assert build_deck(content).keys() == deck.keys()
+
+
+def test_enroll_is_idempotent_and_due_in_deck_order(store):
+    store.enroll("u", ["a", "b", "c"], NOW)
+    store.enroll("u", ["a", "d"], NOW)
+    assert store.counts("u", NOW) == (4, 4)
+    assert [s.card_id for s in store.due_cards("u", NOW, limit=3)] == ["a", "b", "c"]
+    assert store.counts("other", NOW) == (0, 0)
+
+
+def test_recorded_state_is_visible_before_and_after_commit(store):
+    store.enroll("u", ["a", "b"], NOW)
+    later = schedule(store.state("u", "a"), 4, NOW)
+    store.record("u", later, NOW)
+    for _ in range(2):
+        assert store.state("u", "a") == later
+        assert [s.card_id for s in store.due_cards("u", NOW, limit=5)] == ["b"]
+        assert store.counts("u", NOW) == (1, 2)
+        assert store.next_due_time("u") < later.due
+        store.flush()
+
+
+def test_counts_track_cards_recorded_without_enrolling(store, tmp_path):
+    store.enroll("u", ["a"], NOW)
+    store.counts("u", NOW)  # load the enrolled total before the insert
+    store.record("u", ReviewState("new", 0, 0, INITIAL_EASE, NOW - 1), NOW)
+    assert store.counts("u", NOW) == (2, 2)
+    store.flush()
+    assert store.counts("u", NOW) == (2, 2)
+    assert ReviewStore(str(tmp_path / "quiz.sqlite3")).counts("u", NOW) == (2, 2)
@@ -0,0 +1,111 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+import rash_classifier
+from rash_classifier import BatchingClassifier, ClassifierBusy, RashClassifier
+
+
+class FakeInterpreter:
+    """Two-class 'model' scoring each image by its mean pixel"""
+
+    allocations = 0
+
+    def __init__(self, model_path, num_threads):
+        self.shape = None
+
+    def get_input_details(self):
+        return [{"index": 0, "shape": [1, 8, 8, 3], "dtype": np.float32, "quantization": (0, 0)}]
+
+    def get_output_details(self):
+        return [{"index": 1, "quantization": (0, 0)}]
+
+    def resize_tensor_input(self, index, shape):
+        self.shape = list(shape)
+
+    def allocate_tensors(self):
+        FakeInterpreter.allocations += 1
+
+    def set_tensor(self, index, batch):
+        assert list(batch.shape) == self.shape
+        self.batch = batch
+
+    def invoke(self):
+        mean = self.batch.mean(axis=(1, 2, 3))
+        self.scores = np.stack([mean, 1 - mean], axis=1)
+
+    def get_tensor(self, index):
+        return self.scores
+
+
+@pytest.fixture
+def classifier(tmp_path, monkeypatch):
+    monkeypatch.setattr(rash_classifier, "_interpreter_class", lambda: FakeInterpreter)
+    FakeInterpreter.allocations = 0
+    model = tmp_path / "model.tflite"
+    (tmp_path / "model.labels.json").write_text(json.dumps(["bright", "dark"]))
+    return RashClassifier(str(model), batch_size=4)
+
+
+def image(value):
+    return np.full((8, 8, 3), value, np.float32)
+
+
+@pytest.mark.parametrize("count", [1, 3, 4, 9])
+def test_predict_pads_or_splits_to_the_allocated_batch(classifier, count):
+    values = [0.1 * (i % 10) for i in range(count)]
+    scores = classifier.predict([image(v) for v in values])
+    assert scores.shape == (count, 2)
+    assert np.allclose(scores[:, 0], values)
+    assert FakeInterpreter.allocations == 1
+
+
+def test_top_k(classifier):
+    scores = classifier.predict([image(0.8)])
+    assert classifier.top_k(scores[0], k=1) == [("bright", pytest.approx(0.8))]
+
+
+def test_preprocess_decodes_and_resizes(classifier):
+    cv2 = pytest.importorskip("cv2")
+    _, encoded = cv2.imencode(".png", np.full((20, 30, 3), 255, np.uint8))
+    assert classifier.preprocess(encoded.tobytes()).shape == (8, 8, 3)
+    with pytest.raises(ValueError):
+        classifier.preprocess(b"not an image")
+
+
+def test_batching_classifier_answers_each_request(classifier):
+    classifier.preprocess = lambda value: image(value)
+    batcher = BatchingClassifier(classifier, batch_size=4, max_wait_ms=5)
+    results = batcher.classify([0.9, 0.2, 0.6], k=1)
+    assert [r[0][0] for r in results] == ["bright", "dark", "bright"]
+
+
+def test_timeout_raises_busy(classifier):
+    release = threading.Event()
+
+    def slow(value):
+        release.wait(5)
+        return image(value)
+
+    classifier.preprocess = slow
+    batcher = BatchingClassifier(classifier)
+    try:
+        with pytest.raises(ClassifierBusy):
+            batcher.classify([0.5], timeout=0.05)
+    finally:
+        release.set()
+
+
+def test_full_queue_raises_busy(classifier):
+    release = threading.Event()
+    classifier.preprocess = lambda value: (release.wait(5), image(value))[1]
+    batcher = BatchingClassifier(classifier, queue_size=1)
+    try:
+        batcher.submit(0.5)  # taken by the worker, which then blocks
+        with pytest.raises(ClassifierBusy):
+            for _ in range(3):
+                batcher.submit(0.5)
+    finally:
+        release.set()
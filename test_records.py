@@ -0,0 +1,35 @@
+import pickle
+
+from records import ConditionTable, make_condition
+
+CONDITIONS = [
+    make_condition("A", "a.jpeg", "Figure 1", [("Appearance", "red")], "Ch 1", "benign", "pustular"),
+    make_condition("B", "b.jpeg", "Figure 2", [("Treatment", "none")], "Ch 1", "infectious"),
+    make_condition("C", "c.jpeg", "Figure 3", [("Appearance", "blue"), ("Treatment", "cream")],
+                   "Ch 2", "benign", "vascular"),
+]
+
+
+def test_features_unpack_and_labels_are_interned():
+    label, value = CONDITIONS[0].features[0]
+    assert (label, value) == ("Appearance", "red")
+    assert label is CONDITIONS[2].features[0].label
+
+
+def test_pickle_round_trip_keeps_interning():
+    restored = pickle.loads(pickle.dumps(CONDITIONS))
+    assert restored == CONDITIONS
+    assert restored[0].features[0].label is CONDITIONS[0].features[0].label
+    assert restored[1].as_dict()["features"] == [["Treatment", "none"]]
+
+
+def test_table_mask_select_counts():
+    table = ConditionTable(CONDITIONS)
+    assert len(table) == 3
+    assert [c.name for c in table.select(table.mask(category="benign"))] == ["A", "C"]
+    assert [c.name for c in table.select(table.mask(category="benign", chapter="Ch 1"))] == ["A"]
+    assert [c.name for c in table.select(table.mask(subgroup=None))] == ["B"]
+    assert [c.name for c in table.select(table.mask(label="Treatment"))] == ["B", "C"]
+    assert [c.name for c in table.select(table.mask(label="Missing"))] == []
+    assert [c.name for c in table.select(table.mask(chapter=["Ch 2", "Ch 9"]))] == ["C"]
+    assert table.counts("category") == {"benign": 2, "infectious": 1}
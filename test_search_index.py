@@ -0,0 +1,69 @@
+from records import make_condition
+from search_index import SearchIndex, normalize, tokenize
+
+CONDITIONS = {
+    "infectious": [
+        make_condition("Neonatal Herpes Simplex", "10_hsv.jpeg", "Figure 10",
+                       [("Appearance", "Grouped vesicles on an erythematous base"),
+                        ("Treatment", "IV acyclovir")]),
+        make_condition("Congenital Candidiasis", "11_candida.jpeg", "Figure 11",
+                       [("Appearance", "Erythematous papules and pustules")]),
+    ],
+    "benign": [
+        make_condition("Erythema Toxicum", "02_etn.jpeg", "Figure 2",
+                       [("Appearance", "Erythematous macules with central papules")]),
+    ],
+}
+PEARLS = [("Vesicles in a febrile neonate", "Herpes simplex until proven otherwise")]
+
+
+def build(**kwargs):
+    return SearchIndex.build(CONDITIONS, clinical_pearls=PEARLS, **kwargs)
+
+
+def test_tokenize_drops_stopwords_and_accents():
+    assert tokenize("The Café and a Rash") == ["cafe", "rash"]
+    assert normalize("ÉRYTHÈME") == "erytheme"
+
+
+def test_exact_match_ranks_name_above_features():
+    hits = build().search("candidiasis")
+    assert [h.document.title for h in hits] == ["Congenital Candidiasis"]
+    assert (hits[0].field, hits[0].match) == ("name", "exact")
+
+
+def test_prefix_and_typo_matches():
+    prefix = build().search("acyc")
+    assert prefix[0].document.title == "Neonatal Herpes Simplex"
+    assert prefix[0].match == "prefix"
+    fuzzy = build().search("acylcovir")
+    assert fuzzy[0].document.title == "Neonatal Herpes Simplex"
+    assert fuzzy[0].match == "fuzzy"
+
+
+def test_every_token_must_match():
+    assert [h.document.title for h in build().search("erythematous pustules")] == [
+        "Congenital Candidiasis"]
+    assert build().search("vesicles zzzz") == []
+
+
+def test_limit_and_kinds():
+    index = build()
+    everything = index.search("erythematous")
+    assert len(everything) == 3
+    assert index.search("erythematous", limit=2) == everything[:2]
+    kinds = {h.document.kind for h in index.search("vesicles", kinds=["pearl"])}
+    assert kinds == {"pearl"}
+
+
+def test_figure_text_is_searchable():
+    index = build(figure_texts={"11_candida.jpeg": "Arrow: satellite lesions"})
+    hits = index.search("satellite")
+    assert [h.document.title for h in hits] == ["Congenital Candidiasis"]
+    assert hits[0].field == "figure text"
+
+
+def test_shipped_content_finds_conditions(content):
+    index = SearchIndex.build(content["conditions"], content["clinical_pearls"],
+                              content["red_flags"], content["lab_tests"], content["treatments"])
+    assert any(h.document.title == "Aplasia Cutis Congenita" for h in index.search("aplasia"))
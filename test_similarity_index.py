@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from similarity_index import SimilarityIndex
+
+
+def write_pattern(path, flip=False, color=(200, 80, 60), shift=0):
+    """Left-to-right gradient in one hue; flip reverses it"""
+    ramp = np.linspace(0, 1, 128)[::-1 if flip else 1]
+    pixels = np.clip(ramp[None, :, None] * np.array(color)[None, None, :] + shift, 0, 255)
+    Image.fromarray(np.repeat(pixels, 96, axis=0).astype("uint8")).save(path)
+
+
+@pytest.fixture
+def photo_dir(tmp_path):
+    write_pattern(tmp_path / "a.jpeg")
+    write_pattern(tmp_path / "a_bright.jpeg", shift=8)
+    write_pattern(tmp_path / "b.jpeg", flip=True, color=(40, 90, 220))
+    write_pattern(tmp_path / "c.png", color=(40, 200, 60))
+    return tmp_path
+
+
+def test_nearest_neighbours(photo_dir):
+    index = SimilarityIndex(str(photo_dir))
+    assert index.update() == 4
+    similar = index.similar("a.jpeg", k=3)
+    assert similar[0][0] == "a_bright.jpeg"
+    assert [name for name, _ in similar][-1] == "b.jpeg"
+    assert [score for _, score in similar] == sorted((s for _, s in similar), reverse=True)
+    assert index.similar("unknown.jpeg") == []
+
+
+def test_update_reuses_unchanged_images(photo_dir):
+    index = SimilarityIndex(str(photo_dir))
+    index.update()
+    before = index.similar("a.jpeg")
+    assert not index.is_stale()
+    write_pattern(photo_dir / "d.jpeg", color=(200, 80, 70))
+    assert index.is_stale()
+    assert index.update() == 1
+
+    reopened = SimilarityIndex(str(photo_dir))
+    assert reopened.load()
+    assert len(reopened.entries) == 5
+    assert reopened.similar("a.jpeg", k=2)[0] == before[0]
+
+
+def test_undecodable_images_are_skipped_and_recorded(photo_dir):
+    (photo_dir / "stray.jpeg").write_bytes(b"not an image")
+    index = SimilarityIndex(str(photo_dir))
+    assert index.update() == 4
+    assert [f[0] for f in index.failed] == ["stray.jpeg"]
+    assert not index.is_stale()
+    assert index.update() == 0  # not retried until it changes
+    os.remove(photo_dir / "stray.jpeg")
+    assert index.is_stale()
+    index.update()
+    assert index.failed == []
+
+
+def test_refresh_without_build_only_reads_the_index(photo_dir):
+    index = SimilarityIndex(str(photo_dir))
+    index.refresh(max_age_s=0, build=False)
+    assert index.entries == []
+    assert not os.path.exists(photo_dir / "similarity")
+    SimilarityIndex(str(photo_dir)).update()
+    index.refresh(max_age_s=0, build=False)
+    assert len(index.entries) == 4
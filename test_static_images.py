@@ -0,0 +1,106 @@
+import http.client
+import os
+
+import pytest
+
+from static_images import IMMUTABLE_CACHE, REVALIDATE_CACHE, parse_range, start_image_server
+
+BODY = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "a.jpeg").write_bytes(BODY)
+    (tmp_path / "renditions").mkdir()
+    (tmp_path / "renditions" / "a-320.jpeg").write_bytes(b"small")
+    (tmp_path / "integrity.json").write_text("{}")
+    httpd, hashes = start_image_server(str(tmp_path), port=0, host="127.0.0.1")
+    yield httpd.server_address[1], hashes
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def request(port, path, headers=None, method="GET"):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request(method, path, headers=headers or {})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response, body
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=100-", 100) == "invalid"
+    assert parse_range("bytes=9-1", 100) == "invalid"
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+
+
+def test_full_response_is_immutable_under_the_current_hash(server):
+    port, hashes = server
+    response, body = request(port, hashes.url_path("a.jpeg"))
+    assert response.status == 200 and body == BODY
+    assert response.getheader("Cache-Control") == IMMUTABLE_CACHE
+    assert response.getheader("ETag") == f'"{hashes.digest("a.jpeg")}"'
+    assert response.getheader("Content-Type") == "image/jpeg"
+
+    response, body = request(port, "/img/0000000000000000/a.jpeg")
+    assert response.status == 200 and body == BODY
+    assert response.getheader("Cache-Control") == REVALIDATE_CACHE
+
+
+def test_range_requests(server):
+    port, hashes = server
+    url = hashes.url_path("a.jpeg")
+    response, body = request(port, url, {"Range": "bytes=10-19"})
+    assert response.status == 206 and body == BODY[10:20]
+    assert response.getheader("Content-Range") == f"bytes 10-19/{len(BODY)}"
+
+    response, body = request(port, url, {"Range": f"bytes={len(BODY)}-"})
+    assert response.status == 416 and body == b""
+    assert response.getheader("Content-Range") == f"bytes */{len(BODY)}"
+
+    # If-Range with a stale validator gets the whole file
+    response, body = request(port, url, {"Range": "bytes=10-19", "If-Range": '"stale"'})
+    assert response.status == 200 and body == BODY
+
+
+def test_conditional_requests(server):
+    port, hashes = server
+    url = hashes.url_path("a.jpeg")
+    etag = request(port, url)[0].getheader("ETag")
+    response, body = request(port, url, {"If-None-Match": etag})
+    assert response.status == 304 and body == b""
+    assert request(port, url, {"If-None-Match": '"other"'})[0].status == 200
+    last_modified = request(port, url)[0].getheader("Last-Modified")
+    assert request(port, url, {"If-Modified-Since": last_modified})[0].status == 304
+
+
+def test_head_sends_headers_only(server):
+    port, hashes = server
+    response, body = request(port, hashes.url_path("a.jpeg"), method="HEAD")
+    assert response.status == 200 and body == b""
+    assert response.getheader("Content-Length") == str(len(BODY))
+
+
+def test_only_images_under_the_root_are_served(server):
+    port, hashes = server
+    assert request(port, hashes.url_path("renditions/a-320.jpeg"))[1] == b"small"
+    for path in ("integrity.json", "../a.jpeg", "missing.jpeg", "renditions"):
+        assert request(port, f"/img/0/{path}")[0].status == 404
+    assert request(port, "/other/0/a.jpeg")[0].status == 404
+
+
+def test_digest_follows_file_changes(server, tmp_path):
+    _, hashes = server
+    before = hashes.digest("a.jpeg")
+    path = tmp_path / "a.jpeg"
+    path.write_bytes(b"changed")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert hashes.digest("a.jpeg") != before
+    assert hashes.digest("missing.jpeg") is None
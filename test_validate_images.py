@@ -0,0 +1,72 @@
+import os
+
+from build_renditions import build_all
+from conftest import write_image
+from validate_images import (INTEGRITY_MANIFEST, load_manifest, startup_problems,
+                             trusted_versions, validate, write_manifest)
+
+
+def validated(image_dir, content, **kwargs):
+    manifest = validate(image_dir, content, workers=2, **kwargs)
+    write_manifest(manifest, image_dir)
+    return manifest
+
+
+def replace_image(path, size=(130, 90), color=(0, 0, 0)):
+    stat = os.stat(path)
+    write_image(path, size, color)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_clean_image_root_validates(image_dir, content):
+    build_all(image_dir, widths=(64,), codecs=["jpeg"])
+    manifest = validated(image_dir, content)
+    assert manifest["problems"] == {}
+    # Original plus renditions at 64px and at the original width
+    assert len(manifest["files"]) == 3 * content["stats"]["figures"]
+    assert load_manifest(image_dir) == manifest
+    assert startup_problems(image_dir, content, manifest) == []
+    assert set(trusted_versions(manifest)) == set(manifest["files"])
+
+
+def test_missing_and_broken_figures_are_reported(image_dir, content):
+    first, second = sorted(trusted_versions(validated(image_dir, content)))[:2]
+    os.remove(os.path.join(image_dir, first))
+    with open(os.path.join(image_dir, second), "wb") as f:
+        f.write(b"not an image")
+    manifest = validated(image_dir, content)
+    assert "missing" in manifest["problems"][first][0]
+    assert "does not decode" in manifest["problems"][second][0]
+    problems = startup_problems(image_dir, content, manifest)
+    assert len(problems) == 2
+    assert second not in trusted_versions(manifest)
+
+
+def test_replaced_image_needs_accept_changes(image_dir, content):
+    validated(image_dir, content)
+    name = content["conditions"]["benign"][0].image
+    path = os.path.join(image_dir, name)
+    replace_image(path)
+
+    problems = startup_problems(image_dir, content, load_manifest(image_dir))
+    assert problems == [f"{name}: changed since validation "
+                        "(run validate_images.py --accept-changes if intended)"]
+    manifest = validated(image_dir, content)
+    assert "checksum changed" in manifest["problems"][name][0]
+    # Reported again until accepted
+    assert "checksum changed" in validated(image_dir, content)["problems"][name][0]
+
+    accepted = validated(image_dir, content, accept_changes=True)
+    assert accepted["problems"] == {}
+    assert trusted_versions(accepted)[name] == os.stat(path).st_mtime_ns
+
+
+def test_without_a_manifest_only_missing_figures_fail(image_dir, content):
+    assert load_manifest(image_dir) is None
+    assert startup_problems(image_dir, content, None) == []
+    name = content["conditions"]["other"][0].image
+    os.remove(os.path.join(image_dir, name))
+    assert startup_problems(image_dir, content, None) == [f"{name}: missing"]
+    assert "image directory not found" in startup_problems(
+        os.path.join(image_dir, "nope"), content, None)[0]
+    assert not os.path.exists(os.path.join(image_dir, INTEGRITY_MANIFEST))
@@ -0,0 +1,103 @@
+"""
+Train and export the rash classifier used by the photo upload page
+Fine-tunes a MobileNetV3-Small head on a folder of labelled photos and
+exports a quantized TFLite model (uint8 input and output) plus its labels file.
+
+Dataset layout: one subfolder per condition, named after the condition's
+figure file without extension (e.g. DATASET/10_hsv/*.jpg).
+
+Usage: python train_classifier.py DATASET [--epochs 10] [--output models/rash_classifier.tflite]
+"""
+
+import argparse
+import json
+import os
+
+from lazy_imports import tensorflow
+from rash_classifier import MODEL_PATH, labels_path
+
+IMAGE_SIZE = 224
+
+
+def load_dataset(dataset_dir, batch_size):
+    """Training and validation splits plus the class names in label order"""
+    tf = tensorflow()
+    options = dict(
+        image_size=(IMAGE_SIZE, IMAGE_SIZE), batch_size=batch_size,
+        validation_split=0.2, seed=80, label_mode="int",
+    )
+    train = tf.keras.utils.image_dataset_from_directory(dataset_dir, subset="training", **options)
+    val = tf.keras.utils.image_dataset_from_directory(dataset_dir, subset="validation", **options)
+    return train, val, train.class_names
+
+
+def build_model(num_classes):
+    """Frozen MobileNetV3-Small backbone with light augmentation and a softmax head
+
+    The model takes [0, 1] float pixels, matching RashClassifier.preprocess.
+    """
+    tf = tensorflow()
+    backbone = tf.keras.applications.MobileNetV3Small(
+        input_shape=(IMAGE_SIZE, IMAGE_SIZE, 3), include_top=False, pooling="avg",
+        weights="imagenet", include_preprocessing=True,
+    )
+    backbone.trainable = False
+
+    inputs = tf.keras.Input((IMAGE_SIZE, IMAGE_SIZE, 3))
+    x = tf.keras.layers.RandomFlip("horizontal")(inputs)
+    x = tf.keras.layers.RandomRotation(0.1)(x)
+    x = tf.keras.layers.Rescaling(255.0)(x)
+    x = backbone(x, training=False)
+    x = tf.keras.layers.Dropout(0.2)(x)
+    outputs = tf.keras.layers.Dense(num_classes, activation="softmax")(x)
+    return tf.keras.Model(inputs, outputs)
+
+
+def export_tflite(model, representative, output_path):
+    """Convert to a fully quantized TFLite model with uint8 input and output
+
+    The input tensor's scale/zero point map the [0, 1] pixels the model was
+    trained on; RashClassifier.preprocess quantizes with them and predict()
+    dequantizes the scores.
+    """
+    tf = tensorflow()
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.uint8
+    converter.inference_output_type = tf.uint8
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and export the rash classifier")
+    parser.add_argument("dataset")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--output", default=MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    train, val, class_names = load_dataset(args.dataset, args.batch_size)
+    normalize = lambda images, labels: (images / 255.0, labels)  # noqa: E731
+    train, val = train.map(normalize), val.map(normalize)
+
+    model = build_model(len(class_names))
+    model.compile(optimizer="adam", loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+    model.fit(train, validation_data=val, epochs=args.epochs)
+
+    def representative():
+        for images, _ in train.take(20):
+            for image in images:
+                yield [image[None, ...]]
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    export_tflite(model, representative, args.output)
+    with open(labels_path(args.output), "w", encoding="utf-8") as f:
+        json.dump(class_names, f, indent=2)
+    print(f"Wrote {args.output} ({len(class_names)} classes)")
+
+
+if __name__ == "__main__":
+    main()
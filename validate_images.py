@@ -0,0 +1,203 @@
+"""
+Image integrity check and manifest
+Checks every file the content references (each condition's figure plus the
+renditions listed in the renditions manifest) in parallel: it must exist,
+fully decode, have the dimensions the renditions manifest recorded for it,
+and keep the checksum it had at the last validation. The result is written
+to <IMG_DIR>/integrity.json.
+
+The app and the API trust that manifest at runtime: images listed in it are
+served without a per-request stat, and startup only compares file sizes
+against it. If any referenced file is missing, broken or changed, startup
+fails with the list of problems instead of rendering blank figure cards.
+
+Usage: python validate_images.py [--image-dir DIR] [--workers N] [--accept-changes] [--check]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from content_loader import CONTENT_DIR, load_content
+from images import IMG_DIR, RENDITIONS_SUBDIR, file_digest, load_rendition_manifest
+
+INTEGRITY_MANIFEST = "integrity.json"
+MANIFEST_VERSION = 1
+
+VALIDATE_WORKERS = 8
+
+
+def referenced_files(content, renditions):
+    """{path relative to the image root: expected (width, height) or None}"""
+    files = {}
+    for conditions in content["conditions"].values():
+        for condition in conditions:
+            entry = renditions.get("images", {}).get(condition.image)
+            files[condition.image] = (entry["width"], entry["height"]) if entry else None
+            for rendition in entry["renditions"] if entry else ():
+                files[f"{RENDITIONS_SUBDIR}/{rendition['file']}"] = (rendition["width"],
+                                                                     rendition["height"])
+    return files
+
+
+def check_file(image_dir, relative_path, expected, previous=None):
+    """(manifest entry or None, [problems]) for one referenced file
+
+    previous is this file's entry from the last manifest, whose sha256 is the
+    accepted checksum; None accepts whatever the file holds now.
+    """
+    from PIL import Image
+
+    path = os.path.join(image_dir, relative_path)
+    try:
+        stat = os.stat(path)
+        checksum = file_digest(path)
+    except OSError as exc:
+        return None, [f"missing or unreadable ({exc.strerror})"]
+
+    problems = []
+    try:
+        with Image.open(path) as image:
+            image.load()  # full decode: catches truncated files that open() accepts
+            size, image_format = image.size, image.format
+    except Exception as exc:
+        return None, [f"does not decode ({exc})"]
+
+    if expected and tuple(expected) != size:
+        problems.append(f"is {size[0]}x{size[1]}, expected {expected[0]}x{expected[1]}")
+    if previous and previous["sha256"] != checksum:
+        problems.append("checksum changed since the last validation "
+                        "(run with --accept-changes if intended)")
+        # Keep the accepted checksum so the change is reported until accepted
+        checksum = previous["sha256"]
+
+    entry = {"bytes": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": checksum,
+             "width": size[0], "height": size[1], "format": image_format}
+    return entry, problems
+
+
+def validate(image_dir=IMG_DIR, content=None, workers=VALIDATE_WORKERS, accept_changes=False):
+    """Check every referenced file and return the integrity manifest
+
+    With accept_changes, files whose checksum differs from the previous
+    manifest are accepted (an intentional image update) instead of reported.
+    """
+    content = content or load_content(CONTENT_DIR)
+    files = referenced_files(content, load_rendition_manifest(image_dir))
+    previous = {} if accept_changes else (load_manifest(image_dir) or {}).get("files", {})
+
+    paths = sorted(files)
+    with ThreadPoolExecutor(workers) as pool:
+        results = list(pool.map(
+            lambda p: check_file(image_dir, p, files[p], previous.get(p)), paths))
+
+    manifest = {"version": MANIFEST_VERSION, "content_version": content["version"],
+                "validated_at": time.time(), "files": {}, "problems": {}}
+    for path, (entry, problems) in zip(paths, results):
+        if entry:
+            manifest["files"][path] = entry
+        if problems:
+            manifest["problems"][path] = problems
+    return manifest
+
+
+def manifest_path(image_dir=IMG_DIR):
+    return os.path.join(image_dir, INTEGRITY_MANIFEST)
+
+
+def write_manifest(manifest, image_dir=IMG_DIR):
+    """Write the manifest via an atomic rename"""
+    path = manifest_path(image_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(image_dir=IMG_DIR):
+    """The integrity manifest, or None if it is missing or from another version"""
+    try:
+        with open(manifest_path(image_dir), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+
+def startup_problems(image_dir, content, manifest):
+    """["<file>: <problem>"] that should stop the app from serving this content
+
+    Cheap enough for startup: with a manifest, its recorded problems plus any
+    figure it doesn't cover or whose size changed since; without one, only
+    figures missing from the image root.
+    """
+    images = sorted({c.image for conditions in content["conditions"].values()
+                     for c in conditions})
+    if manifest is None:
+        try:
+            present = set(os.listdir(image_dir))
+        except OSError:
+            return [f"{image_dir}: image directory not found (set NEONATAL_IMAGE_DIR)"]
+        return [f"{name}: missing" for name in images if name not in present]
+
+    problems = [f"{path}: {problem}" for path, found in sorted(manifest["problems"].items())
+                for problem in found]
+    for path, entry in sorted(manifest["files"].items()):
+        if path in manifest["problems"]:
+            continue
+        try:
+            size = os.stat(os.path.join(image_dir, path)).st_size
+        except OSError:
+            problems.append(f"{path}: missing")
+            continue
+        if size != entry["bytes"]:
+            problems.append(f"{path}: changed since validation "
+                            "(run validate_images.py --accept-changes if intended)")
+    problems += [f"{name}: not in {INTEGRITY_MANIFEST} (re-run validate_images.py)"
+                 for name in images
+                 if name not in manifest["files"] and name not in manifest["problems"]]
+    return problems
+
+
+def trusted_versions(manifest):
+    """{relative path: mtime_ns} of files that passed validation, for ImageCache(trusted=...)"""
+    if manifest is None:
+        return {}
+    return {path: entry["mtime_ns"] for path, entry in manifest["files"].items()
+            if path not in manifest["problems"]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate referenced images and write the integrity manifest")
+    parser.add_argument("--image-dir", default=IMG_DIR)
+    parser.add_argument("--content-dir", default=CONTENT_DIR)
+    parser.add_argument("--workers", type=int, default=VALIDATE_WORKERS)
+    parser.add_argument("--accept-changes", action="store_true",
+                        help="Record changed checksums instead of reporting them")
+    parser.add_argument("--check", action="store_true",
+                        help="Only check the existing manifest against the files (deploy gate)")
+    args = parser.parse_args(argv)
+
+    content = load_content(args.content_dir)
+    if args.check:
+        problems = startup_problems(args.image_dir, content, load_manifest(args.image_dir))
+    else:
+        manifest = validate(args.image_dir, content, args.workers, args.accept_changes)
+        write_manifest(manifest, args.image_dir)
+        problems = [f"{path}: {problem}" for path, found in sorted(manifest["problems"].items())
+                    for problem in found]
+        print(f"Validated {len(set(manifest['files']) | set(manifest['problems']))} files; "
+              f"wrote {manifest_path(args.image_dir)}")
+
+    for problem in problems:
+        print(f"  {problem}")
+    if problems:
+        sys.exit(f"FAIL: {len(problems)} image problems")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()